@@ -0,0 +1,93 @@
+import sys
+import os
+import io
+import time
+import datetime
+import tempfile
+import argparse
+import contextlib
+import pandas as pd
+
+# Add 'fortress-paper' to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), 'fortress-paper')))
+
+from core.analyzer import MarketAnalyzer, analyze_history, INDEX_ROOTS
+from core.scrip_master import ScripMaster
+from core.candle_store import CandleStore
+from bench_history_fetch import StubDhan
+
+class StubDB:
+    """
+    Supabase stand-in: fixed latency per candle upsert.
+    """
+    def __init__(self, latency=0.1):
+        self.latency = latency
+        self.zones = []
+
+    def save_market_data(self, df, symbol, timeframe='15m'):
+        time.sleep(self.latency)
+
+    def save_zones(self, zones):
+        self.zones = zones
+
+def stub_master(stocks):
+    expiry = (datetime.date.today() + datetime.timedelta(days=20)).strftime('%Y-%m-%d')
+    rows = [(1000 + i, f"{root}-FUT", 'FUTIDX') for i, root in enumerate(INDEX_ROOTS)]
+    rows += [(2000 + i, f"STOCK{i}-FUT", 'FUTSTK') for i in range(stocks)]
+    df = pd.DataFrame(rows, columns=['security_id', 'trading_symbol', 'instrument'])
+    df['expiry'] = expiry
+    return ScripMaster(ScripMaster._apply_dtypes(df))
+
+def warm_store(path, master, dhan):
+    """
+    60 days already stored (the usual pre-market state): only today's tail is fetched.
+    """
+    store = CandleStore(db_path=path)
+    end = datetime.datetime.now()
+    start = end - datetime.timedelta(days=60)
+    latency, dhan.latency = dhan.latency, 0
+    for sec_id in master.df['security_id'].astype(str):
+        res = dhan.intraday_minute_data(sec_id, None, None, start.strftime('%Y-%m-%d'),
+                                        (end - datetime.timedelta(days=1)).strftime('%Y-%m-%d'))
+        store.save(sec_id, pd.DataFrame(res['data']), covered_from=start)
+    dhan.latency, dhan.calls = latency, []
+    return store
+
+def run_benchmark(stocks=60, latency=0.3, db_latency=0.1, workers=None):
+    master = stub_master(stocks)
+    dhan = StubDhan(latency)
+    tmp = tempfile.mkdtemp(prefix="analyzer_bench_")
+    store = warm_store(os.path.join(tmp, "candles.db"), master, dhan)
+    db = StubDB(db_latency)
+
+    analyzer = MarketAnalyzer(dhan=dhan, db=db, store=store, universe='all', analysis_workers=workers)
+    analyzer.scrip_master = master
+    print(f"📊 {len(master)} futures (4 indices + {stocks} stocks), stub Dhan {latency * 1000:.0f} ms, "
+          f"Supabase {db_latency * 1000:.0f} ms, shared 5 req/s limit")
+
+    out = io.StringIO()
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(out):
+        zones = analyzer.run_analysis()
+    wall = time.perf_counter() - t0
+    print("\n".join(line for line in out.getvalue().splitlines() if line.startswith(('⏱️', '   '))
+                    and not line.startswith('   Fetching')))
+
+    # One symbol at a time (previous loop): every stage back to back
+    sample = master.near_futures(['STOCK0'], 'FUTSTK')['STOCK0']
+    with contextlib.redirect_stdout(io.StringIO()):
+        t0 = time.perf_counter()
+        df_1m = analyzer.fetch_deep_history(sample[0], sample[1], 'FUTSTK')
+        df_15m, sample_zones, _ = analyze_history(sample[0], sample[1], df_1m)
+        db.save_market_data(df_15m, sample[1])
+        per_symbol = time.perf_counter() - t0
+    print(f"✅ {len(zones)} zones from {len(master)} symbols in {wall:.1f}s "
+          f"(one at a time: ~{per_symbol * len(master):.0f}s at {per_symbol:.2f}s per symbol)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pipelined analyzer benchmark over a stub F&O universe")
+    parser.add_argument('--stocks', type=int, default=60)
+    parser.add_argument('--latency', type=float, default=0.3)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+    run_benchmark(stocks=args.stocks, latency=args.latency, workers=args.workers)
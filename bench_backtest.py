@@ -0,0 +1,100 @@
+import sys
+import os
+import io
+import time
+import contextlib
+import numpy as np
+import pandas as pd
+
+# Add 'fortress-paper' to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), 'fortress-paper')))
+
+from core.backtest import Backtester, build_daily_zones, find_entries
+from core.analysis_utils import identify_smart_money_structure
+from core.strategy import FortressStrategy
+
+def make_1m_year(start_price, days=250, seed=0, vol=0.0006):
+    """
+    Synthetic NSE sessions (09:15-15:30 IST = 03:45-10:00 UTC), 375 x 1m bars per day.
+    """
+    rng = np.random.default_rng(seed)
+    sessions = pd.bdate_range(end='2025-12-31', periods=days)
+    minute = np.arange(375) * 60 + (3 * 3600 + 45 * 60)
+    ts = ((sessions.values.astype('datetime64[s]').astype(np.int64))[:, None] + minute[None, :]).ravel()
+    close = start_price * np.exp(np.cumsum(rng.normal(0, vol, len(ts))))
+    open_ = np.r_[start_price, close[:-1]]
+    spread = np.abs(rng.normal(0, vol * start_price, len(ts)))
+    return pd.DataFrame({
+        'timestamp': ts, 'open': open_, 'close': close,
+        'high': np.maximum(open_, close) + spread, 'low': np.minimum(open_, close) - spread,
+        'volume': rng.integers(100, 1000, len(ts)).astype(float),
+    })
+
+def to_15m_frame(bars, until):
+    ts, o, h, l, c = bars.m15
+    keep = ts < until
+    return pd.DataFrame({'start_time': pd.to_datetime(ts[keep], unit='s'), 'open': o[keep], 'high': h[keep],
+                         'low': l[keep], 'close': c[keep]})
+
+def verify_zones(bars, params, sample=15):
+    """
+    Zones per day vs identify_smart_money_structure on the same 15m history.
+    """
+    days, level, is_supply, ids = build_daily_zones(bars, params)
+    mismatches = 0
+    for d in days[params['lookback_days'] // 7 * 5::max(len(days) // sample, 1)]:
+        hist = to_15m_frame(bars, d * 86400)
+        hist = hist[hist['start_time'] >= pd.Timestamp((d - params['lookback_days']) * 86400, unit='s')]
+        with contextlib.redirect_stdout(io.StringIO()):
+            zones = identify_smart_money_structure(hist.reset_index(drop=True), bars.symbol, '0')
+        k = np.searchsorted(days, d)
+        expected = [(z['id'], z['range_high'] if z['type'] == 'SUPPLY' else z['range_low']) for z in zones]
+        got = [(ids[k, j], level[k, j]) for j in range(6) if ids[k, j] is not None]
+        if expected != got:
+            mismatches += 1
+    return mismatches
+
+def verify_entries(bars, params, sample_days=10):
+    """
+    Vectorized entries vs FortressStrategy.check_entry per 5m candle (both sentiments tried, BEARISH first).
+    """
+    days, level, is_supply, ids = build_daily_zones(bars, params)
+    ent = find_entries(bars, params)
+    got = {int(t) for t in ent['time']}
+    ts5, o5, h5, l5, c5 = bars.m5
+    expected = set()
+    for d in days[-sample_days:]:
+        k = np.searchsorted(days, d)
+        strategy = FortressStrategy(zones_file=None)
+        strategy.zones = [{'id': ids[k, j], 'symbol': bars.symbol, 'type': 'SUPPLY' if is_supply[k, j] else 'DEMAND',
+                           'range_high': level[k, j], 'range_low': level[k, j]} for j in range(6) if ids[k, j] is not None]
+        for b in np.flatnonzero(ts5 // 86400 == d):
+            candle = {'symbol': bars.symbol, 'open': o5[b], 'high': h5[b], 'low': l5[b], 'close': c5[b]}
+            if strategy.check_entry(candle, "BEARISH") or strategy.check_entry(candle, "BULLISH"):
+                expected.add(int(ts5[b]) + 300)
+    window = {t for t in got if (t - 1) // 86400 >= days[-sample_days]}
+    return window == expected, len(expected)
+
+def run_benchmark():
+    frames = {'NIFTY': make_1m_year(25000, seed=1), 'BANKNIFTY': make_1m_year(56000, seed=2)}
+    print(f"📊 {sum(len(f) for f in frames.values())} x 1m bars ({len(frames)} symbols, 250 sessions)")
+
+    t0 = time.perf_counter()
+    bt = Backtester.from_frames(frames)
+    result = bt.run()
+    elapsed = time.perf_counter() - t0
+
+    for bars in bt.bars.values():
+        bad = verify_zones(bars, bt.params)
+        ok, n = verify_entries(bars, bt.params)
+        print(f"{'✅' if not bad and ok else '❌'} {bars.symbol}: zones match identify_smart_money_structure "
+              f"({bad} mismatching days), entries match check_entry ({n} in last 10 days)")
+
+    summary = result.summary()
+    print(f"⏱️ Backtest: {elapsed:.2f}s for a year of {'/'.join(frames)}")
+    print(f"📈 {summary}")
+    print(result.trades.head(3).to_string())
+    print(f"   Ledger rows: {len(result.ledger)}, equity points: {len(result.equity)}")
+
+if __name__ == "__main__":
+    run_benchmark()
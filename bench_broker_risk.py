@@ -0,0 +1,66 @@
+import sys
+import os
+import io
+import time
+import random
+import tempfile
+import contextlib
+
+# Add 'fortress-paper' to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), 'fortress-paper')))
+
+from core.virtual_broker import VirtualBroker
+
+def full_recompute_mtm(broker):
+    """
+    The previous get_mtm(): walks every open leg per call.
+    """
+    mtm = 0
+    for symbol, pos in broker.active_positions.items():
+        qty = pos['qty']
+        entry_price = pos['price']
+        ltp = pos.get('ltp', entry_price)
+        if qty > 0:
+            mtm += (ltp - entry_price) * qty
+        else:
+            mtm += (entry_price - ltp) * abs(qty)
+    return mtm
+
+def run_benchmark(legs=500, ticks=200000):
+    log_file = os.path.join(tempfile.mkdtemp(), "bench_trades.csv")
+    broker = VirtualBroker(log_file=log_file)
+    # Keep risk limits out of reach so every tick does the full path
+    broker.daily_target = float('inf')
+    broker.daily_sl = float('-inf')
+
+    symbols = [f"NIFTY {25000 + 50 * i} {'CE' if i % 2 else 'PE'}" for i in range(legs)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i, sym in enumerate(symbols):
+            broker.place_paper_order(sym, "SELL" if i % 2 else "BUY", 50, 100.0, tag="BENCH")
+
+    rng = random.Random(7)
+    stream = [(rng.choice(symbols), 100.0 + rng.uniform(-20, 20)) for _ in range(ticks)]
+    print(f"📊 {legs} open legs, {ticks} ticks")
+
+    # Incremental: update_ltp + check_risk (the on_market_update path)
+    t0 = time.perf_counter()
+    for sym, ltp in stream:
+        broker.update_ltp(sym, ltp)
+        broker.check_risk()
+    t_inc = time.perf_counter() - t0
+
+    # Previous behaviour: full MTM recompute per tick
+    t0 = time.perf_counter()
+    for sym, ltp in stream:
+        broker.active_positions[sym]['ltp'] = ltp
+        full_recompute_mtm(broker)
+    t_full = time.perf_counter() - t0
+
+    drift = abs(broker.get_mtm() - full_recompute_mtm(broker))
+    print(f"✅ MTM drift vs full recompute: {drift:.6f}")
+    print(f"⚡ Incremental: {ticks / t_inc:,.0f} ticks/sec ({t_inc / ticks * 1e6:.2f} µs/tick)")
+    print(f"🐢 Full recompute: {ticks / t_full:,.0f} ticks/sec ({t_full / ticks * 1e6:.2f} µs/tick)")
+    print(f"🚀 Speedup: {t_full / t_inc:.1f}x")
+
+if __name__ == "__main__":
+    run_benchmark(legs=int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,70 @@
+import sys
+import os
+import time
+import datetime
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+# Add 'fortress-paper' to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), 'fortress-paper')))
+
+from core.dhan_client import DhanClient
+from core.rate_limiter import TokenBucket
+from bench_history_fetch import StubDhan
+
+def request_mix(symbols, repeats):
+    """
+    Every symbol's 5-day window asked for `repeats` times, interleaved, the way
+    overlapping scanners / analysis threads ask for the same recent data.
+    """
+    end = datetime.date.today()
+    start = end - datetime.timedelta(days=5)
+    return [(str(50000 + i), start.isoformat(), end.isoformat()) for _ in range(repeats) for i in range(symbols)]
+
+class Direct:
+    """
+    Previous call pattern: each caller takes a limiter token and calls dhanhq itself.
+    """
+    def __init__(self, dhan, limiter):
+        self.dhan = dhan
+        self.limiter = limiter
+
+    def intraday_minute_data(self, *args):
+        self.limiter.acquire()
+        return self.dhan.intraday_minute_data(*args)
+
+def run(client, mix, threads):
+    def fetch(req):
+        sec_id, from_date, to_date = req
+        return client.intraday_minute_data(sec_id, 'NSE_FNO', 'FUTIDX', from_date, to_date)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(fetch, mix))
+    assert all(r['status'] == 'success' for r in results)
+    return time.perf_counter() - start
+
+def run_benchmark(symbols=10, repeats=4, threads=8, latency=0.3):
+    mix = request_mix(symbols, repeats)
+    print(f"📊 {len(mix)} intraday requests ({symbols} symbols x {repeats}), {threads} threads, "
+          f"stub Dhan {latency * 1000:.0f} ms, 5 req/s limit")
+
+    # Baseline: every request goes upstream (no merging, no cache)
+    stub = StubDhan(latency)
+    wall = run(Direct(stub, TokenBucket(rate=5, capacity=1)), mix, threads)
+    print(f"   direct   {len(stub.calls):>4} upstream calls in {wall:5.1f}s")
+
+    stub = StubDhan(latency)
+    client = DhanClient(stub, limiter=TokenBucket(rate=5, capacity=1), cache_ttl=10.0)
+    wall = run(client, mix, threads)
+    print(f"   shared   {len(stub.calls):>4} upstream calls in {wall:5.1f}s")
+    print(f"✅ {client.report()}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Request merging / short-TTL cache benchmark for DhanClient")
+    parser.add_argument('--symbols', type=int, default=10)
+    parser.add_argument('--repeats', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.3)
+    args = parser.parse_args()
+    run_benchmark(args.symbols, args.repeats, args.threads, args.latency)
@@ -0,0 +1,163 @@
+import sys
+import os
+import struct
+import asyncio
+import logging
+import argparse
+import tempfile
+import contextlib
+import multiprocessing as mp
+import numpy as np
+
+# Add 'fortress-paper' to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), 'fortress-paper')))
+
+from feed_simulator import serve_in_process, sent_time_us, now_us
+
+"""
+Feed -> risk pipeline under load: main.py's LiveFeed, on_feed_tick, tick queue,
+risk_loop and VirtualBroker, fed by feed_simulator.py over a local websocket.
+Latency is measured per price packet from the server's send stamp (carried in LTT)
+to the end of on_market_update (update_ltp + check_risk) for that tick.
+Ticks coalesced away in the queue never reach the risk check and are counted separately.
+"""
+
+LTT_OFFSET = {2: 12, 4: 14} # Ticker / Quote packets: byte offset of LTT
+
+def run_client(url, instruments, duration, warmup, mode, results):
+    """
+    Child process: runs main.main() against the simulator for `duration` seconds.
+    """
+    with open(os.devnull, 'w') as quiet, contextlib.redirect_stdout(quiet):
+        _run_client(url, instruments, duration, warmup, mode, results)
+
+def _run_client(url, instruments, duration, warmup, mode, results):
+    tmp = tempfile.mkdtemp(prefix="feed_bench_")
+    import config
+    config.DB_PATH = os.path.join(tmp, "ticks.db")
+    config.TRADE_LOG_FILE = os.path.join(tmp, "trades.json")
+    import core.tick_archive as tick_archive
+    tick_archive.TICK_ARCHIVE_DIR = os.path.join(tmp, "ticks")
+    import dhanhq.marketfeed as marketfeed
+    marketfeed.market_feed_wss = url
+    logging.basicConfig(level=logging.ERROR) # Before main's own basicConfig
+    import main
+    main.init_components()
+
+    # Synthetic zone futures (far-away supply, so no entries) with an open position each
+    main.strategy.zones = [{'id': f"Z{i}", 'symbol': f"SYNTH{i}-FUT", 'security_id': str(50000 + i), 'type': 'SUPPLY',
+                            'range_high': 1e9, 'range_low': 1e9, 'status': 'ACTIVE'} for i in range(instruments)]
+    for i in range(instruments):
+        main.broker.place_paper_order(f"SYNTH{i}-FUT", 'SELL', 50, 100.0 + (50000 + i) % 1000)
+    main.broker.daily_target, main.broker.daily_sl = float('inf'), float('-inf')
+    main.load_scrip_master = lambda: None
+    main.load_zones = lambda: None # No Supabase or zone_cache.json: the synthetic zones stay, no zone_sync_loop
+    main.OPTION_CHAIN_UNDERLYINGS = {}
+
+    received = []     # feed decode time (us) per price packet
+    latencies = []    # send -> risk check done (us), per checked tick
+    request_code = {'ticker': 15, 'quote': 17}[mode]
+
+    class TimedFeed(main.LiveFeed):
+        async def subscribe(self, symbols):
+            await super().subscribe([(ex, sid, request_code) for ex, sid in symbols])
+
+        def process_data(self, data):
+            self._raw = data
+            return super().process_data(data)
+
+        def _normalize(self, res):
+            res = super()._normalize(res)
+            offset = LTT_OFFSET.get(self._raw[0])
+            if offset:
+                now = now_us()
+                res['sent_us'] = sent_time_us(struct.unpack_from('<I', self._raw, offset)[0], now)
+                received.append(now)
+            return res
+
+    on_market_update = main.on_market_update
+    def timed_update(tick):
+        on_market_update(tick)
+        if 'sent_us' in tick:
+            latencies.append((tick['sent_us'], now_us() - tick['sent_us']))
+
+    main.LiveFeed = TimedFeed
+    main.on_market_update = timed_update
+
+    async def bounded():
+        try:
+            await asyncio.wait_for(main.main(), timeout=duration)
+        except asyncio.TimeoutError:
+            pass
+
+    asyncio.run(bounded())
+    stats = main.tick_queue.stats()
+    main.recorder.close()
+    main.broker.close()
+
+    recv = np.array(received, dtype=np.int64)
+    lat = np.array(latencies, dtype=np.int64).reshape(-1, 2)
+    if not len(recv):
+        results.put({'received': 0})
+        return
+
+    # Steady state only: drop the connect / subscribe warmup
+    start = recv[0] + int(warmup * 1e6)
+    window = (recv[-1] - start) / 1e6
+    steady = lat[lat[:, 0] >= start, 1] / 1000.0
+    results.put({
+        'received': len(recv),
+        'recv_rate': (recv >= start).sum() / window if window > 0 else 0.0,
+        'checked': len(lat),
+        'check_rate': len(steady) / window if window > 0 else 0.0,
+        'coalesced': stats['coalesced'],
+        'dropped': stats['dropped'],
+        'p50': np.percentile(steady, 50) if len(steady) else float('nan'),
+        'p99': np.percentile(steady, 99) if len(steady) else float('nan'),
+        'p999': np.percentile(steady, 99.9) if len(steady) else float('nan'),
+        'max': steady.max() if len(steady) else float('nan'),
+    })
+
+def run_step(rate, instruments, duration, warmup, mode):
+    """
+    One load level: simulator and trader in separate processes (same monotonic clock).
+    """
+    ctx = mp.get_context('fork')
+    server_out, stop = ctx.Queue(), ctx.Event()
+    server = ctx.Process(target=serve_in_process, args=(server_out, stop), kwargs={'rate': rate})
+    server.start()
+    url = server_out.get(timeout=10)
+
+    results = ctx.Queue()
+    client = ctx.Process(target=run_client, args=(url, instruments, duration, warmup, mode, results))
+    client.start()
+    row = results.get(timeout=duration + 60)
+    client.join()
+
+    stop.set()
+    row['sent'] = server_out.get(timeout=10)
+    server.join()
+    return row
+
+def run_benchmark(rates, instruments=50, duration=10.0, warmup=1.0, mode='ticker'):
+    print(f"📡 Synthetic Dhan v2 feed: {instruments} instruments, {mode} packets, {duration:.0f}s per rate "
+          f"({os.cpu_count()} CPU, simulator and trader share it)")
+    print(f"{'target/s':>9} {'sent':>9} {'recv/s':>9} {'checks/s':>9} {'coalesced':>10} {'dropped':>8} "
+          f"{'p50 ms':>8} {'p99 ms':>8} {'p999 ms':>8} {'max ms':>8}")
+    for rate in rates:
+        r = run_step(rate, instruments, duration, warmup, mode)
+        if not r['received']:
+            print(f"{rate:>9} ❌ no ticks received")
+            continue
+        print(f"{rate:>9} {r['sent']:>9} {r['recv_rate']:>9.0f} {r['check_rate']:>9.0f} {r['coalesced']:>10} "
+              f"{r['dropped']:>8} {r['p50']:>8.2f} {r['p99']:>8.2f} {r['p999']:>8.2f} {r['max']:>8.2f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Feed-to-risk throughput and latency benchmark")
+    parser.add_argument('--rates', default="1000,5000,20000", help="comma separated packets/s")
+    parser.add_argument('--instruments', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--warmup', type=float, default=1.0)
+    parser.add_argument('--mode', choices=['ticker', 'quote'], default='ticker')
+    args = parser.parse_args()
+    run_benchmark([int(r) for r in args.rates.split(',')], args.instruments, args.duration, args.warmup, args.mode)
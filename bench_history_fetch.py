@@ -0,0 +1,118 @@
+import sys
+import os
+import time
+import datetime
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Add 'fortress-paper' to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), 'fortress-paper')))
+
+from core.analyzer import MarketAnalyzer
+from core.candle_store import CandleStore
+
+class StubDhan:
+    """
+    Local stand-in for dhanhq: fixed round-trip latency, 1m candles for the requested range.
+    Tracks peak concurrency and request rate so the limiter can be checked.
+    """
+    NSE_FNO = 'NSE_FNO'
+
+    def __init__(self, latency=0.5):
+        self.latency = latency
+        self.calls = []
+        self.active = 0
+        self.peak_active = 0
+        self._lock = threading.Lock()
+
+    def intraday_minute_data(self, security_id, exchange_segment, instrument_type, from_date, to_date, interval=1):
+        with self._lock:
+            self.calls.append(time.monotonic())
+            self.active += 1
+            self.peak_active = max(self.peak_active, self.active)
+
+        time.sleep(self.latency)
+
+        start = datetime.datetime.strptime(from_date, '%Y-%m-%d')
+        end = datetime.datetime.strptime(to_date, '%Y-%m-%d')
+        stamps = []
+        day = start
+        while day < end:
+            if day.weekday() < 5:
+                open_ts = int(day.replace(hour=3, minute=45).timestamp())  # 09:15 IST in UTC
+                stamps.extend(open_ts + 60 * m for m in range(375))
+            day += datetime.timedelta(days=1)
+
+        with self._lock:
+            self.active -= 1
+
+        prices = [22000 + (ts % 997) / 10 for ts in stamps]
+        return {
+            'status': 'success',
+            'data': {
+                'timestamp': stamps,
+                'open': prices,
+                'high': [p + 5 for p in prices],
+                'low': [p - 5 for p in prices],
+                'close': prices,
+                'volume': [100] * len(stamps),
+            }
+        }
+
+    def max_rate(self, window=1.0):
+        """
+        Most requests started within any `window` seconds.
+        """
+        calls = sorted(self.calls)
+        best, j = 0, 0
+        for i, t in enumerate(calls):
+            while calls[j] < t - window + 1e-9:
+                j += 1
+            best = max(best, i - j + 1)
+        return best
+
+class NullDB:
+    """
+    Supabase stand-in: the fetch path never writes, but MarketAnalyzer would connect.
+    """
+    def save_market_data(self, df, symbol, timeframe='15m'):
+        pass
+
+def cold_analyzer(stub, tmp, name, **kwargs):
+    """
+    Analyzer on an empty CandleStore of its own, so every run fetches the full 60 days
+    (and the live candles.db is left alone).
+    """
+    store = CandleStore(db_path=os.path.join(tmp, f"{name}.db"))
+    return MarketAnalyzer(dhan=stub, db=NullDB(), store=store, **kwargs)
+
+def run_benchmark(latency=0.5):
+    targets = [("49229", "NIFTY-FUT"), ("49230", "BANKNIFTY-FUT")]
+    print(f"📊 Stub latency {latency * 1000:.0f} ms, {len(targets)} targets x 12 batches")
+
+    tmp = tempfile.mkdtemp(prefix="history_fetch_bench_")
+
+    # Previous behaviour: one batch after another, one target after another
+    stub = StubDhan(latency)
+    analyzer = cold_analyzer(stub, tmp, "sequential", max_workers=1)
+    t0 = time.perf_counter()
+    seq = [analyzer.fetch_deep_history(*t) for t in targets]
+    t_seq = time.perf_counter() - t0
+
+    # Concurrent batches + targets, shared 5 req/s limiter
+    stub = StubDhan(latency)
+    analyzer = cold_analyzer(stub, tmp, "concurrent")
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(targets)) as pool:
+        conc = list(pool.map(lambda t: analyzer.fetch_deep_history(*t), targets))
+    t_conc = time.perf_counter() - t0
+
+    same = all(a is not None and a.equals(b) for a, b in zip(seq, conc))
+    print(f"{'✅' if same else '❌'} Same candles: {[len(df) for df in conc]}")
+    print(f"🐢 Sequential: {t_seq:.2f}s")
+    print(f"⚡ Concurrent: {t_conc:.2f}s (peak in-flight {stub.peak_active}, max {stub.max_rate()} req in 1s)")
+    print(f"🚀 Speedup: {t_seq / t_conc:.1f}x")
+
+if __name__ == "__main__":
+    run_benchmark(latency=float(sys.argv[1]) if len(sys.argv) > 1 else 0.5)
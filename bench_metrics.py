@@ -0,0 +1,87 @@
+import sys
+import os
+import time
+import tempfile
+import contextlib
+import io
+import urllib.request
+
+# Add 'fortress-paper' to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), 'fortress-paper')))
+
+from core.metrics import LatencyHistogram, StageMetrics, start_metrics_server
+from core.virtual_broker import VirtualBroker
+import core.virtual_broker as virtual_broker
+
+class NullHistogram:
+    def observe(self, seconds):
+        pass
+
+def per_call(fn, n):
+    start = time.perf_counter()
+    fn(n)
+    return (time.perf_counter() - start) / n * 1e9
+
+def observe_overhead(n=1_000_000):
+    """
+    ns added by one instrumented stage: two perf_counter() calls + observe().
+    """
+    hist = LatencyHistogram()
+    def bare(n):
+        for _ in range(n):
+            pass
+    def timed(n):
+        perf_counter = time.perf_counter
+        for _ in range(n):
+            start = perf_counter()
+            hist.observe(perf_counter() - start)
+    return per_call(timed, n) - per_call(bare, n)
+
+def broker_tick_cost(instrumented, n=500_000, positions=20):
+    """
+    ns per update_ltp + check_risk, with the histograms live or swapped for no-ops.
+    """
+    saved = virtual_broker.UPDATE_LTP_LATENCY, virtual_broker.CHECK_RISK_LATENCY
+    if not instrumented:
+        virtual_broker.UPDATE_LTP_LATENCY = virtual_broker.CHECK_RISK_LATENCY = NullHistogram()
+    try:
+        with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+            broker = VirtualBroker(log_file=os.path.join(tmp, "trades.csv"), daily_target=float('inf'), daily_sl=float('-inf'))
+            symbols = [f"SYM{i}" for i in range(positions)]
+            for s in symbols:
+                broker.place_paper_order(s, "SELL", 50, 100.0)
+            def run(n):
+                for i in range(n):
+                    broker.update_ltp(symbols[i % positions], 100.0 + (i % 7))
+                    broker.check_risk()
+            cost = per_call(run, n)
+            broker.close()
+        return cost
+    finally:
+        virtual_broker.UPDATE_LTP_LATENCY, virtual_broker.CHECK_RISK_LATENCY = saved
+
+def render_cost():
+    registry = StageMetrics()
+    for stage in ('feed_decode', 'update_ltp', 'check_risk', 'check_entry', 'scrip_lookup', 'order_write', 'db_write'):
+        for i in range(1000):
+            registry[stage].observe(i * 1e-6)
+    server = start_metrics_server(0, registry=registry)
+    url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+    start = time.perf_counter()
+    body = urllib.request.urlopen(url).read().decode()
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+    return elapsed, body
+
+def run_benchmark():
+    print(f"⏱️ Instrumented stage overhead (2x perf_counter + observe): {observe_overhead():.0f} ns")
+    bare = broker_tick_cost(False)
+    timed = broker_tick_cost(True)
+    print(f"📉 update_ltp + check_risk, no-op vs live observe(): {bare:.0f} ns -> {timed:.0f} ns per tick "
+          f"(+{timed - bare:.0f} ns)")
+    elapsed, body = render_cost()
+    print(f"📈 /metrics scrape: {elapsed * 1000:.1f} ms, {len(body.splitlines())} lines")
+    print("\n".join(body.splitlines()[:4]))
+
+if __name__ == "__main__":
+    run_benchmark()
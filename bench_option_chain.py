@@ -0,0 +1,101 @@
+import sys
+import os
+import io
+import time
+import contextlib
+import numpy as np
+
+# Add 'fortress-paper' to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), 'fortress-paper')))
+
+from core.option_chain import OptionChainSnapshot
+from core.strategy import FortressStrategy
+
+UNDERLYINGS = {'NIFTY': (25000, 50), 'BANKNIFTY': (56000, 100), 'FINNIFTY': (26500, 50), 'MIDCPNIFTY': (13000, 25)}
+
+def make_dhan_chain(spot, step, strikes=200, seed=0):
+    """
+    Dhan v2 /optionchain body with `strikes` strikes around spot.
+    """
+    rng = np.random.default_rng(seed)
+    base = round(spot / step) * step - step * (strikes // 2)
+    oc = {}
+    for k in range(strikes):
+        strike = base + step * k
+        leg = lambda: {
+            'oi': int(rng.integers(1000, 500000)), 'previous_oi': int(rng.integers(1000, 500000)),
+            'last_price': float(rng.uniform(1, 500)), 'implied_volatility': float(rng.uniform(8, 30)),
+            'volume': int(rng.integers(0, 1000000)),
+        }
+        oc[f"{strike:.6f}"] = {'ce': leg(), 'pe': leg()}
+    return {'data': {'last_price': spot, 'oc': oc}, 'status': 'success'}
+
+def to_rows(body):
+    """
+    The list-of-dicts shape update_market_sentiment used to take.
+    """
+    rows = []
+    for strike, legs in body['data']['oc'].items():
+        for side, option_type in (('ce', 'CALL'), ('pe', 'PUT')):
+            rows.append({'strike_price': float(strike), 'option_type': option_type, 'oi': legs[side]['oi'],
+                         'change_in_oi': legs[side]['oi'] - legs[side]['previous_oi']})
+    return rows
+
+def loop_metrics(rows, spot, atm_window=5):
+    """
+    Reference: PCR with generator sums (previous code), ATM change in OI and max pain in Python loops.
+    """
+    total_ce_oi = sum(item['oi'] for item in rows if item['option_type'] == 'CALL')
+    total_pe_oi = sum(item['oi'] for item in rows if item['option_type'] == 'PUT')
+    pcr = total_pe_oi / total_ce_oi if total_ce_oi else 1.0
+
+    strikes = sorted({r['strike_price'] for r in rows})
+    atm = min(range(len(strikes)), key=lambda i: abs(strikes[i] - spot))
+    window = set(strikes[max(atm - atm_window, 0):atm + atm_window + 1])
+    atm_ce = sum(r['change_in_oi'] for r in rows if r['option_type'] == 'CALL' and r['strike_price'] in window)
+
+    best, max_pain = None, None
+    for settle in strikes:
+        payout = 0
+        for r in rows:
+            if r['option_type'] == 'CALL':
+                payout += r['oi'] * max(settle - r['strike_price'], 0)
+            else:
+                payout += r['oi'] * max(r['strike_price'] - settle, 0)
+        if best is None or payout < best:
+            best, max_pain = payout, settle
+    return pcr, atm_ce, max_pain
+
+def run_benchmark(polls=20):
+    chains = {u: [make_dhan_chain(spot, step, seed=10 * i + s) for s in range(2)]
+              for i, (u, (spot, step)) in enumerate(UNDERLYINGS.items())}
+    print(f"📊 {len(UNDERLYINGS)} underlyings x {len(next(iter(chains.values()))[0]['data']['oc'])} strikes")
+
+    # Correctness against the loop reference
+    for u, (body, _) in chains.items():
+        ref = loop_metrics(to_rows(body), UNDERLYINGS[u][0])
+        m = OptionChainSnapshot.from_dhan(u, None, body).metrics()
+        ok = abs(m['pcr'] - ref[0]) < 1e-9 and m['atm_ce_chg_oi'] == ref[1] and m['max_pain'] == ref[2]
+        print(f"{'✅' if ok else '❌'} {u}: PCR={m['pcr']:.3f} MaxPain={m['max_pain']:.0f} (loop: {ref[0]:.3f} / {ref[2]:.0f})")
+
+    # Loop reference: one refresh of every underlying
+    t0 = time.perf_counter()
+    for u, (body, _) in chains.items():
+        loop_metrics(to_rows(body), UNDERLYINGS[u][0])
+    t_loop = time.perf_counter() - t0
+
+    # Snapshot: parse + metrics + diff + sentiment, per refresh of every underlying
+    strategy = FortressStrategy(zones_file=None)
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for p in range(polls):
+            for u, bodies in chains.items():
+                strategy.update_market_sentiment(OptionChainSnapshot.from_dhan(u, None, bodies[p % 2]))
+    t_vec = (time.perf_counter() - t0) / polls
+
+    print(f"⏱️ Python loops: {t_loop * 1000:.1f} ms per refresh")
+    print(f"⏱️ Snapshot:     {t_vec * 1000:.1f} ms per refresh (incl. parse + diff)")
+    print(f"🚀 Speedup: {t_loop / t_vec:.0f}x. Sentiment: {strategy.sentiment}")
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,46 @@
+import sys
+import os
+import time
+import argparse
+
+# Add 'fortress-paper' to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), 'fortress-paper')))
+
+from core.backtest import Backtester, SymbolBars
+from core.sweep import param_grid, run_sweep
+from bench_backtest import make_1m_year
+
+def run_benchmark(workers=None, top=10):
+    bars = [SymbolBars.from_frame('NIFTY', make_1m_year(25000, seed=1)),
+            SymbolBars.from_frame('BANKNIFTY', make_1m_year(56000, seed=2))]
+
+    grid = param_grid(
+        zone_buffer=[5, 10, 15, 20, 25],
+        ob_multiplier=[1.25, 1.5, 2.0],
+        ob_window=[10, 20, 30],
+        nifty_width=[200, 300],
+        banknifty_width=[500],
+        daily_target=[750.0, 1000.0, 1500.0, 2000.0],
+        daily_sl=[-500.0, -750.0, -1000.0],
+    )
+
+    # Cost of one full backtest, for the naive estimate
+    t0 = time.perf_counter()
+    Backtester(bars).run(details=False)
+    single = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    table = run_sweep(bars, grid, workers=workers)
+    elapsed = time.perf_counter() - t0
+
+    print(f"⏱️ {len(grid)} combinations in {elapsed:.1f}s "
+          f"(one-at-a-time estimate on one core: {single * len(grid):.0f}s)")
+    cols = ['rank', 'zone_buffer', 'ob_multiplier', 'ob_window', 'nifty_width', 'daily_target', 'daily_sl',
+            'trades', 'net_pnl', 'win_rate', 'max_drawdown', 'return_over_dd']
+    print(table[cols].head(top).to_string(index=False, float_format=lambda x: f"{x:.2f}"))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel parameter sweep benchmark")
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+    run_benchmark(workers=args.workers)
@@ -0,0 +1,98 @@
+import sys
+import os
+import time
+import sqlite3
+import argparse
+import datetime
+import tempfile
+import contextlib
+import io
+import numpy as np
+
+# Add 'fortress-paper' to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), 'fortress-paper')))
+
+from core.data_recorder import DataRecorder
+from core.tick_archive import TickArchive
+
+SESSION_SECONDS = 22500 # 09:15 -> 15:30
+
+def session_ticks(instruments, rate, seed=0):
+    """
+    One trading session of recorder queue entries, in arrival order:
+    `rate` ticks/s per instrument, a quote (ltp + volume) with every 10th an OI packet.
+    """
+    rng = np.random.default_rng(seed)
+    total = int(instruments * rate * SESSION_SECONDS)
+    open_ns = int(datetime.datetime.combine(datetime.date.today(), datetime.time(9, 15)).timestamp() * 1e9)
+    ts = open_ns + np.sort(rng.integers(0, SESSION_SECONDS * 10**9, total))
+    sids = rng.integers(0, instruments, total)
+    ltp = 20000 + rng.standard_normal(total).cumsum() * 0.5
+    ticks = []
+    for i, (t, s, p) in enumerate(zip(ts.tolist(), sids.tolist(), ltp.tolist())):
+        sid = 50000 + s
+        if i % 10 == 9:
+            ticks.append((t, None, sid, f"SYM{s}-FUT", None, 0, 1e6 + i))
+        else:
+            ticks.append((t, None, sid, f"SYM{s}-FUT", p, i, None))
+    return ticks
+
+def dir_size(path):
+    return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(path) for f in files)
+
+def write_session(recorder, ticks, batch=1000):
+    """
+    The recorder's writer path, one batch (group commit) at a time.
+    """
+    start = time.perf_counter()
+    for i in range(0, len(ticks), batch):
+        recorder._write_ticks(ticks[i:i + batch])
+    return time.perf_counter() - start
+
+def run_benchmark(instruments=50, rate=1.0):
+    ticks = session_ticks(instruments, rate)
+    print(f"📼 One session: {len(ticks):,} ticks across {instruments} instruments ({rate:g}/s each)")
+    tmp = tempfile.mkdtemp(prefix="tick_archive_bench_")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        sqlite_rec = DataRecorder(db_path=os.path.join(tmp, "ticks.db"))
+        archive_rec = DataRecorder(db_path=os.path.join(tmp, "chain.db"), archive=TickArchive(os.path.join(tmp, "ticks")))
+    sqlite_write = write_session(sqlite_rec, ticks)
+    archive_write = write_session(archive_rec, ticks)
+    with contextlib.redirect_stdout(io.StringIO()):
+        sqlite_rec.close()
+        archive_rec.close()
+    sqlite_size = sum(os.path.getsize(os.path.join(tmp, f)) for f in os.listdir(tmp) if f.startswith("ticks.db"))
+    archive_size = dir_size(os.path.join(tmp, "ticks"))
+
+    # Replay read: every tick of the session, per instrument
+    start = time.perf_counter()
+    conn = sqlite3.connect(os.path.join(tmp, "ticks.db"))
+    rows = conn.execute("SELECT timestamp, symbol, ltp, volume, oi FROM ticks ORDER BY id").fetchall()
+    conn.close()
+    sqlite_read = time.perf_counter() - start
+
+    archive = TickArchive(os.path.join(tmp, "ticks"))
+    day = archive.days()[-1]
+    start = time.perf_counter()
+    session = archive.read_day(day)
+    mapped = time.perf_counter() - start
+    last_ltp = {sid: float(np.nanmax(arr['ltp'])) for sid, arr in session.items()} # Touches every page
+    archive_read = time.perf_counter() - start
+    merged = np.concatenate(list(session.values()))
+    merged = merged[np.argsort(merged['ts'], kind='stable')]
+    replay = time.perf_counter() - start
+
+    assert len(rows) == len(merged) == len(ticks) and len(last_ltp) == instruments
+    print(f"{'':>10} {'write':>9} {'disk':>10} {'read all':>10}")
+    print(f"{'sqlite':>10} {sqlite_write:>8.2f}s {sqlite_size / 1e6:>8.1f}MB {sqlite_read * 1000:>8.0f}ms")
+    print(f"{'archive':>10} {archive_write:>8.2f}s {archive_size / 1e6:>8.1f}MB {archive_read * 1000:>8.0f}ms "
+          f"(mmap {mapped * 1000:.1f}ms, time-ordered replay {replay * 1000:.0f}ms)")
+    print(f"✅ {sqlite_size / archive_size:.1f}x smaller, {sqlite_read / archive_read:.0f}x faster full-session read")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SQLite ticks table vs columnar memory-mapped tick archive")
+    parser.add_argument('--instruments', type=int, default=50)
+    parser.add_argument('--rate', type=float, default=1.0, help="ticks/s per instrument")
+    args = parser.parse_args()
+    run_benchmark(args.instruments, args.rate)
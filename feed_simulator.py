@@ -0,0 +1,173 @@
+import sys
+import json
+import time
+import struct
+import asyncio
+import argparse
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+import websockets
+
+"""
+Local stand-in for the Dhan v2 market feed (wss://api-feed.dhan.co).
+Accepts the v2 JSON subscriptions and streams binary packets at a fixed total rate:
+  RequestCode 15 (Ticker) -> Ticker packets (code 2)
+  RequestCode 17 (Quote)  -> Quote packets (code 4), plus an OI packet (code 5) every `oi_every` quotes
+Point DhanFeed at it with: dhanhq.marketfeed.market_feed_wss = "ws://127.0.0.1:<port>"
+
+LTT carries the send time in microseconds of time.monotonic_ns() (mod 2^32), so a client
+on the same host can measure packet-send latency: sent_us = now_us - ((now_us - LTT) mod 2^32).
+"""
+
+TICKER = struct.Struct('<BHBIfI')          # code 2, 16 bytes
+QUOTE = struct.Struct('<BHBIfHIfIIIffff')  # code 4, 50 bytes
+OI = struct.Struct('<BHBII')               # code 5, 12 bytes
+SEGMENTS = {'IDX_I': 0, 'NSE_EQ': 1, 'NSE_FNO': 2, 'NSE_CURRENCY': 3, 'BSE_EQ': 4, 'MCX_COMM': 5, 'BSE_CURRENCY': 7, 'BSE_FNO': 8}
+
+def now_us():
+    return time.monotonic_ns() // 1000
+
+def sent_time_us(ltt, now=None):
+    """
+    Recovers the full send time (monotonic us) from a 32-bit LTT stamp.
+    """
+    now = now_us() if now is None else now
+    return now - ((now - ltt) & 0xFFFFFFFF)
+
+class SyntheticDhanFeed:
+    """
+    rate: packets per second per connection, across all subscribed instruments.
+    """
+    def __init__(self, host='127.0.0.1', port=0, rate=1000, oi_every=10, batch_ms=1, duration=None, seed=0):
+        self.host = host
+        self.port = port
+        self.rate = rate
+        self.oi_every = oi_every
+        self.batch_ms = batch_ms
+        self.duration = duration
+        self.rng = np.random.default_rng(seed)
+        self.sent = 0
+        self.connections = 0
+        self.server = None
+
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.port}"
+
+    async def start(self):
+        self.server = await websockets.serve(self._handle, self.host, self.port, max_size=None)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle(self, ws):
+        self.connections += 1
+        query = parse_qs(urlparse(ws.request.path).query)
+        if query.get('version', ['2'])[0] != '2':
+            await ws.close(code=1008, reason="v2 only")
+            return
+
+        subs = {} # {(segment_code, security_id): request_code}
+        reader = asyncio.create_task(self._read_subscriptions(ws, subs))
+        try:
+            await self._stream(ws, subs)
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            reader.cancel()
+
+    async def _read_subscriptions(self, ws, subs):
+        async for message in ws:
+            try:
+                request = json.loads(message)
+            except (TypeError, ValueError):
+                continue
+            code = request.get('RequestCode')
+            if code == 12: # Disconnect
+                await ws.close()
+                return
+            for item in request.get('InstrumentList', []):
+                key = (SEGMENTS.get(item.get('ExchangeSegment'), 2), int(item['SecurityId']))
+                if code in (15, 17, 21):
+                    subs[key] = code
+                elif code in (16, 18, 22): # Unsubscribe
+                    subs.pop(key, None)
+
+    async def _stream(self, ws, subs):
+        started = time.monotonic()
+        paced_from = started
+        due = 0
+        prices = {}
+        quotes = 0
+        volume = {}
+
+        while self.duration is None or time.monotonic() - started < self.duration:
+            await asyncio.sleep(self.batch_ms / 1000)
+            if not subs:
+                paced_from = time.monotonic()
+                due = 0
+                continue
+
+            # Packets owed since streaming began, at a steady total rate
+            count = int((time.monotonic() - paced_from) * self.rate) - due
+            if count <= 0:
+                continue
+            due += count
+
+            keys = list(subs.items())
+            picks = self.rng.integers(0, len(keys), count)
+            moves = self.rng.normal(0, 0.0005, count)
+            for pick, move in zip(picks, moves):
+                (segment, sec_id), code = keys[pick]
+                price = prices.get(sec_id, 100.0 + sec_id % 1000) * (1 + move)
+                prices[sec_id] = price
+                stamp = now_us() & 0xFFFFFFFF
+                if code == 15:
+                    await ws.send(TICKER.pack(2, TICKER.size, segment, sec_id, price, stamp))
+                else:
+                    volume[sec_id] = volume.get(sec_id, 0) + 50
+                    await ws.send(QUOTE.pack(4, QUOTE.size, segment, sec_id, price, 50, stamp, price,
+                                             volume[sec_id], 1000, 1000, price, price, price, price))
+                    quotes += 1
+                    if self.oi_every and quotes % self.oi_every == 0:
+                        await ws.send(OI.pack(5, OI.size, segment, sec_id, 100000 + quotes))
+                        self.sent += 1
+                self.sent += 1
+
+def serve_in_process(port_queue, stop_event, **kwargs):
+    """
+    multiprocessing target: runs a SyntheticDhanFeed, reports its url on
+    `port_queue`, and reports packets sent once `stop_event` is set.
+    """
+    async def run():
+        feed = await SyntheticDhanFeed(**kwargs).start()
+        port_queue.put(feed.url)
+        while not stop_event.is_set():
+            await asyncio.sleep(0.05)
+        await feed.stop()
+        port_queue.put(feed.sent)
+    asyncio.run(run())
+
+async def _main(args):
+    feed = await SyntheticDhanFeed(host=args.host, port=args.port, rate=args.rate, oi_every=args.oi_every).start()
+    print(f"📡 Synthetic Dhan v2 feed on {feed.url} ({args.rate} packets/s per connection)")
+    try:
+        while True:
+            await asyncio.sleep(10)
+            print(f"   sent {feed.sent} packets over {feed.connections} connections")
+    finally:
+        await feed.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Synthetic Dhan v2 market feed server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--rate', type=int, default=1000)
+    parser.add_argument('--oi-every', type=int, default=10)
+    try:
+        asyncio.run(_main(parser.parse_args()))
+    except KeyboardInterrupt:
+        sys.exit(0)
@@ -1,6 +1,12 @@
 import pandas as pd
+import numpy as np
 import datetime
 
+# Zone construction settings (swept by core/sweep.py)
+ZONE_BUFFER = 10          # PDH/PDL zone half-width (points)
+OB_BODY_MULTIPLIER = 1.5  # Strong move: body > multiplier x rolling avg body
+OB_WINDOW = 20            # Rolling window for the avg body
+
 def resample_to_15m(df):
     """
     Resamples 1m data to 15m candles.
@@ -52,7 +58,8 @@ def resample_to_15m(df):
     df_15m = df_15m.reset_index() 
     return df_15m
 
-def identify_smart_money_structure(df, symbol_name, security_id):
+def identify_smart_money_structure(df, symbol_name, security_id, zone_buffer=ZONE_BUFFER,
+                                   ob_multiplier=OB_BODY_MULTIPLIER, ob_window=OB_WINDOW):
     """
     Identifies PDH, PDL, and Order Blocks (SMC).
     """
@@ -95,8 +102,8 @@ def identify_smart_money_structure(df, symbol_name, security_id):
             "security_id": security_id,
             "type": "SUPPLY", # PDH acts as Supply/Liquidity
             "timeframe": "1D",
-            "range_high": pdh + 10, # Slight buffer
-            "range_low": pdh - 10,
+            "range_high": pdh + zone_buffer, # Slight buffer
+            "range_low": pdh - zone_buffer,
             "status": "ACTIVE",
             "note": "Previous Day High - Wait for Sweep"
         })
@@ -107,8 +114,8 @@ def identify_smart_money_structure(df, symbol_name, security_id):
             "security_id": security_id,
             "type": "DEMAND", # PDL acts as Demand/Liquidity
             "timeframe": "1D",
-            "range_high": pdl + 10,
-            "range_low": pdl - 10,
+            "range_high": pdl + zone_buffer,
+            "range_low": pdl - zone_buffer,
             "status": "ACTIVE",
             "note": "Previous Day Low - Wait for Sweep"
         })
@@ -123,49 +130,57 @@ def identify_smart_money_structure(df, symbol_name, security_id):
         df['low'] = df['low'].astype(float)
         df['close'] = df['close'].astype(float)
         df['body'] = abs(df['close'] - df['open'])
-        avg_body = df['body'].rolling(20).mean()
+        avg_body = df['body'].rolling(ob_window).mean()
         
-        for i in range(20, len(df)-2):
-            curr = df.iloc[i]
-            prev = df.iloc[i-1]
-            
-            # Check for Imbalance (Strong Move)
-            # Avoid division by zero if avg_body is NaN or 0 (though unlikely with price)
-            avg = avg_body.iloc[i]
-            if pd.isna(avg) or avg == 0:
-                continue
-
-            if curr['body'] > (avg * 1.5):
-                
-                # Bullish Move (Green) -> Prev Candle was Red?
-                if curr['close'] > curr['open']:
-                    if prev['close'] < prev['open']: # Red Candle
-                        # Valid Bullish OB
-                        zones.append({
-                            "id": f"{symbol_name}_OB_DEMAND_{len(zones)}",
-                            "symbol": symbol_name,
-                            "security_id": security_id,
-                            "type": "DEMAND",
-                            "timeframe": "15m",
-                            "range_high": prev['high'],
-                            "range_low": prev['low'],
-                            "note": "15m Bullish Order Block"
-                        })
-                        
-                # Bearish Move (Red) -> Prev Candle was Green?
-                elif curr['close'] < curr['open']:
-                    if prev['close'] > prev['open']: # Green Candle
-                        # Valid Bearish OB
-                        zones.append({
-                            "id": f"{symbol_name}_OB_SUPPLY_{len(zones)}",
-                            "symbol": symbol_name,
-                            "security_id": security_id,
-                            "type": "SUPPLY",
-                            "timeframe": "15m",
-                            "range_high": prev['high'],
-                            "range_low": prev['low'],
-                            "note": "15m Bearish Order Block"
-                        })
+        # Vectorized pass over candles [ob_window, len-2)
+        # Strong Move: body > ob_multiplier x rolling avg body (NaN / zero avg never qualifies)
+        o = df['open'].to_numpy()
+        c = df['close'].to_numpy()
+        body = df['body'].to_numpy()
+        avg = avg_body.to_numpy()
+
+        n = len(df)
+        idx = np.arange(ob_window, max(n - 2, ob_window))
+        if len(idx):
+            strong = (avg[idx] != 0) & (body[idx] > avg[idx] * ob_multiplier)
+            green = c[idx] > o[idx]
+            red = c[idx] < o[idx]
+            prev_red = c[idx - 1] < o[idx - 1]
+            prev_green = c[idx - 1] > o[idx - 1]
+
+            # Bullish Move (Green) after Red Candle -> Bullish OB
+            # Bearish Move (Red) after Green Candle -> Bearish OB
+            bullish = strong & green & prev_red
+            bearish = strong & red & prev_green
+
+            ob_idx = idx[bullish | bearish]
+            is_bullish = bullish[bullish | bearish]
+            prev_high = df['high'].to_numpy()[ob_idx - 1]
+            prev_low = df['low'].to_numpy()[ob_idx - 1]
+
+            for k in range(len(ob_idx)):
+                if is_bullish[k]:
+                    zones.append({
+                        "id": f"{symbol_name}_OB_DEMAND_{len(zones)}",
+                        "symbol": symbol_name,
+                        "security_id": security_id,
+                        "type": "DEMAND",
+                        "timeframe": "15m",
+                        "range_high": prev_high[k],
+                        "range_low": prev_low[k],
+                        "note": "15m Bullish Order Block"
+                    })
+                else:
+                    zones.append({
+                        "id": f"{symbol_name}_OB_SUPPLY_{len(zones)}",
+                        "symbol": symbol_name,
+                        "security_id": security_id,
+                        "type": "SUPPLY",
+                        "timeframe": "15m",
+                        "range_high": prev_high[k],
+                        "range_low": prev_low[k],
+                        "note": "15m Bearish Order Block"
+                    })
 
     except Exception as e:
         print(f"❌ Analysis Error: {e}")
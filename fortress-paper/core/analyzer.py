@@ -2,20 +2,57 @@ import datetime
 import json
 import os
 import sys
+import time
+import argparse
+import numpy as np
 import pandas as pd
-from dhanhq import dhanhq
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
 
 # Add parent directory to path to allow importing config
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from config import CLIENT_ID, ACCESS_TOKEN
 from core.db import FortressDB
-from core.analysis_utils import identify_smart_money_structure, resample_to_15m
+from core.analysis_utils import identify_smart_money_structure
+from core.bar_aggregator import BarAggregator
+from core.scrip_master import ScripMaster
+from core.rate_limiter import DHAN_DATA_LIMITER, call_with_retry
+from core.candle_store import CandleStore
+from core.dhan_client import DhanClient
+
+# Universe: index roots (FUTIDX) and/or every stock future root (FUTSTK, from the Scrip Master)
+INDEX_ROOTS = ('NIFTY', 'BANKNIFTY', 'FINNIFTY', 'MIDCPNIFTY')
+DEFAULT_UNIVERSE = 'indices'
+
+def analyze_history(sec_id, sym, df_1m):
+    """
+    CPU stage (runs in a worker process): 1m -> 15m resample + structure detection.
+    Returns (df_15m, zones, seconds spent).
+    """
+    t0 = time.perf_counter()
+    bars = BarAggregator(timeframes=('15m',))
+    bars.add_frame(sec_id, df_1m)
+    df_15m = bars.frame(sec_id, '15m')
+    if df_15m is None:
+        return None, [], time.perf_counter() - t0
+    zones = identify_smart_money_structure(df_15m, sym, sec_id)
+    return df_15m, zones, time.perf_counter() - t0
 
 class MarketAnalyzer:
-    def __init__(self):
-        self.dhan = dhanhq(CLIENT_ID, ACCESS_TOKEN)
-        self.db = FortressDB()
+    def __init__(self, dhan=None, db=None, max_workers=5, limiter=DHAN_DATA_LIMITER, store=None,
+                 universe=DEFAULT_UNIVERSE, analysis_workers=None, fetch_workers=8):
+        # Shared REST layer: pooled connections, merged duplicate requests, limiter per upstream call
+        self.dhan = dhan if isinstance(dhan, DhanClient) else DhanClient(dhan, limiter=limiter)
+        self.db = db or FortressDB()
+        self.store = store or CandleStore() # Local 1m history, only the gap is fetched
+        self.scrip_master = None # Loaded once, shared by all targets
+
+        # History batches of one symbol run concurrently (up to max_workers), throttled by the Dhan limiter
+        self.max_workers = max_workers
+
+        # Pipeline: symbol fetches (threads), analysis (processes), persistence (threads)
+        self.universe = universe
+        self.fetch_workers = fetch_workers
+        self.analysis_workers = analysis_workers or os.cpu_count() or 1
         
     def get_current_futures_symbol(self, base="NIFTY"):
         """
@@ -41,157 +78,233 @@ class MarketAnalyzer:
         fmt_date = last_thursday.strftime("%d %b %y").upper()
         return f"{base} {fmt_date} FUT"
 
-    def _get_security_id(self, target_root):
+    def _get_security_id(self, target_root, instrument='FUTIDX'):
         """
-        Fetches Scrip Master, filters for Target Futures.
+        Finds the near-month Future for a root via the cached Scrip Master.
         """
-        print(f"📥 Fetching Scrip Master for {target_root}...")
         try:
-            res = self.dhan.fetch_security_list() 
-            if isinstance(res, pd.DataFrame):
-                df = res
-            elif isinstance(res, dict) and 'data' in res: 
-                 df = pd.DataFrame(res['data'])
-            else:
-                 df = res
-            
-            if not isinstance(df, pd.DataFrame) or df.empty:
-                raise ValueError("Descrip Master Invalid")
+            if self.scrip_master is None:
+                self.scrip_master = ScripMaster.load(self.dhan)
 
-            # Normalize Columns
-            for col in df.columns:
-                if df[col].dtype == object:
-                    df[col] = df[col].str.upper().str.strip()
+            sec_id, sym = self.scrip_master.near_future(target_root, instrument=instrument)
+            if sec_id:
+                print(f"✅ Found Future: {sym} (ID: {sec_id})")
+                return sec_id, sym
 
-            symbol_col = next((c for c in df.columns if 'SYMBOL' in c), None)
-            id_col = next((c for c in df.columns if 'SECURITY_ID' in c), None)
-            inst_col = next((c for c in df.columns if 'INSTRUMENT_NAME' in c), None)
-            
-            if symbol_col and id_col:
-                futures_mask = df[symbol_col].str.startswith(target_root)
-                
-                if inst_col:
-                    futures_mask = futures_mask & (df[inst_col] == 'FUTIDX')
-                else:
-                    futures_mask = futures_mask & df[symbol_col].str.contains('FUT')
-                
-                futures = df[futures_mask].copy()
-                
-                expiry_col = next((c for c in df.columns if 'EXPIRY_DATE' in c), None)
-                if not futures.empty and expiry_col:
-                     futures[expiry_col] = pd.to_datetime(futures[expiry_col])
-                     today = pd.Timestamp.now().normalize()
-                     futures = futures[futures[expiry_col] >= today]
-                     futures = futures.sort_values(by=expiry_col)
-                
-                if not futures.empty:
-                     row = futures.iloc[0] # Near Month
-                     sec_id = str(row[id_col])
-                     sym = row[symbol_col]
-                     print(f"✅ Found Future: {sym} (ID: {sec_id})")
-                     return sec_id, sym
-
-                print(f"⚠️ {target_root} Futures not found.")
-                return None, None
-            
+            print(f"⚠️ {target_root} Futures not found.")
         except Exception as e:
-            print(f"⚠️ Error in fetch_security_list: {e}")
+            print(f"⚠️ Error loading Scrip Master: {e}")
         return None, None
 
-    def fetch_deep_history(self, security_id, symbol_name):
+    def resolve_universe(self, universe=None):
+        """
+        universe: 'indices', 'stocks', 'all', or roots, comma separated / list
+        (e.g. 'indices,RELIANCE'). Returns [(security_id, symbol, instrument)]
+        for the near-month futures, resolved in one pass per instrument type.
+        """
+        universe = universe or self.universe
+        items = universe.split(',') if isinstance(universe, str) else list(universe)
+
+        index_roots, stock_roots, all_stocks = [], [], False
+        for item in (i.strip() for i in items):
+            key = item.lower()
+            if key in ('indices', 'all'):
+                index_roots.extend(INDEX_ROOTS)
+            if key in ('stocks', 'all'):
+                all_stocks = True
+            if key not in ('indices', 'stocks', 'all') and item:
+                (index_roots if item.upper() in INDEX_ROOTS else stock_roots).append(item.upper())
+
+        if self.scrip_master is None:
+            self.scrip_master = ScripMaster.load(self.dhan)
+
+        resolved = []
+        for instrument, roots in (('FUTIDX', index_roots), ('FUTSTK', None if all_stocks else stock_roots)):
+            if roots is not None and not roots:
+                continue
+            found = self.scrip_master.near_futures(roots, instrument=instrument)
+            for root in (dict.fromkeys(roots) if roots is not None else sorted(found)):
+                if root in found:
+                    resolved.append((*found[root], instrument))
+                else:
+                    print(f"❌ Security ID not found for {root} ({instrument})")
+        return resolved
+
+    def _fetch_batch(self, security_id, from_str, to_str, instrument='FUTIDX'):
+        """
+        One 5-day intraday_minute_data call (rate limited, retried with backoff).
+        Returns (ok, df): ok is False only if the call itself failed.
+        """
+        res = call_with_retry(
+            lambda: self.dhan.intraday_minute_data(
+                security_id=security_id,
+                exchange_segment=self.dhan.NSE_FNO,
+                instrument_type=instrument,
+                from_date=from_str,
+                to_date=to_str
+            ),
+            label=f"Batch {from_str} to {to_str}"
+        )
+
+        if res and res.get('status') == 'success':
+            data = res.get('data')
+            return True, pd.DataFrame(data) if data else None
+        return False, None
+
+    def fetch_deep_history(self, security_id, symbol_name, instrument='FUTIDX'):
         """
         Fetches 60 days of 1m data using pagination/batches.
+        Only ranges missing from the local CandleStore are requested (concurrently,
+        bounded by the shared rate limiter); the rest is served locally.
         """
         print(f"🔄 Fetching Deep History (60 Days) for {symbol_name}...")
         
         # Dhan API limit is usually per call. We'll loop 5 days at a time.
-        # 60 days / 5 = 12 calls.
+        # 60 days / 5 = 12 calls on a cold store, 1 call on a warm one.
         
-        all_dfs = []
         end_date = datetime.datetime.now()
-        
-        # 12 weeks back (approx 3 months cover)
-        # Or just loop 60 days
         days_per_batch = 5
         total_days = 60
+        window_start = end_date - datetime.timedelta(days=total_days)
         
-        current_end = end_date
-        
-        for i in range(0, total_days, days_per_batch):
-            current_start = current_end - datetime.timedelta(days=days_per_batch)
-            
-            to_str = current_end.strftime('%Y-%m-%d')
-            from_str = current_start.strftime('%Y-%m-%d')
-            
-            # Skip weekends logic not strictly needed if API returns empty for those days
-            
-            print(f"   Fetching batch: {from_str} to {to_str}")
-            try:
-                res = self.dhan.intraday_minute_data(
-                    security_id=security_id,
-                    exchange_segment=self.dhan.NSE_FNO,
-                    instrument_type='FUTIDX', 
-                    from_date=from_str,
-                    to_date=to_str
-                )
+        batches = []
+        for range_start, range_end in self.store.missing_ranges(security_id, window_start, end_date):
+            current_end = range_end
+            while True:
+                current_start = max(current_end - datetime.timedelta(days=days_per_batch), range_start)
                 
-                if res.get('status') == 'success':
-                    data = res.get('data')
-                    if data:
-                        df = pd.DataFrame(data)
-                        all_dfs.append(df)
-            except Exception as e:
-                 print(f"   ⚠️ Batch failed: {e}")
-            
-            current_end = current_start
+                # Skip weekends logic not strictly needed if API returns empty for those days
+                batches.append((current_start.strftime('%Y-%m-%d'), current_end.strftime('%Y-%m-%d')))
+                if current_start <= range_start:
+                    break
+                current_end = current_start
+
+        print(f"   Fetching {len(batches)} batches: {batches}")
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(batches) or 1)) as batch_pool:
+            results = list(batch_pool.map(lambda b: self._fetch_batch(security_id, b[0], b[1], instrument), batches))
+        fetched = [df for ok, df in results if df is not None]
+        
+        since = int(datetime.datetime.combine(window_start.date(), datetime.time()).timestamp())
+        if all(ok for ok, _ in results):
+            for df in fetched:
+                self.store.save(security_id, df)
+            self.store.save(security_id, None, covered_from=window_start)
+            full_df = self.store.load(security_id, since=since)
+        else:
+            # Don't persist a partial window (it would hide the gap); use what we have
+            print("   ⚠️ Some batches failed. Not updating local store this run.")
+            full_df = pd.concat([self.store.load(security_id, since=since)] + fetched, ignore_index=True)
             
-        if not all_dfs:
+        if full_df.empty:
             return None
             
-        full_df = pd.concat(all_dfs, ignore_index=True)
         # Deduplicate based on timestamp if overlaps
-        if not full_df.empty:
-             col = 'start_time' if 'start_time' in full_df.columns else 'timestamp'
-             full_df = full_df.drop_duplicates(subset=[col])
-             full_df = full_df.sort_values(by=col)
-             print(f"✅ Total fetched: {len(full_df)} candles.")
-             return full_df
-             
-        return None
-
-    def run_analysis(self):
+        col = 'start_time' if 'start_time' in full_df.columns else 'timestamp'
+        full_df = full_df.drop_duplicates(subset=[col], keep='last')
+        full_df = full_df.sort_values(by=col)
+        print(f"✅ Total: {len(full_df)} candles ({sum(len(df) for df in fetched)} fetched).")
+        return full_df
+
+    def run_analysis(self, universe=None):
+        """
+        Pipelined daily run over the universe:
+        fetch (threads, shared rate limit) -> resample + structure (process pool)
+        -> persist candles (threads) as each symbol finishes, then one zone upsert.
+        """
         print("🚀 Starting Fortress Sweep Analysis (Daily - 60D)...")
-        targets = ["NIFTY", "BANKNIFTY"]
+        started = time.perf_counter()
+        timings = {'fetch': [], 'analyze': [], 'persist': []}
+
+        t0 = time.perf_counter()
+        resolved = self.resolve_universe(universe)
+        timings['resolve'] = [time.perf_counter() - t0]
+        print(f"🎯 Universe: {len(resolved)} futures")
+
+        def fetch(sec_id, sym, instrument):
+            t0 = time.perf_counter()
+            df = self.fetch_deep_history(sec_id, sym, instrument)
+            return df, time.perf_counter() - t0
+
+        def persist(df_15m, sym):
+            t0 = time.perf_counter()
+            self.db.save_market_data(df_15m, sym, timeframe='15m')
+            return time.perf_counter() - t0
+
         all_zones = []
-        
-        for target in targets:
-            sec_id, sym = self._get_security_id(target)
-            if sec_id:
-                # 1. Fetch Deep Data
-                df_1m = self.fetch_deep_history(sec_id, sym)
-                
-                if df_1m is not None:
-                    # 2. Resample
-                    df_15m = resample_to_15m(df_1m)
-                    print(f"📊 {sym}: Using {len(df_15m)} 15m candles.")
-                    
-                    # 3. Save Market Data (Persistence)
-                    self.db.save_market_data(df_15m, sym, timeframe='15m')
-                    
-                    # 4. Analyze
-                    zones = identify_smart_money_structure(df_15m, sym, sec_id)
-                    all_zones.extend(zones)
-                else:
-                    print(f"❌ No data for {sym}")
-            else:
-                print(f"❌ Security ID not found for {target}")
-                
+        with ThreadPoolExecutor(max_workers=self.fetch_workers) as fetch_pool, \
+                ProcessPoolExecutor(max_workers=self.analysis_workers) as cpu_pool, \
+                ThreadPoolExecutor(max_workers=4) as io_pool:
+            # 1. Fetch Deep Data (concurrent, shared rate limit)
+            stages = {fetch_pool.submit(fetch, sec_id, sym, inst): ('fetch', sec_id, sym) for sec_id, sym, inst in resolved}
+            pending = set(stages)
+
+            # Each finished stage feeds the next one for that symbol, so all three overlap
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, sec_id, sym = stages.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        print(f"❌ {stage.title()} failed for {sym}: {e}")
+                        continue
+
+                    if stage == 'fetch':
+                        df_1m, elapsed = result
+                        timings['fetch'].append(elapsed)
+                        if df_1m is None:
+                            print(f"❌ No data for {sym}")
+                            continue
+                        # 2. Resample + Analyze (process pool)
+                        nxt = cpu_pool.submit(analyze_history, sec_id, sym, df_1m)
+                        stages[nxt] = ('analyze', sec_id, sym)
+                        pending.add(nxt)
+
+                    elif stage == 'analyze':
+                        df_15m, zones, elapsed = result
+                        timings['analyze'].append(elapsed)
+                        if df_15m is None:
+                            continue
+                        print(f"📊 {sym}: Using {len(df_15m)} 15m candles, {len(zones)} zones.")
+                        all_zones.extend(zones)
+                        # 3. Save Market Data (Persistence)
+                        nxt = io_pool.submit(persist, df_15m, sym)
+                        stages[nxt] = ('persist', sec_id, sym)
+                        pending.add(nxt)
+
+                    else:
+                        timings['persist'].append(result)
+
         if all_zones:
-             # 5. Save Zones to DB
-             self.db.save_zones(all_zones)
+            # 4. Save Zones to DB
+            t0 = time.perf_counter()
+            self.db.save_zones(all_zones)
+            timings['zones'] = [time.perf_counter() - t0]
         else:
-             print("⚠️ No zones identified.")
+            print("⚠️ No zones identified.")
+
+        self.report_timings(timings, len(resolved), time.perf_counter() - started)
+        print(f"   dhan     {self.dhan.report()}")
+        return all_zones
+
+    @staticmethod
+    def report_timings(timings, symbols, wall):
+        """
+        Per-stage summary: symbols through the stage, summed and per-symbol time.
+        Stages overlap, so the totals add up to more than the wall time.
+        """
+        print(f"⏱️ Analysis finished: {symbols} symbols in {wall:.1f}s")
+        for stage in ('resolve', 'fetch', 'analyze', 'persist', 'zones'):
+            values = np.asarray(timings.get(stage, []))
+            if len(values):
+                print(f"   {stage:<8} n={len(values):<4} total={values.sum():7.2f}s "
+                      f"p50={np.median(values):6.3f}s max={values.max():6.3f}s")
 
 if __name__ == "__main__":
-    analyzer = MarketAnalyzer()
+    parser = argparse.ArgumentParser(description="Daily market structure analysis")
+    parser.add_argument('--universe', default=DEFAULT_UNIVERSE,
+                        help="indices, stocks, all, or comma separated roots (e.g. indices,RELIANCE)")
+    parser.add_argument('--workers', type=int, default=None, help="analysis processes (default: CPU count)")
+    args = parser.parse_args()
+    analyzer = MarketAnalyzer(universe=args.universe, analysis_workers=args.workers)
     analyzer.run_analysis()
@@ -0,0 +1,392 @@
+import datetime
+import numpy as np
+import pandas as pd
+from core.bar_aggregator import frame_to_arrays
+from core.analysis_utils import ZONE_BUFFER, OB_BODY_MULTIPLIER, OB_WINDOW
+from core.strategy import SPREAD_WIDTH, BANKNIFTY_SPREAD_WIDTH
+from core.virtual_broker import DAILY_TARGET, DAILY_SL
+
+# Live system settings (analysis_utils / strategy / VirtualBroker)
+DEFAULT_PARAMS = {
+    'zone_buffer': ZONE_BUFFER,
+    'ob_multiplier': OB_BODY_MULTIPLIER,
+    'ob_window': OB_WINDOW,
+    'nifty_width': SPREAD_WIDTH,          # Everything but BANKNIFTY
+    'banknifty_width': BANKNIFTY_SPREAD_WIDTH,
+    'daily_target': DAILY_TARGET,
+    'daily_sl': DAILY_SL,
+    'qty': 50,
+    'lookback_days': 60,       # Calendar days of 15m history per analysis run
+    'iv': 0.15,                # Flat implied volatility for the option fill model
+}
+
+ENTRY_SECONDS = 300   # 5m entry candles (main.CANDLE_TIMEFRAME)
+ZONE_SECONDS = 900    # 15m structure candles
+SESSION_CLOSE_UTC = 10 * 3600 # 15:30 IST, option expiry time
+YEAR_SECONDS = 365 * 24 * 3600
+
+def resample_arrays(ts, o, h, l, c, seconds):
+    """
+    Epoch-aligned OHLC buckets from sorted 1m arrays (same buckets as BarAggregator / resample).
+    """
+    bucket = ts - ts % seconds
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(ts)] - 1
+    return (bucket[starts], o[starts], np.maximum.reduceat(h, starts),
+            np.minimum.reduceat(l, starts), c[ends])
+
+def _norm_cdf(x):
+    # Abramowitz & Stegun 7.1.26 erf (|error| < 1.5e-7), vectorized
+    z = np.abs(x) / np.sqrt(2.0)
+    t = 1.0 / (1.0 + 0.3275911 * z)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    erf = 1.0 - poly * np.exp(-z * z)
+    return 0.5 * (1.0 + np.sign(x) * erf)
+
+def option_price(spot, strike, years, iv, is_call):
+    """
+    Black-Scholes (r = 0) on arrays; intrinsic value at expiry.
+    """
+    years = np.maximum(years, 1e-9)
+    vol = iv * np.sqrt(years)
+    d1 = (np.log(spot / strike) + 0.5 * vol * vol) / vol
+    d2 = d1 - vol
+    call = spot * _norm_cdf(d1) - strike * _norm_cdf(d2)
+    return np.where(is_call, call, call - spot + strike) # Put-call parity
+
+class SymbolBars:
+    """
+    1m / 5m / 15m arrays for one instrument (1m sorted by time).
+    """
+    def __init__(self, symbol, ts, o, h, l, c):
+        self.symbol = symbol
+        self.root = symbol.split('-')[0]
+        self.ts = np.asarray(ts, dtype=np.int64)
+        self.m1 = tuple(np.asarray(a, dtype=np.float64) for a in (o, h, l, c))
+        if len(self.ts) and (np.diff(self.ts) < 0).any():
+            order = np.argsort(self.ts, kind='stable')
+            self.ts = self.ts[order]
+            self.m1 = tuple(a[order] for a in self.m1)
+        # Sorted input is used as-is (views stay views, e.g. over shared memory)
+        self.m5 = resample_arrays(self.ts, *self.m1, ENTRY_SECONDS)
+        self.m15 = resample_arrays(self.ts, *self.m1, ZONE_SECONDS)
+
+    @classmethod
+    def from_frame(cls, symbol, df):
+        ts, o, h, l, c, _ = frame_to_arrays(df)
+        return cls(symbol, np.array(ts, dtype=np.int64), np.array(o), np.array(h), np.array(l), np.array(c))
+
+def _day(ts):
+    return ts // 86400 # UTC date, same as the 'date' column of identify_smart_money_structure
+
+def build_daily_zones(bars, params):
+    """
+    The zones identify_smart_money_structure would return for each session day D,
+    run pre-market on the 15m history of the `lookback_days` before D.
+    Returns (days, level, is_supply, ids): level/is_supply are [day, 6] (NaN = no zone),
+    columns in the function's order (PDH, PDL, then up to 4 latest Order Blocks).
+    """
+    ts15, o, h, l, c = bars.m15
+    d15 = _day(ts15)
+    days, first = np.unique(d15, return_index=True)
+    n_days = len(days)
+    day_high = np.maximum.reduceat(h, first)
+    day_low = np.minimum.reduceat(l, first)
+
+    level = np.full((n_days, 6), np.nan)
+    is_supply = np.zeros((n_days, 6), dtype=bool)
+    ids = np.full((n_days, 6), None, dtype=object)
+
+    # History window per day: [lo, k) in days, [w0, w1) in 15m rows
+    lo = np.searchsorted(days, days - params['lookback_days'])
+    k = np.arange(n_days)
+    n_hist = k - lo
+    has = n_hist > 0
+
+    # PDH / PDL: the function uses dates[-2] of the history (or the whole window if only 1 date)
+    w0 = first[lo]
+    pdh = np.where(n_hist >= 2, day_high[np.maximum(k - 2, 0)], day_high[np.maximum(k - 1, 0)])
+    pdl = np.where(n_hist >= 2, day_low[np.maximum(k - 2, 0)], day_low[np.maximum(k - 1, 0)])
+    buf = params['zone_buffer']
+    level[has, 0] = pdh[has] + buf # SUPPLY defends range_high
+    level[has, 1] = pdl[has] - buf # DEMAND defends range_low
+    is_supply[:, 0] = True
+    for d in np.flatnonzero(has):
+        ids[d, 0] = f"{bars.symbol}_PDH"
+        ids[d, 1] = f"{bars.symbol}_PDL"
+
+    # Order Blocks: rolling stats are window-independent past the first `ob_window` rows,
+    # so candidates are computed once over the whole series.
+    window = int(params['ob_window'])
+    body = np.abs(c - o)
+    avg = pd.Series(body).rolling(window).mean().to_numpy()
+    cand = np.arange(1, len(c))
+    strong = (avg[cand] != 0) & (body[cand] > avg[cand] * params['ob_multiplier'])
+    bullish = strong & (c[cand] > o[cand]) & (c[cand - 1] < o[cand - 1])
+    bearish = strong & (c[cand] < o[cand]) & (c[cand - 1] > o[cand - 1])
+    ob = cand[bullish | bearish]
+    ob_bull = bullish[bullish | bearish]
+
+    w1 = np.r_[first, len(c)][k] # History ends where day D starts
+    start = np.searchsorted(ob, w0 + window)
+    stop = np.searchsorted(ob, w1 - 2)
+    for d in np.flatnonzero(has & (stop > start)):
+        take = np.arange(max(start[d], stop[d] - 4), stop[d])
+        for col, j in enumerate(take, start=2):
+            i = ob[j]
+            seq = 2 + j - start[d] # len(zones) when the function appended it
+            if ob_bull[j]:
+                level[d, col] = l[i - 1]
+                ids[d, col] = f"{bars.symbol}_OB_DEMAND_{seq}"
+            else:
+                level[d, col] = h[i - 1]
+                is_supply[d, col] = True
+                ids[d, col] = f"{bars.symbol}_OB_SUPPLY_{seq}"
+
+    return days, level, is_supply, ids
+
+def find_entries(bars, params, sentiment=None):
+    """
+    Every 5m candle checked against that day's zones in one array pass
+    (same rule as FortressStrategy.check_entry; first zone in order wins).
+    sentiment: callable(root, day_date) -> BULLISH / BEARISH / NEUTRAL, or None (both sides confirmed).
+    Returns a dict of per-entry arrays.
+    """
+    days, level, is_supply, ids = build_daily_zones(bars, params)
+    ts5, _, h5, l5, c5 = bars.m5
+    row = np.searchsorted(days, _day(ts5))
+    row_ok = (row < len(days))
+    row = np.minimum(row, len(days) - 1)
+    row_ok &= days[row] == _day(ts5)
+
+    lv = level[row] # [bar, zone]
+    with np.errstate(invalid='ignore'):
+        supply_hit = is_supply[row] & (c5[:, None] < lv) & (lv < h5[:, None])
+        demand_hit = ~is_supply[row] & (l5[:, None] < lv) & (lv < c5[:, None])
+
+    allow_supply = np.ones(len(ts5), dtype=bool)
+    allow_demand = np.ones(len(ts5), dtype=bool)
+    if sentiment is not None:
+        flags = {d: sentiment(bars.root, datetime.date(1970, 1, 1) + datetime.timedelta(days=int(d))) for d in days}
+        flag = np.array([flags[d] for d in days[row]], dtype=object)
+        allow_supply = flag == "BEARISH"
+        allow_demand = flag == "BULLISH"
+
+    any_supply = supply_hit.any(axis=1) & allow_supply & row_ok
+    any_demand = demand_hit.any(axis=1) & allow_demand & row_ok & ~any_supply
+    hit = np.flatnonzero(any_supply | any_demand)
+
+    short_call = any_supply[hit]
+    zone_col = np.where(short_call, supply_hit[hit].argmax(axis=1), demand_hit[hit].argmax(axis=1))
+
+    step = 100 if "BANKNIFTY" in bars.symbol else 50
+    width = params['banknifty_width'] if "BANKNIFTY" in bars.root else params['nifty_width']
+    atm = np.round(c5[hit] / step) * step
+    return {
+        'time': ts5[hit] + ENTRY_SECONDS, # Filled at candle close
+        'spot': c5[hit],
+        'is_call': short_call,            # SELL_CALL_SPREAD (supply) / BUY_PUT_SPREAD (demand)
+        'sell_strike': atm,
+        'buy_strike': np.where(short_call, atm + width, atm - width),
+        'zone_id': ids[row[hit], zone_col],
+    }
+
+def expiry_time(ts):
+    """
+    Weekly expiry (Thursday 15:30 IST) on or after each timestamp's date, as in main.execute_signal.
+    """
+    day = _day(ts)
+    weekday = (day + 3) % 7 # 1970-01-01 was a Thursday (weekday 3)
+    return (day + (3 - weekday) % 7) * 86400 + SESSION_CLOSE_UTC
+
+class Backtester:
+    """
+    Replays stored 1m bars through the Sweep & Reject rules.
+    Zones are rebuilt per day from the prior 15m history, entries are found on
+    5m closes across all zones at once, and credit spreads are marked on every
+    1m close with a Black-Scholes fill model in VirtualBroker terms (signed qty,
+    pnl = (ltp - price) * qty). Daily target / SL are checked on the combined MTM:
+    a trigger squares everything off and stops entries for the day; open spreads
+    are squared off at the session's last bar.
+    """
+    def __init__(self, bars, params=None, sentiment=None):
+        self.bars = {b.symbol: b for b in bars}
+        self.params = dict(DEFAULT_PARAMS, **(params or {}))
+        self.sentiment = sentiment
+        self._days = None # Priced days cache (see price_days)
+
+    @classmethod
+    def from_frames(cls, frames, params=None, sentiment=None):
+        """
+        frames: {symbol: 1m DataFrame ('timestamp' epoch or 'start_time' + OHLC)}.
+        """
+        return cls([SymbolBars.from_frame(s, df) for s, df in frames.items()], params, sentiment)
+
+    def _mark(self, spot, years, ent):
+        """
+        Spread P&L [entry, grid] for arrays of spot / time-to-expiry.
+        """
+        iv = self.params['iv']
+        qty = self.params['qty']
+        is_call = ent['is_call'][:, None]
+        buy = option_price(spot, ent['buy_strike'][:, None], years, iv, is_call)
+        sell = option_price(spot, ent['sell_strike'][:, None], years, iv, is_call)
+        return buy, sell, (buy - ent['buy_price'][:, None] - (sell - ent['sell_price'][:, None])) * qty
+
+    def _entries(self):
+        entries = []
+        for b in self.bars.values():
+            e = find_entries(b, self.params, self.sentiment)
+            e['symbol'] = np.full(len(e['time']), b.symbol, dtype=object)
+            entries.append(e)
+        return {k: np.concatenate([e[k] for e in entries]) for k in entries[0]}
+
+    def price_days(self):
+        """
+        Per session day: the 1m grid, that day's entries and their leg prices /
+        spread P&L on every grid close (0 before the fill). Independent of the
+        risk limits, so it is computed once and reused by run(daily_target=..., daily_sl=...).
+        """
+        if self._days is not None:
+            return self._days
+
+        p = self.params
+        ent_all = self._entries()
+        ent_day = _day(ent_all['time'] - 1)
+        days = np.unique(np.concatenate([_day(b.ts) for b in self.bars.values()]))
+        self._days = []
+
+        for d in days:
+            # Common 1m grid for the day, each symbol's close forward-filled onto it
+            closes, grid = {}, []
+            for b in self.bars.values():
+                lo, hi = np.searchsorted(b.ts, [d * 86400, (d + 1) * 86400])
+                if hi > lo:
+                    closes[b.symbol] = (b.ts[lo:hi], b.m1[3][lo:hi])
+                    grid.append(b.ts[lo:hi])
+            if not grid:
+                continue
+            grid = np.unique(np.concatenate(grid))
+
+            sel = np.flatnonzero((ent_day == d) & (ent_all['time'] < grid[-1] + 60))
+            if not len(sel):
+                self._days.append({'grid': grid, 'ent': None})
+                continue
+
+            ent = {k: v[sel] for k, v in ent_all.items()}
+            spot = np.empty((len(sel), len(grid)))
+            for sym, (ts_s, c_s) in closes.items():
+                rows = ent['symbol'] == sym
+                idx = np.maximum(np.searchsorted(ts_s, grid, side='right') - 1, 0)
+                spot[rows] = c_s[idx]
+
+            expiry = expiry_time(ent['time'])
+            to_expiry = (expiry - ent['time']) / YEAR_SECONDS
+            ent['buy_price'] = option_price(ent['spot'], ent['buy_strike'], to_expiry, p['iv'], ent['is_call'])
+            ent['sell_price'] = option_price(ent['spot'], ent['sell_strike'], to_expiry, p['iv'], ent['is_call'])
+            years = (expiry[:, None] - (grid[None, :] + 60)) / YEAR_SECONDS
+            buy, sell, pnl = self._mark(spot, years, ent)
+
+            live = grid[None, :] >= ent['time'][:, None] # Marked on 1m closes after the fill
+            pnl = np.where(live, pnl, 0.0)
+            self._days.append({'grid': grid, 'ent': ent, 'buy': buy, 'sell': sell, 'pnl': pnl, 'mtm': pnl.sum(axis=0)})
+        return self._days
+
+    def run(self, daily_target=None, daily_sl=None, details=True):
+        """
+        Applies the daily risk limits to the priced days.
+        details=False skips the trade list / ledger (parameter sweeps).
+        """
+        p = self.params
+        target = p['daily_target'] if daily_target is None else daily_target
+        stop = p['daily_sl'] if daily_sl is None else daily_sl
+        qty = p['qty']
+        trades, ledger, curve_ts, curve_eq, trade_pnl, day_reasons = [], [], [], [], [], []
+        realized = 0.0
+
+        for day in self.price_days():
+            grid, ent = day['grid'], day['ent']
+            if ent is None:
+                curve_ts.append(grid[-1])
+                curve_eq.append(realized)
+                continue
+
+            mtm = day['mtm']
+            breach = np.flatnonzero((mtm >= target) | (mtm <= stop))
+            if len(breach):
+                j = breach[0]
+                reason = "TARGET_HIT" if mtm[j] >= target else "SL_HIT"
+            else:
+                j, reason = len(grid) - 1, "EOD"
+
+            # Entries after a trigger are locked out; they are still 0 in mtm[:j + 1]
+            opened = np.flatnonzero(ent['time'] <= grid[j])
+            trade_pnl.append(day['pnl'][opened, j])
+            day_reasons.append(reason)
+            curve_ts.append(grid[:j + 1])
+            curve_eq.append(realized + mtm[:j + 1])
+            realized += float(mtm[j])
+            if not details:
+                continue
+
+            exit_ts = grid[j] + 60
+            buy, sell = day['buy'], day['sell']
+            for i in opened:
+                action = "SELL_CALL_SPREAD" if ent['is_call'][i] else "BUY_PUT_SPREAD"
+                kind = "CE" if ent['is_call'][i] else "PE"
+                leg_buy = f"{ent['symbol'][i]} {ent['buy_strike'][i]:.0f} {kind}"
+                leg_sell = f"{ent['symbol'][i]} {ent['sell_strike'][i]:.0f} {kind}"
+                exit_buy, exit_sell = buy[i, j], sell[i, j]
+                t_in = datetime.datetime.fromtimestamp(int(ent['time'][i]), datetime.timezone.utc)
+                t_out = datetime.datetime.fromtimestamp(int(exit_ts), datetime.timezone.utc)
+                trades.append({
+                    'entry_time': t_in, 'exit_time': t_out, 'symbol': ent['symbol'][i], 'action': action,
+                    'zone_id': ent['zone_id'][i], 'spot': float(ent['spot'][i]),
+                    'sell_strike': float(ent['sell_strike'][i]), 'buy_strike': float(ent['buy_strike'][i]),
+                    'credit': float(ent['sell_price'][i] - ent['buy_price'][i]),
+                    'exit_debit': float(exit_sell - exit_buy), 'pnl': float(day['pnl'][i, j]), 'exit_reason': reason,
+                })
+                # Same rows VirtualBroker writes (timestamp, symbol, side, qty, price, tag, pnl)
+                ledger += [
+                    [t_in, leg_buy, "BUY", qty, float(ent['buy_price'][i]), "ENTRY_HEDGE", 0],
+                    [t_in, leg_sell, "SELL", qty, float(ent['sell_price'][i]), "ENTRY_PREMIUM", 0],
+                    [t_out, leg_buy, "SELL", qty, float(exit_buy), f"EXIT_{reason}", (exit_buy - ent['buy_price'][i]) * qty],
+                    [t_out, leg_sell, "BUY", qty, float(exit_sell), f"EXIT_{reason}", (ent['sell_price'][i] - exit_sell) * qty],
+                ]
+
+        return BacktestResult(trades, ledger, curve_ts, curve_eq, trade_pnl, day_reasons)
+
+class BacktestResult:
+    """
+    trades: one row per spread. ledger: VirtualBroker-format leg fills.
+    equity: realized + open MTM on every 1m close (flat on days without trades).
+    """
+    LEDGER_COLUMNS = ["timestamp", "symbol", "side", "qty", "price", "tag", "pnl"]
+
+    def __init__(self, trades, ledger, curve_ts, curve_eq, trade_pnl, day_reasons):
+        self.trades = pd.DataFrame(trades)
+        self.ledger = pd.DataFrame(ledger, columns=self.LEDGER_COLUMNS)
+        self.trade_pnl = np.concatenate(trade_pnl) if trade_pnl else np.array([])
+        self.day_reasons = day_reasons
+        self.curve_ts = np.concatenate([np.atleast_1d(t) for t in curve_ts]) if curve_ts else np.array([], dtype=np.int64)
+        self.curve_eq = np.concatenate([np.atleast_1d(e) for e in curve_eq]) if curve_eq else np.array([])
+
+    @property
+    def equity(self):
+        return pd.DataFrame({'timestamp': pd.to_datetime(self.curve_ts, unit='s', utc=True), 'equity': self.curve_eq})
+
+    def summary(self):
+        eq = self.curve_eq
+        pnl = self.trade_pnl
+        drawdown = float((np.maximum.accumulate(eq) - eq).max()) if len(eq) else 0.0
+        net = float(eq[-1]) if len(eq) else 0.0
+        return {
+            'trades': len(pnl),
+            'net_pnl': net,
+            'win_rate': float((pnl > 0).mean()) if len(pnl) else 0.0,
+            'avg_trade': float(pnl.mean()) if len(pnl) else 0.0,
+            'max_drawdown': drawdown,
+            'return_over_dd': net / drawdown if drawdown else 0.0,
+            'target_days': self.day_reasons.count("TARGET_HIT"),
+            'sl_days': self.day_reasons.count("SL_HIT"),
+        }
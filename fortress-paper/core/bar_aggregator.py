@@ -0,0 +1,241 @@
+import collections
+import pandas as pd
+
+# Supported timeframes (seconds). Buckets are aligned to epoch, same as df.resample().
+TIMEFRAMES = {
+    '1m': 60,
+    '5m': 300,
+    '15m': 900,
+    '25m': 1500,
+    '60m': 3600,
+}
+
+EPOCH = pd.Timestamp(0)
+
+def _frame_times(df):
+    """
+    The frame's bar start times ('start_time' or epoch 'timestamp'), or None.
+    """
+    cols = {c.lower(): c for c in df.columns}
+    if 'timestamp' in cols and 'start_time' not in cols:
+        return pd.to_datetime(df[cols['timestamp']], unit='s', errors='coerce')
+    if 'start_time' in cols:
+        return pd.to_datetime(df[cols['start_time']])
+    return None
+
+def frame_timezone(df):
+    """
+    Timezone of a frame's 'start_time' column (None if naive or absent).
+    """
+    times = _frame_times(df) if df is not None and not df.empty else None
+    return times.dt.tz if times is not None else None
+
+def frame_to_arrays(df):
+    """
+    Normalizes a Dhan 1m DataFrame ('start_time' or epoch 'timestamp')
+    into sorted (epoch_seconds, open, high, low, close, volume) lists.
+    Tz-aware start times are converted to UTC epoch; naive ones are taken as UTC.
+    """
+    if df is None or df.empty:
+        return [], [], [], [], [], []
+
+    cols = {c.lower(): c for c in df.columns}
+    times = _frame_times(df)
+    if times is None:
+        return [], [], [], [], [], []
+    if times.dt.tz is not None:
+        times = times.dt.tz_convert('UTC').dt.tz_localize(None)
+
+    out = pd.DataFrame({
+        'ts': ((times - EPOCH) // pd.Timedelta('1s')).fillna(0).astype('int64').to_numpy(),
+        'open': df[cols['open']].astype(float).to_numpy(),
+        'high': df[cols['high']].astype(float).to_numpy(),
+        'low': df[cols['low']].astype(float).to_numpy(),
+        'close': df[cols['close']].astype(float).to_numpy(),
+        'volume': df[cols['volume']].astype(float).to_numpy() if 'volume' in cols else 0.0,
+    })
+    out = out[times.notna().to_numpy()]
+    out = out.drop_duplicates(subset='ts', keep='last').sort_values('ts')
+
+    return (out['ts'].tolist(), out['open'].tolist(), out['high'].tolist(),
+            out['low'].tolist(), out['close'].tolist(), out['volume'].tolist())
+
+def _fold(bar, high, low, close, volume):
+    if high > bar['high']:
+        bar['high'] = high
+    if low < bar['low']:
+        bar['low'] = low
+    bar['close'] = close
+    bar['volume'] += volume
+
+class BarAggregator:
+    """
+    Streaming OHLCV aggregator.
+    Keeps the open bar per (instrument, timeframe) and folds in 1m bars or ticks in O(1).
+    Finished bars are kept in a bounded history and emitted to listeners:
+        listener(instrument, timeframe, bar)
+    bar: {'start': epoch_seconds, 'open': .., 'high': .., 'low': .., 'close': .., 'volume': ..}
+    """
+    def __init__(self, timeframes=('15m',), on_bar=None, history=5000):
+        self.timeframes = {tf: TIMEFRAMES[tf] for tf in timeframes}
+        self.listeners = [on_bar] if on_bar else []
+        self.history = history
+
+        self._open = {}      # {(instrument, tf): bar}
+        self._closed = {}    # {(instrument, tf): deque of finished bars}
+        self._last_ts = {}   # {instrument: last folded 1m bar start (add_frame)}
+        self._pending = {}   # {instrument: latest 1m bar, may still be revised}
+        self._tz = {}        # {instrument: timezone of the frames fed to add_frame}
+
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+
+    def add_bar(self, instrument, ts, open_, high, low, close, volume=0.0, duration=60):
+        """
+        Folds a bar (or tick, duration=0) starting at epoch `ts` into every timeframe.
+        A bucket is closed as soon as the folded data reaches its end, or when
+        data for a later bucket arrives. Late data for an already closed bucket is ignored.
+        """
+        for tf, seconds in self.timeframes.items():
+            key = (instrument, tf)
+            start = ts - ts % seconds
+            bar = self._open.get(key)
+
+            if bar is not None and bar['start'] != start:
+                if start < bar['start']:
+                    continue
+                self._close(key)
+                bar = None
+
+            if bar is None:
+                closed = self._closed.get(key)
+                if closed and closed[-1]['start'] >= start:
+                    continue
+                self._open[key] = {
+                    'start': start,
+                    'open': open_,
+                    'high': high,
+                    'low': low,
+                    'close': close,
+                    'volume': volume,
+                }
+            else:
+                _fold(bar, high, low, close, volume)
+
+            if duration and ts + duration >= start + seconds:
+                self._close(key)
+
+    def add_tick(self, instrument, ts, price, volume=0.0):
+        """
+        Folds a single trade/LTP update. `ts` may be fractional epoch seconds.
+        """
+        self.add_bar(instrument, int(ts), price, price, price, price, volume, duration=0)
+
+    def add_frame(self, instrument, df):
+        """
+        Folds a 1m DataFrame (REST response) incrementally.
+        Rows at or before the last folded minute are skipped, so re-feeding an
+        overlapping window only costs the new minutes. The newest row is held
+        as pending because the exchange keeps revising the running minute.
+        Returns the number of newly folded rows.
+        """
+        ts, o, h, l, c, v = frame_to_arrays(df)
+        if not ts:
+            return 0
+        tz = frame_timezone(df)
+        if tz is not None:
+            self._tz[instrument] = tz
+
+        last = self._last_ts.get(instrument)
+        folded = 0
+        for i in range(len(ts) - 1):
+            if last is not None and ts[i] <= last:
+                continue
+            self.add_bar(instrument, ts[i], o[i], h[i], l[i], c[i], v[i])
+            self._last_ts[instrument] = ts[i]
+            folded += 1
+
+        last = self._last_ts.get(instrument)
+        if last is None or ts[-1] > last:
+            self._pending[instrument] = {
+                'start': ts[-1], 'open': o[-1], 'high': h[-1],
+                'low': l[-1], 'close': c[-1], 'volume': v[-1],
+            }
+        return folded
+
+    def flush(self, now=None):
+        """
+        Closes open bars whose bucket has ended by epoch `now` (all open bars if None).
+        Call on a timer so quiet instruments still emit at the bar boundary.
+        """
+        for key in list(self._open):
+            bar = self._open[key]
+            if now is None or bar['start'] + self.timeframes[key[1]] <= now:
+                self._close(key)
+
+    def _close(self, key):
+        bar = self._open.pop(key)
+        closed = self._closed.get(key)
+        if closed is None:
+            closed = self._closed[key] = collections.deque(maxlen=self.history)
+        closed.append(bar)
+
+        for listener in self.listeners:
+            listener(key[0], key[1], bar)
+
+    def last_folded(self, instrument):
+        """
+        Start (epoch seconds) of the last 1m row folded by add_frame, or None.
+        """
+        return self._last_ts.get(instrument)
+
+    def open_bar(self, instrument, timeframe):
+        return self._open.get((instrument, timeframe))
+
+    def last_bar(self, instrument, timeframe):
+        closed = self._closed.get((instrument, timeframe))
+        return closed[-1] if closed else None
+
+    def bars(self, instrument, timeframe, include_open=True):
+        """
+        Returns finished bars (oldest first), optionally followed by the
+        provisional running bar (open bar + pending 1m row).
+        """
+        bars = list(self._closed.get((instrument, timeframe), ()))
+        if not include_open:
+            return bars
+
+        seconds = self.timeframes[timeframe]
+        bar = self._open.get((instrument, timeframe))
+        bar = dict(bar) if bar else None
+
+        pending = self._pending.get(instrument)
+        if pending:
+            start = pending['start'] - pending['start'] % seconds
+            if bar and bar['start'] == start:
+                _fold(bar, pending['high'], pending['low'], pending['close'], pending['volume'])
+            elif (bar is None or start > bar['start']) and (not bars or start > bars[-1]['start']):
+                if bar:
+                    bars.append(bar)
+                bar = dict(pending, start=start)
+
+        if bar:
+            bars.append(bar)
+        return bars
+
+    def frame(self, instrument, timeframe='15m', include_open=True):
+        """
+        Same shape as resample_to_15m(): start_time, open, high, low, close, volume.
+        start_time keeps the timezone of the frames given to add_frame (naive UTC otherwise).
+        """
+        bars = self.bars(instrument, timeframe, include_open=include_open)
+        if not bars:
+            return None
+
+        df = pd.DataFrame(bars)
+        start_time = pd.to_datetime(df.pop('start'), unit='s')
+        tz = self._tz.get(instrument)
+        if tz is not None:
+            start_time = start_time.dt.tz_localize('UTC').dt.tz_convert(tz)
+        df.insert(0, 'start_time', start_time)
+        return df
@@ -0,0 +1,135 @@
+import os
+import sqlite3
+import datetime
+import threading
+import pandas as pd
+from config import DATA_DIR
+from core.bar_aggregator import frame_to_arrays
+
+CANDLE_DB_PATH = os.path.join(DATA_DIR, "candles.db")
+
+class CandleStore:
+    """
+    Local persistent candle history keyed by (security_id, timeframe).
+    Callers fetch only what is missing (see missing_ranges) and serve the rest locally.
+    Timestamps are epoch seconds of the bar start, same as Dhan's 'timestamp' field.
+    """
+    def __init__(self, db_path=CANDLE_DB_PATH):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._initialize_db()
+
+    def _initialize_db(self):
+        with self._lock:
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute('PRAGMA synchronous=NORMAL')
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS candles (
+                    security_id TEXT NOT NULL,
+                    timeframe TEXT NOT NULL,
+                    ts INTEGER NOT NULL,
+                    open REAL,
+                    high REAL,
+                    low REAL,
+                    close REAL,
+                    volume REAL,
+                    PRIMARY KEY (security_id, timeframe, ts)
+                ) WITHOUT ROWID
+            ''')
+            # Earliest date already requested per series (so empty history isn't refetched)
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS coverage (
+                    security_id TEXT NOT NULL,
+                    timeframe TEXT NOT NULL,
+                    covered_from INTEGER NOT NULL,
+                    PRIMARY KEY (security_id, timeframe)
+                )
+            ''')
+            self.conn.commit()
+
+    def high_water_mark(self, security_id, timeframe='1m'):
+        """
+        Latest stored bar start (epoch seconds) or None.
+        """
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT MAX(ts) FROM candles WHERE security_id = ? AND timeframe = ?',
+                (str(security_id), timeframe)
+            ).fetchone()
+        return row[0] if row else None
+
+    def covered_from(self, security_id, timeframe='1m'):
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT covered_from FROM coverage WHERE security_id = ? AND timeframe = ?',
+                (str(security_id), timeframe)
+            ).fetchone()
+        return row[0] if row else None
+
+    def missing_ranges(self, security_id, start, end, timeframe='1m'):
+        """
+        Date ranges still to fetch for [start, end] (datetimes).
+        Head: before anything ever requested. Tail: from the day of the
+        high-water mark (that day may still have been in progress) to `end`.
+        """
+        hwm = self.high_water_mark(security_id, timeframe)
+        covered = self.covered_from(security_id, timeframe)
+        if hwm is None or covered is None:
+            return [(start, end)]
+
+        ranges = []
+        covered_dt = datetime.datetime.fromtimestamp(covered)
+        if start.date() < covered_dt.date():
+            ranges.append((start, covered_dt))
+
+        tail_start = max(start, datetime.datetime.fromtimestamp(hwm))
+        if tail_start.date() <= end.date():
+            ranges.append((tail_start, end))
+        return ranges
+
+    def save(self, security_id, df, timeframe='1m', covered_from=None):
+        """
+        Upserts a Dhan candle DataFrame. `covered_from` (datetime) records the
+        start of the requested range. Returns rows written.
+        """
+        ts, o, h, l, c, v = frame_to_arrays(df)
+        sid = str(security_id)
+        rows = list(zip([sid] * len(ts), [timeframe] * len(ts), ts, o, h, l, c, v))
+
+        with self._lock:
+            if rows:
+                self.conn.executemany('''
+                    INSERT OR REPLACE INTO candles (security_id, timeframe, ts, open, high, low, close, volume)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', rows)
+            if covered_from is not None:
+                start = int(datetime.datetime.combine(covered_from.date(), datetime.time()).timestamp())
+                self.conn.execute('''
+                    INSERT INTO coverage (security_id, timeframe, covered_from) VALUES (?, ?, ?)
+                    ON CONFLICT (security_id, timeframe) DO UPDATE SET covered_from = MIN(covered_from, excluded.covered_from)
+                ''', (sid, timeframe, start))
+            self.conn.commit()
+        return len(rows)
+
+    def load(self, security_id, timeframe='1m', since=None, until=None):
+        """
+        Stored candles as a Dhan-shaped DataFrame ('timestamp' epoch seconds + OHLCV).
+        """
+        query = 'SELECT ts AS timestamp, open, high, low, close, volume FROM candles WHERE security_id = ? AND timeframe = ?'
+        params = [str(security_id), timeframe]
+        if since is not None:
+            query += ' AND ts >= ?'
+            params.append(int(since))
+        if until is not None:
+            query += ' AND ts <= ?'
+            params.append(int(until))
+        query += ' ORDER BY ts'
+
+        with self._lock:
+            return pd.read_sql_query(query, self.conn, params=params)
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
@@ -2,18 +2,48 @@ import sqlite3
 import datetime
 import os
 import json
+import queue
+import threading
+import time
+import numpy as np
+from core.tick_archive import TICK_DTYPE
 
 class DataRecorder:
-    def __init__(self, db_path):
+    """
+    SQLite recorder. Ticks are queued by log_tick() and written by a background
+    thread in one transaction per `batch_size` ticks or `flush_interval` seconds.
+    With a TickArchive, ticks go to its columnar files instead of the `ticks` table.
+    """
+    def __init__(self, db_path, batch_size=1000, flush_interval=0.25, max_queue=200000, shutdown_timeout=5.0, archive=None):
         self.db_path = db_path
+        self.archive = archive
         self.conn = None
         self.cursor = None
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.shutdown_timeout = shutdown_timeout
+
+        self._lock = threading.Lock() # Guards the shared connection
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self.ticks_written = 0
+        self.ticks_dropped = 0 # Queue full (writer can't keep up) or lost at shutdown
         self._initialize_db()
 
+        self._writer = threading.Thread(target=self._writer_loop, name="TickWriter", daemon=True)
+        self._writer.start()
+
     def _initialize_db(self):
         """Initialize SQLite database and create tables if they don't exist."""
         self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
         self.cursor = self.conn.cursor()
+
+        # WAL: readers don't block the writer, one fsync per checkpoint instead of per commit
+        self.cursor.execute('PRAGMA journal_mode=WAL')
+        self.cursor.execute('PRAGMA synchronous=NORMAL')
+        self.cursor.execute('PRAGMA temp_store=MEMORY')
+        self.cursor.execute('PRAGMA cache_size=-16000') # 16 MB
+        self.cursor.execute('PRAGMA busy_timeout=5000')
         
         # Table for Tick Data
         self.cursor.execute('''
@@ -50,29 +80,83 @@ class DataRecorder:
 
     def log_tick(self, tick_data):
         """
-        Log a single tick to the database.
+        Queue a single tick for the background writer (non-blocking).
         Expected tick_data format: {'symbol': '...', 'ltp': 100.5, 'volume': 500, 'oi': 12000, 'time': '...'}
         """
         try:
-            timestamp = tick_data.get('time', datetime.datetime.now())
-            symbol = tick_data.get('symbol')
+            security_id = tick_data.get('security_id')
+            symbol = tick_data.get('symbol') or str(security_id)
             ltp = tick_data.get('ltp')
             volume = tick_data.get('volume', 0)
-            oi = tick_data.get('oi', 0)
+            oi = tick_data.get('oi', tick_data.get('OI'))
 
-            self.cursor.execute('''
-                INSERT INTO ticks (timestamp, symbol, ltp, volume, oi)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (timestamp, symbol, ltp, volume, oi))
-            
-            # Simple batch commit or commit every tick? 
-            # SQLite is fast, but for high freq, batching is better. 
-            # For paper trading v1, auto-commit is safer to avoid data loss on crash.
-            self.conn.commit() 
-            
+            # Timestamp text is formatted by the writer thread, off the feed path
+            self._queue.put_nowait((time.time_ns(), tick_data.get('time'), security_id, symbol, ltp, volume, oi))
+        except queue.Full:
+            self.ticks_dropped += 1
         except Exception as e:
             print(f"❌ Error logging tick: {e}")
 
+    def _writer_loop(self):
+        """
+        Group commit: first tick opens a batch, which is written when it reaches
+        batch_size or flush_interval elapses. Drains the queue after stop.
+        """
+        while not (self._stop.is_set() and self._queue.empty()):
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._stop.is_set():
+                    try:
+                        batch.append(self._queue.get_nowait())
+                        continue
+                    except queue.Empty:
+                        break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            self._write_ticks(batch)
+
+    def _write_ticks(self, batch):
+        try:
+            if self.archive:
+                self._archive_ticks(batch)
+            else:
+                rows = [(text or datetime.datetime.fromtimestamp(ts / 1e9).isoformat(sep=' '), symbol, ltp, volume, oi or 0)
+                        for ts, text, _, symbol, ltp, volume, oi in batch]
+                with self._lock:
+                    self.cursor.executemany('''
+                        INSERT INTO ticks (timestamp, symbol, ltp, volume, oi)
+                        VALUES (?, ?, ?, ?, ?)
+                    ''', rows)
+                    self.conn.commit()
+            self.ticks_written += len(batch)
+        except Exception as e:
+            self.ticks_dropped += len(batch)
+            print(f"❌ Error writing {len(batch)} ticks: {e}")
+
+    def _archive_ticks(self, batch):
+        """
+        One TICK_DTYPE array per instrument, appended to its day file.
+        """
+        groups = {}
+        for ts, _, security_id, symbol, ltp, volume, oi in batch:
+            groups.setdefault(security_id, (symbol, []))[1].append(
+                (ts, ltp if ltp is not None else np.nan, volume or 0, oi if oi is not None else np.nan))
+        for security_id, (symbol, rows) in groups.items():
+            self.archive.append(security_id, symbol, np.array(rows, dtype=TICK_DTYPE))
+        self.archive.flush()
+
+    def pending_ticks(self):
+        return self._queue.qsize()
+
     def log_option_chain(self, chain_data):
         """
         Log a snapshot of the option chain.
@@ -97,17 +181,32 @@ class DataRecorder:
                     item.get('iv')
                 ))
 
-            self.cursor.executemany('''
-                INSERT INTO option_chain_snapshots (timestamp, symbol, expiry, strike_price, option_type, oi, change_in_oi, ltp, volume, iv)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', data_tuples)
-            
-            self.conn.commit()
+            with self._lock:
+                self.cursor.executemany('''
+                    INSERT INTO option_chain_snapshots (timestamp, symbol, expiry, strike_price, option_type, oi, change_in_oi, ltp, volume, iv)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', data_tuples)
+                
+                self.conn.commit()
             print(f"📊 Logged {len(data_tuples)} option chain records.")
             
         except Exception as e:
             print(f"❌ Error logging option chain: {e}")
 
     def close(self):
+        """
+        Flushes queued ticks (bounded by shutdown_timeout) and closes the DB.
+        """
+        self._stop.set()
+        self._writer.join(timeout=self.shutdown_timeout)
+        if self._writer.is_alive():
+            lost = self._queue.qsize()
+            self.ticks_dropped += lost
+            print(f"⚠️ Tick writer did not finish in {self.shutdown_timeout}s. ~{lost} ticks not written.")
+            return
+
+        if self.archive:
+            self.archive.close()
         if self.conn:
             self.conn.close()
+        print(f"✅ DataRecorder closed. Ticks written: {self.ticks_written}, dropped: {self.ticks_dropped}")
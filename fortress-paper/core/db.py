@@ -4,10 +4,14 @@ from supabase import create_client, Client
 import pandas as pd
 import json
 
+# Max candles per market_candles upsert request
+CANDLE_CHUNK_SIZE = 500
+
 class FortressDB:
     def __init__(self):
         url = os.environ.get("SUPABASE_URL")
         key = os.environ.get("SUPABASE_KEY")
+        self._candle_watermarks = {} # {(symbol, timeframe): last persisted pd.Timestamp}
         
         if not url or not key:
             print("❌ Supabase URL/KEY not found in env.")
@@ -68,6 +72,29 @@ class FortressDB:
             print(f"❌ Error fetching zones: {e}")
             return []
 
+    def get_zones_updated_since(self, since=None, page_size=1000):
+        """
+        Zones of any status (retired ones included) with updated_at at or after `since`
+        (ISO timestamp), oldest first. since=None -> all rows.
+        Returns None if the query failed, so callers can keep their watermark.
+        """
+        if not self.supabase:
+            return []
+
+        rows = []
+        try:
+            while True:
+                query = self.supabase.table('trading_zones').select("*").order('updated_at').order('id')
+                if since:
+                    query = query.gte('updated_at', since)
+                page = query.range(len(rows), len(rows) + page_size - 1).execute().data or []
+                rows.extend(page)
+                if len(page) < page_size:
+                    return rows
+        except Exception as e:
+            print(f"❌ Error fetching zone changes: {e}")
+            return None
+
     def log_trade(self, trade_data):
         """
         Logs trade execution.
@@ -80,46 +107,77 @@ class FortressDB:
         except Exception as e:
             print(f"❌ Error logging trade: {e}")
 
-    def save_market_data(self, df, symbol, timeframe='15m'):
+    def get_candle_watermark(self, symbol, timeframe='15m'):
+        """
+        Latest persisted candle timestamp for (symbol, timeframe), cached after the first query.
+        """
+        key = (symbol, timeframe)
+        if key in self._candle_watermarks:
+            return self._candle_watermarks[key]
+
+        response = (self.supabase.table('market_candles').select('timestamp')
+                    .eq('symbol', symbol).eq('timeframe', timeframe)
+                    .order('timestamp', desc=True).limit(1).execute())
+
+        watermark = None
+        if response.data:
+            watermark = pd.Timestamp(response.data[0]['timestamp'])
+            if watermark.tzinfo is not None:
+                # Stored naive timestamps come back as UTC timestamptz
+                watermark = watermark.tz_convert('UTC').tz_localize(None)
+        self._candle_watermarks[key] = watermark
+        return watermark
+
+    def save_market_data(self, df, symbol, timeframe='15m', chunk_size=CANDLE_CHUNK_SIZE):
         """
         Saves OHLCV data to 'market_candles'.
+        Only candles at/after the last persisted timestamp are sent (the last one
+        may have been partial), in upsert chunks of at most `chunk_size` rows.
         """
         if not self.supabase or df is None or df.empty:
             return
             
-        print(f"💾 Saving {len(df)} candles for {symbol} to Supabase...")
         try:
-            # Convert DF to list of dicts
             # Ensure columns match Supabase Schema: symbol, timestamp, open, high, low, close, volume, timeframe
-            records = []
-            
             # Reset index if date is index
-            df_copy = df.copy()
+            df_copy = df
             if 'start_time' not in df_copy.columns and isinstance(df_copy.index, pd.DatetimeIndex):
                 df_copy = df_copy.reset_index()
                 df_copy.rename(columns={'index': 'start_time'}, inplace=True)
-            elif 'start_time' not in df_copy.columns:
-                 # Try finding date column
-                 pass
             
-            for _, row in df_copy.iterrows():
-                ts = row['start_time'].isoformat() if hasattr(row['start_time'], 'isoformat') else str(row['start_time'])
-                
-                record = {
-                    'symbol': symbol,
-                    'timestamp': ts,
-                    'timeframe': timeframe,
-                    'open': float(row['open']),
-                    'high': float(row['high']),
-                    'low': float(row['low']),
-                    'close': float(row['close']),
-                    'volume': float(row.get('volume', 0))
-                }
-                records.append(record)
-                
-            # Batch upsert might be better, but standard insert works.
+            times = pd.to_datetime(df_copy['start_time'])
+            if times.dt.tz is not None:
+                # Same naive-UTC form as the watermark (stored naive timestamps read back as UTC)
+                times = times.dt.tz_convert('UTC').dt.tz_localize(None)
+            watermark = self.get_candle_watermark(symbol, timeframe)
+            mask = (times >= watermark).to_numpy() if watermark is not None else slice(None)
+
+            records = pd.DataFrame({
+                'symbol': symbol,
+                'timestamp': times[mask].dt.strftime('%Y-%m-%dT%H:%M:%S').to_numpy(),
+                'timeframe': timeframe,
+                'open': df_copy['open'].to_numpy(dtype=float)[mask],
+                'high': df_copy['high'].to_numpy(dtype=float)[mask],
+                'low': df_copy['low'].to_numpy(dtype=float)[mask],
+                'close': df_copy['close'].to_numpy(dtype=float)[mask],
+                'volume': (df_copy['volume'].to_numpy(dtype=float)[mask] if 'volume' in df_copy.columns else 0.0),
+            })
+            sent_times = times[mask]
+
+            if records.empty:
+                print(f"✅ Market Data up to date for {symbol} ({timeframe}).")
+                return
+
+            print(f"💾 Saving {len(records)} of {len(df_copy)} candles for {symbol} to Supabase...")
+            
             # Upsert based on (symbol, timestamp, timeframe) unique constraint? Assumed set in DB.
-            self.supabase.table('market_candles').upsert(records, on_conflict='symbol, timeframe, timestamp').execute()
+            for start in range(0, len(records), chunk_size):
+                chunk = records.iloc[start:start + chunk_size].to_dict('records')
+                self.supabase.table('market_candles').upsert(chunk, on_conflict='symbol, timeframe, timestamp').execute()
+                chunk_max = sent_times.iloc[start:start + chunk_size].max()
+                if watermark is None or chunk_max > watermark:
+                    watermark = chunk_max
+                    self._candle_watermarks[(symbol, timeframe)] = watermark
             print("✅ Market Data Saved.")
             
         except Exception as e:
@@ -0,0 +1,99 @@
+import asyncio
+import logging
+import httpx
+from core.rate_limiter import DHAN_OPTION_CHAIN_LIMITER
+
+DHAN_BASE_URL = 'https://api.dhan.co/v2'
+
+class AsyncDhanClient:
+    """
+    Non-blocking Dhan v2 REST client for the asyncio runtime.
+    One pooled httpx.AsyncClient (keep-alive); responses use the same
+    {'status', 'remarks', 'data'} shape as dhanhq so callers can swap freely.
+    """
+    NSE_FNO = 'NSE_FNO'
+    INDEX = 'IDX_I'
+
+    def __init__(self, client_id, access_token, base_url=DHAN_BASE_URL, timeout=10.0, limiter=None,
+                 chain_limiter=DHAN_OPTION_CHAIN_LIMITER, max_connections=10):
+        self.client_id = str(client_id)
+        self.limiter = limiter # Optional TokenBucket shared with the sync callers
+        self.chain_limiter = chain_limiter # Option chain has its own (stricter) limit
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=timeout,
+            headers={
+                'access-token': access_token,
+                'client-id': self.client_id,
+                'Content-Type': 'application/json',
+                'Accept': 'application/json',
+            },
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    async def _acquire(self, limiter):
+        if limiter:
+            while not limiter.try_acquire():
+                await asyncio.sleep(1.0 / limiter.rate)
+
+    @staticmethod
+    def _parse_response(response):
+        try:
+            body = response.json()
+        except Exception as e:
+            return {'status': 'failure', 'remarks': str(e), 'data': ''}
+
+        if response.status_code == 200:
+            return {'status': 'success', 'remarks': '', 'data': body}
+        return {
+            'status': 'failure',
+            'remarks': {
+                'error_code': body.get('errorCode'),
+                'error_type': body.get('errorType'),
+                'error_message': body.get('errorMessage'),
+            } if isinstance(body, dict) else body,
+            'data': body,
+        }
+
+    async def _post(self, path, payload, limiter=None):
+        await self._acquire(limiter or self.limiter)
+        try:
+            response = await self.client.post(path, json=payload)
+            return self._parse_response(response)
+        except Exception as e:
+            logging.error(f"❌ Dhan {path} failed: {e}")
+            return {'status': 'failure', 'remarks': str(e), 'data': ''}
+
+    async def option_chain(self, under_security_id, under_exchange_segment, expiry):
+        return await self._post('/optionchain', {
+            'UnderlyingScrip': under_security_id,
+            'UnderlyingSeg': under_exchange_segment,
+            'Expiry': expiry,
+        }, limiter=self.chain_limiter)
+
+    async def expiry_list(self, under_security_id, under_exchange_segment):
+        return await self._post('/optionchain/expirylist', {
+            'UnderlyingScrip': under_security_id,
+            'UnderlyingSeg': under_exchange_segment,
+        })
+
+    async def intraday_minute_data(self, security_id, exchange_segment, instrument_type, from_date, to_date, interval=1):
+        if interval not in [1, 5, 15, 25, 60]:
+            return {'status': 'failure', 'remarks': "interval value must be ['1','5','15','25','60']", 'data': ''}
+        return await self._post('/charts/intraday', {
+            'securityId': security_id,
+            'exchangeSegment': exchange_segment,
+            'instrument': instrument_type,
+            'interval': interval,
+            'fromDate': from_date,
+            'toDate': to_date,
+        })
+
+    async def ticker_data(self, securities):
+        """
+        securities: {"NSE_FNO": [49081, 49082], ...}
+        """
+        return await self._post('/marketfeed/ltp', dict(securities))
+
+    async def close(self):
+        await self.client.aclose()
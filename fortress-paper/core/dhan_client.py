@@ -0,0 +1,128 @@
+import time
+import logging
+import threading
+from dhanhq import dhanhq
+from config import CLIENT_ID, ACCESS_TOKEN
+from core.metrics import StageMetrics
+
+class _Flight:
+    """
+    One upstream request; identical requests arriving meanwhile wait on it.
+    """
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+class DhanClient:
+    """
+    Shared sync Dhan REST layer for the analyzer and monitor (thread-safe).
+    Wraps one dhanhq instance, whose requests.Session keeps up to `pool_size`
+    keep-alive connections. Identical chart requests (security_id, interval,
+    date range) that are in flight are merged into one upstream call, and
+    successful responses are served from memory for `cache_ttl` seconds.
+    Only upstream calls take a rate limiter token.
+    Anything else (constants, order APIs) is passed through to dhanhq.
+    """
+    def __init__(self, dhan=None, limiter=None, cache_ttl=10.0, pool_size=10):
+        self.dhan = dhan or dhanhq(CLIENT_ID, ACCESS_TOKEN, pool={'pool_connections': 1, 'pool_maxsize': pool_size})
+        self.limiter = limiter
+        self.cache_ttl = cache_ttl
+        self.latency = StageMetrics('fortress_dhan_request_seconds', "Dhan REST latency per endpoint")
+        self.counts = {} # {endpoint: {'requests', 'upstream', 'merged', 'cached'}}
+
+        self._cache = {}    # {key: (expires_at, response)}
+        self._inflight = {} # {key: _Flight}
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        if name == 'dhan':
+            raise AttributeError(name) # Not set yet (__init__ failed)
+        return getattr(self.dhan, name)
+
+    def intraday_minute_data(self, security_id, exchange_segment, instrument_type, from_date, to_date, interval=1):
+        key = ('intraday', str(security_id), exchange_segment, instrument_type, interval, from_date, to_date)
+        return self._request('intraday', key, lambda: self.dhan.intraday_minute_data(
+            security_id=security_id,
+            exchange_segment=exchange_segment,
+            instrument_type=instrument_type,
+            from_date=from_date,
+            to_date=to_date,
+            interval=interval
+        ))
+
+    def historical_daily_data(self, security_id, exchange_segment, instrument_type, from_date, to_date, expiry_code=0):
+        key = ('historical', str(security_id), exchange_segment, instrument_type, expiry_code, from_date, to_date)
+        return self._request('historical', key, lambda: self.dhan.historical_daily_data(
+            security_id=security_id,
+            exchange_segment=exchange_segment,
+            instrument_type=instrument_type,
+            from_date=from_date,
+            to_date=to_date,
+            expiry_code=expiry_code
+        ))
+
+    def _request(self, endpoint, key, fn):
+        with self._lock:
+            counts = self.counts.setdefault(endpoint, {'requests': 0, 'upstream': 0, 'merged': 0, 'cached': 0})
+            counts['requests'] += 1
+            hit = self._cache.get(key)
+            if hit and hit[0] > time.monotonic():
+                counts['cached'] += 1
+                return hit[1]
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+                counts['upstream'] += 1
+            else:
+                counts['merged'] += 1
+
+        if not leader:
+            flight.done.wait()
+            return flight.result
+
+        res, elapsed = None, None
+        try:
+            if self.limiter:
+                self.limiter.acquire()
+            start = time.perf_counter()
+            res = fn()
+            elapsed = time.perf_counter() - start
+        except Exception as e:
+            logging.error(f"❌ Dhan {endpoint} failed: {e}")
+            res = {'status': 'failure', 'remarks': str(e), 'data': ''}
+        finally:
+            with self._lock: # Histograms take one writer at a time
+                del self._inflight[key]
+                if elapsed is not None:
+                    self.latency[endpoint].observe(elapsed)
+                if self.cache_ttl and isinstance(res, dict) and res.get('status') == 'success':
+                    self._cache[key] = (time.monotonic() + self.cache_ttl, res)
+                    self._evict()
+            flight.result = res
+            flight.done.set()
+        return res
+
+    def _evict(self):
+        """
+        Drops expired responses (caller holds the lock).
+        """
+        now = time.monotonic()
+        for key in [k for k, (expires, _) in self._cache.items() if expires <= now]:
+            del self._cache[key]
+
+    def report(self):
+        """
+        One line per endpoint: requests, share served without an upstream call, latency.
+        """
+        lines = []
+        with self._lock:
+            counts = {endpoint: dict(c) for endpoint, c in self.counts.items()}
+        for endpoint, c in sorted(counts.items()):
+            saved = c['merged'] + c['cached']
+            hist = self.latency[endpoint]
+            latency = (f"p50<{hist.quantile(0.5) * 1000:g}ms p99<{hist.quantile(0.99) * 1000:g}ms"
+                       if hist.count else "no upstream samples")
+            lines.append(f"{endpoint}: {c['requests']} requests, {c['upstream']} upstream, "
+                         f"{c['merged']} merged, {c['cached']} cached ({saved / c['requests']:.0%} saved), {latency}")
+        return "; ".join(lines) or "no requests"
@@ -0,0 +1,129 @@
+import logging
+import threading
+import numpy as np
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds (seconds): 1-2.5-5 steps from 1us to 5s
+DEFAULT_BOUNDS = tuple(m * 10.0 ** e for e in range(-6, 1) for m in (1, 2.5, 5))
+
+class LatencyHistogram:
+    """
+    Fixed-bucket histogram. observe() only appends to a list; samples are
+    bucketed in batches with NumPy (every `batch` samples, and on read).
+    Written from one thread; a sample racing a concurrent read may be lost.
+    """
+    def __init__(self, bounds=DEFAULT_BOUNDS, batch=4096):
+        self.bounds = np.asarray(bounds, dtype=float)
+        self.batch = batch
+        self._counts = np.zeros(len(self.bounds) + 1, dtype=np.int64) # Last bucket is +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        pending = self._pending
+        pending.append(seconds)
+        if len(pending) >= self.batch:
+            self.fold()
+
+    def fold(self):
+        """
+        Buckets pending samples; returns (counts, sum, count).
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+            if pending:
+                values = np.asarray(pending, dtype=float)
+                self._counts += np.bincount(np.searchsorted(self.bounds, values), minlength=len(self._counts))
+                self._sum += float(values.sum())
+                self._count += len(values)
+            return self._counts.copy(), self._sum, self._count
+
+    @property
+    def count(self):
+        return self._count + len(self._pending)
+
+    def quantile(self, q):
+        """
+        Upper bound of the bucket holding the q-th observation (None if empty).
+        """
+        counts, _, count = self.fold()
+        if not count:
+            return None
+        idx = int(np.searchsorted(np.cumsum(counts), q * count))
+        return float(self.bounds[idx]) if idx < len(self.bounds) else float('inf')
+
+class StageMetrics:
+    """
+    One latency histogram per pipeline stage, rendered as a single labelled
+    Prometheus histogram: <name>_bucket{stage="...",le="..."}.
+    """
+    def __init__(self, name='fortress_stage_latency_seconds', help_text="Latency per pipeline stage", bounds=DEFAULT_BOUNDS):
+        self.name = name
+        self.help_text = help_text
+        self.bounds = bounds
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, stage):
+        hist = self.stages.get(stage)
+        if hist is None:
+            with self._lock:
+                hist = self.stages.setdefault(stage, LatencyHistogram(self.bounds))
+        return hist
+
+    def render(self):
+        """
+        Prometheus text exposition format (0.0.4).
+        """
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for stage, hist in sorted(self.stages.items()):
+            counts, total, count = hist.fold()
+            cumulative = 0
+            for bound, n in zip(hist.bounds, counts):
+                cumulative += n
+                lines.append(f'{self.name}_bucket{{stage="{stage}",le="{bound:g}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{stage="{stage}",le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{stage="{stage}"}} {total:.9f}')
+            lines.append(f'{self.name}_count{{stage="{stage}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """
+        One line: stage=count p50/p99 (bucket upper bounds, ms).
+        """
+        parts = []
+        for stage, hist in sorted(self.stages.items()):
+            count = hist.fold()[2]
+            if count:
+                parts.append(f"{stage}={count} p50<{hist.quantile(0.5) * 1000:g}ms p99<{hist.quantile(0.99) * 1000:g}ms")
+        return ", ".join(parts) or "no samples"
+
+# Process-wide registry for main.py / VirtualBroker
+STAGES = StageMetrics()
+
+def start_metrics_server(port, host='127.0.0.1', registry=STAGES):
+    """
+    Serves GET /metrics on a daemon thread. Returns the server (server.shutdown() to stop).
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logging.info(f"📈 Metrics endpoint on http://{host}:{server.server_address[1]}/metrics")
+    return server
@@ -0,0 +1,161 @@
+import time
+import numpy as np
+
+SIDE_KEYS = {'CALL': 'ce', 'CE': 'ce', 'PUT': 'pe', 'PE': 'pe'}
+
+class OptionChainSnapshot:
+    """
+    One option chain poll for an underlying / expiry, stored as per-strike
+    NumPy arrays (sorted by strike). CE/PE: oi, chg_oi, ltp, iv, volume.
+    Missing legs are 0.
+    """
+    FIELDS = ('oi', 'chg_oi', 'ltp', 'iv', 'volume')
+
+    def __init__(self, underlying, expiry, spot, strikes, arrays, timestamp=None):
+        order = np.argsort(strikes)
+        self.underlying = underlying
+        self.expiry = expiry
+        self.spot = float(spot) if spot else None
+        self.timestamp = timestamp or time.time()
+        self.strikes = np.asarray(strikes, dtype=np.float64)[order]
+        for side in ('ce', 'pe'):
+            for field in self.FIELDS:
+                values = arrays.get(f"{side}_{field}")
+                values = np.zeros(len(order)) if values is None else np.asarray(values, dtype=np.float64)[order]
+                setattr(self, f"{side}_{field}", values)
+
+    def __len__(self):
+        return len(self.strikes)
+
+    @classmethod
+    def from_dhan(cls, underlying, expiry, response):
+        """
+        Dhan v2 /optionchain body: {'data': {'last_price', 'oc': {"25000.000000": {'ce': {...}, 'pe': {...}}}}}.
+        Accepts the dhanhq envelope ({'status', 'data': body}) as well.
+        """
+        payload = response
+        while isinstance(payload, dict) and 'oc' not in payload and isinstance(payload.get('data'), dict):
+            payload = payload['data']
+
+        oc = payload.get('oc') or {}
+        keys = list(oc)
+        n = len(keys)
+
+        def column(side, field):
+            return np.fromiter(((oc[k].get(side) or {}).get(field) or 0 for k in keys), dtype=np.float64, count=n)
+
+        arrays = {}
+        for side in ('ce', 'pe'):
+            oi = column(side, 'oi')
+            arrays[f"{side}_oi"] = oi
+            arrays[f"{side}_chg_oi"] = oi - column(side, 'previous_oi')
+            arrays[f"{side}_ltp"] = column(side, 'last_price')
+            arrays[f"{side}_iv"] = column(side, 'implied_volatility')
+            arrays[f"{side}_volume"] = column(side, 'volume')
+
+        strikes = np.fromiter((float(k) for k in keys), dtype=np.float64, count=n)
+        return cls(underlying, expiry, payload.get('last_price'), strikes, arrays)
+
+    @classmethod
+    def from_rows(cls, underlying, rows, spot=None, expiry=None):
+        """
+        List of dicts (strike_price, option_type CALL/PUT or CE/PE, oi, change_in_oi, ltp, iv, volume).
+        """
+        strikes = np.unique(np.array([float(r.get('strike_price') or 0) for r in rows], dtype=np.float64))
+        arrays = {f"{side}_{field}": np.zeros(len(strikes)) for side in ('ce', 'pe') for field in cls.FIELDS}
+        source = {'oi': 'oi', 'chg_oi': 'change_in_oi', 'ltp': 'ltp', 'iv': 'iv', 'volume': 'volume'}
+
+        for r in rows:
+            side = SIDE_KEYS.get(str(r.get('option_type')).upper())
+            if not side:
+                continue
+            i = np.searchsorted(strikes, float(r.get('strike_price') or 0))
+            for field, key in source.items():
+                arrays[f"{side}_{field}"][i] += r.get(key) or 0
+        return cls(underlying, expiry, spot, strikes, arrays)
+
+    def atm_index(self):
+        if not len(self.strikes):
+            return None
+        if self.spot is None:
+            return len(self.strikes) // 2
+        return int(np.abs(self.strikes - self.spot).argmin())
+
+    def max_pain(self):
+        """
+        Strike where option writers pay out least at expiry:
+        argmin_S sum(ce_oi * max(S - K, 0) + pe_oi * max(K - S, 0)).
+        """
+        if not len(self.strikes):
+            return None
+        diff = self.strikes[:, None] - self.strikes[None, :] # [settle, strike]
+        payout = np.maximum(diff, 0) @ self.ce_oi + np.maximum(-diff, 0) @ self.pe_oi
+        return float(self.strikes[payout.argmin()])
+
+    def metrics(self, atm_window=5):
+        """
+        PCR, ATM +/- `atm_window` strikes change in OI and max pain.
+        """
+        ce_total = self.ce_oi.sum()
+        pe_total = self.pe_oi.sum()
+        pcr = float(pe_total / ce_total) if ce_total else 1.0
+
+        atm = self.atm_index()
+        if atm is None:
+            atm_strike, atm_ce_chg, atm_pe_chg = None, 0.0, 0.0
+        else:
+            lo, hi = max(atm - atm_window, 0), atm + atm_window + 1
+            atm_strike = float(self.strikes[atm])
+            atm_ce_chg = float(self.ce_chg_oi[lo:hi].sum())
+            atm_pe_chg = float(self.pe_chg_oi[lo:hi].sum())
+
+        return {
+            'underlying': self.underlying,
+            'pcr': pcr,
+            'ce_oi': float(ce_total),
+            'pe_oi': float(pe_total),
+            'atm_strike': atm_strike,
+            'atm_ce_chg_oi': atm_ce_chg,
+            'atm_pe_chg_oi': atm_pe_chg,
+            'max_pain': self.max_pain(),
+        }
+
+    def diff(self, previous):
+        """
+        Per-strike changes since `previous` (strikes present in both) plus PCR drift.
+        """
+        strikes, i, j = np.intersect1d(self.strikes, previous.strikes, assume_unique=True, return_indices=True)
+        d_ce_oi = self.ce_oi[i] - previous.ce_oi[j]
+        d_pe_oi = self.pe_oi[i] - previous.pe_oi[j]
+        return {
+            'strikes': strikes,
+            'ce_oi': d_ce_oi,
+            'pe_oi': d_pe_oi,
+            'ce_ltp': self.ce_ltp[i] - previous.ce_ltp[j],
+            'pe_ltp': self.pe_ltp[i] - previous.pe_ltp[j],
+            'ce_oi_added': float(d_ce_oi.sum()),
+            'pe_oi_added': float(d_pe_oi.sum()),
+            'pcr_change': self.metrics()['pcr'] - previous.metrics()['pcr'],
+            'elapsed': self.timestamp - previous.timestamp,
+        }
+
+    def to_rows(self):
+        """
+        Rows for DataRecorder.log_option_chain.
+        """
+        rows = []
+        for side, option_type in (('ce', 'CE'), ('pe', 'PE')):
+            oi, chg, ltp, iv, vol = (getattr(self, f"{side}_{f}") for f in self.FIELDS)
+            for k in range(len(self.strikes)):
+                rows.append({
+                    'symbol': self.underlying,
+                    'expiry': self.expiry,
+                    'strike_price': float(self.strikes[k]),
+                    'option_type': option_type,
+                    'oi': float(oi[k]),
+                    'change_in_oi': float(chg[k]),
+                    'ltp': float(ltp[k]),
+                    'volume': float(vol[k]),
+                    'iv': float(iv[k]),
+                })
+        return rows
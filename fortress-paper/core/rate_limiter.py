@@ -0,0 +1,100 @@
+import threading
+import time
+import logging
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+    `rate` tokens are added per second up to `capacity` (burst size).
+    """
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def try_acquire(self, tokens=1):
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens=1):
+        """
+        Blocks until `tokens` are available. Returns seconds waited.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+# Dhan Data APIs (historical / intraday charts): 5 requests per second.
+# Shared by every caller in the process so concurrent fetches stay under the limit.
+# Capacity 1 spaces calls evenly (no burst), so any 1s window stays at the limit.
+DHAN_DATA_LIMITER = TokenBucket(rate=5, capacity=1)
+
+# Dhan Option Chain API: 1 request every 3 seconds.
+DHAN_OPTION_CHAIN_LIMITER = TokenBucket(rate=1 / 3, capacity=1)
+
+# Dhan error codes worth retrying: rate limit, internal server, network, other/unknown.
+# Input (DH-905) and no-data (DH-907) errors are permanent for the same request.
+TRANSIENT_DHAN_ERRORS = ('DH-904', 'DH-908', 'DH-909', 'DH-910')
+
+# Free-text remarks (dhanhq turns request exceptions and non-JSON bodies, e.g. a
+# 502 gateway page, into a failure with str(e)) that point at a transient problem
+TRANSIENT_MARKERS = ('rate limit', 'too many', 'timed out', 'timeout', 'connection',
+                     'temporarily', 'unavailable', 'bad gateway', 'expecting value')
+
+def is_transient(remarks):
+    """
+    True if a failed Dhan response looks like throttling / a server or network error.
+    """
+    if isinstance(remarks, dict):
+        if remarks.get('error_code') in TRANSIENT_DHAN_ERRORS:
+            return True
+        remarks = f"{remarks.get('error_type')} {remarks.get('error_message')}"
+    text = str(remarks).lower()
+    return any(marker in text for marker in TRANSIENT_MARKERS)
+
+def call_with_retry(fn, limiter=None, retries=3, backoff=0.5, label="request"):
+    """
+    Calls fn() under the limiter, retrying exceptions and transient Dhan failures
+    (see is_transient) with exponential backoff. Permanent failures (bad input,
+    no data for the window) are returned at once. Returns the last response (or None).
+    """
+    res = None
+    for attempt in range(retries + 1):
+        if limiter:
+            limiter.acquire()
+        try:
+            res = fn()
+            if not isinstance(res, dict) or res.get('status') == 'success':
+                return res
+            reason = res.get('remarks')
+            if not is_transient(reason):
+                logging.warning(f"⚠️ {label} failed ({reason}). Not retrying.")
+                return res
+        except Exception as e:
+            reason = e
+
+        if attempt < retries:
+            delay = backoff * (2 ** attempt)
+            logging.warning(f"⚠️ {label} failed ({reason}). Retry {attempt + 1}/{retries} in {delay:.1f}s")
+            time.sleep(delay)
+        else:
+            logging.error(f"❌ {label} failed after {retries + 1} attempts: {reason}")
+    return res
@@ -0,0 +1,198 @@
+import os
+import datetime
+import logging
+import pandas as pd
+from config import SCRIP_MASTER_CSV
+
+# Cached column -> substrings to find it in Dhan's Scrip Master (compact or detailed)
+SCRIP_COLUMNS = {
+    'security_id': ['SECURITY_ID'],
+    'trading_symbol': ['TRADING_SYMBOL'],
+    'custom_symbol': ['CUSTOM_SYMBOL'],
+    'instrument': ['INSTRUMENT_NAME'],
+    'underlying': ['SM_SYMBOL_NAME', 'UNDERLYING_SYMBOL'],
+    'expiry': ['EXPIRY_DATE'],
+    'strike': ['STRIKE_PRICE'],
+    'option_type': ['OPTION_TYPE'],
+    'lot_size': ['LOT_UNITS', 'LOT_SIZE'],
+}
+
+SCRIP_DTYPES = {
+    'security_id': 'int32',
+    'trading_symbol': 'string',
+    'custom_symbol': 'string',
+    'instrument': 'category',
+    'underlying': 'category',
+    'strike': 'float32',
+    'option_type': 'category',
+    'lot_size': 'float32',
+}
+
+FNO_INSTRUMENTS = {'FUTIDX', 'FUTSTK', 'OPTIDX', 'OPTSTK'}
+
+class ScripMaster:
+    """
+    NSE F&O Instrument Master.
+    Downloaded once per day, cached to SCRIP_MASTER_CSV with only the columns
+    we use (compact dtypes), with hash indexes by trading symbol and security_id.
+    """
+    def __init__(self, df):
+        self.df = df.reset_index(drop=True)
+
+        ids = self.df['security_id'].tolist()
+        self.by_id = dict(zip(ids, range(len(ids))))
+
+        # Custom symbols ("NIFTY 30 JAN 25500 CALL") first, Trading symbols win on clash
+        self.by_symbol = {}
+        for col in ('custom_symbol', 'trading_symbol'):
+            if col in self.df.columns:
+                keys = self.df[col].fillna('').str.upper().str.strip().tolist()
+                self.by_symbol.update((k, i) for i, k in enumerate(keys) if k)
+
+    def __len__(self):
+        return len(self.df)
+
+    @classmethod
+    def load(cls, dhan, path=SCRIP_MASTER_CSV, max_age_days=1):
+        """
+        Loads today's cache if present, otherwise downloads and rebuilds it.
+        """
+        if cls.is_fresh(path, max_age_days):
+            try:
+                master = cls(cls._read_cache(path))
+                logging.info(f"✅ Scrip Master Loaded from cache: {len(master)} F&O records")
+                return master
+            except Exception as e:
+                logging.warning(f"⚠️ Scrip Master cache unreadable ({e}). Re-downloading...")
+
+        logging.info("📥 Downloading Scrip Master (once per day)...")
+        tmp_path = f"{path}.download"
+        res = dhan.fetch_security_list(filename=tmp_path)
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+        if isinstance(res, pd.DataFrame):
+            raw = res
+        elif isinstance(res, dict) and 'data' in res:
+            raw = pd.DataFrame(res['data'])
+        else:
+            raise ValueError(f"Unexpected Scrip Master format: {type(res)}")
+
+        df = cls._compact(raw)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        df.to_csv(path, index=False)
+        logging.info(f"✅ Scrip Master Cached: {len(df)} F&O records (of {len(raw)}) -> {path}")
+        return cls(df)
+
+    @staticmethod
+    def is_fresh(path, max_age_days=1):
+        if not os.path.exists(path):
+            return False
+        modified = datetime.date.fromtimestamp(os.path.getmtime(path))
+        return (datetime.date.today() - modified).days < max_age_days
+
+    @staticmethod
+    def _compact(raw):
+        """
+        Keeps NSE F&O rows and the cached columns only.
+        """
+        raw = raw.rename(columns=lambda c: c.strip().upper())
+
+        df = pd.DataFrame(index=raw.index)
+        for name, needles in SCRIP_COLUMNS.items():
+            col = next((c for n in needles for c in raw.columns if n in c), None)
+            if col is not None:
+                df[name] = raw[col]
+
+        if 'security_id' not in df.columns or 'trading_symbol' not in df.columns:
+            raise ValueError("Scrip Master missing SECURITY_ID / TRADING_SYMBOL columns")
+
+        if 'instrument' in df.columns:
+            df['instrument'] = df['instrument'].astype(str).str.upper().str.strip()
+            df = df[df['instrument'].isin(FNO_INSTRUMENTS)]
+
+        exch_col = next((c for c in raw.columns if 'EXCH_ID' in c), None)
+        if exch_col:
+            df = df[raw.loc[df.index, exch_col].astype(str).str.upper().str.strip() == 'NSE']
+
+        return ScripMaster._apply_dtypes(df)
+
+    @staticmethod
+    def _read_cache(path):
+        header = pd.read_csv(path, nrows=0).columns
+        dtypes = {k: v for k, v in SCRIP_DTYPES.items() if k in header}
+        df = pd.read_csv(path, dtype=dtypes)
+        return ScripMaster._apply_dtypes(df)
+
+    @staticmethod
+    def _apply_dtypes(df):
+        df = df.copy()
+        df['security_id'] = pd.to_numeric(df['security_id'], errors='coerce')
+        df = df.dropna(subset=['security_id'])
+        for col, dtype in SCRIP_DTYPES.items():
+            if col in df.columns and str(df[col].dtype) != dtype:
+                if dtype.startswith('float'):
+                    df[col] = pd.to_numeric(df[col], errors='coerce')
+                df[col] = df[col].astype(dtype)
+        if 'expiry' in df.columns:
+            df['expiry'] = pd.to_datetime(df['expiry'], errors='coerce')
+        return df
+
+    def security_id(self, symbol):
+        """
+        O(1) lookup: Trading/Custom symbol -> security_id (str) or None.
+        """
+        i = self.by_symbol.get(symbol.upper().strip())
+        if i is None:
+            return None
+        return str(self.df['security_id'].iat[i])
+
+    def record(self, security_id):
+        """
+        O(1) lookup: security_id -> row dict or None.
+        """
+        try:
+            i = self.by_id.get(int(security_id))
+        except (TypeError, ValueError):
+            return None
+        if i is None:
+            return None
+        return self.df.iloc[i].to_dict()
+
+    def near_future(self, root, instrument='FUTIDX'):
+        """
+        Nearest unexpired future for an underlying root (e.g. NIFTY).
+        Returns (security_id, trading_symbol) or (None, None).
+        """
+        return self.near_futures([root], instrument).get(root.upper(), (None, None))
+
+    def near_futures(self, roots=None, instrument='FUTIDX'):
+        """
+        Nearest unexpired future per root in one pass over the master.
+        roots=None -> every root listed for `instrument` (e.g. all FUTSTK underlyings).
+        Returns {root: (security_id, trading_symbol)}.
+        """
+        df = self.df
+        symbols = df['trading_symbol'].str.upper()
+        mask = symbols.str.contains('-', regex=False)
+        if 'instrument' in df.columns:
+            mask &= df['instrument'] == instrument
+        mask = mask.fillna(False)
+        futures = pd.DataFrame({
+            'root': symbols[mask].str.split('-', n=1).str[0],
+            'symbol': symbols[mask],
+            'security_id': df['security_id'][mask],
+        })
+        if roots is not None:
+            futures = futures[futures['root'].isin([r.upper() for r in roots])]
+
+        if 'expiry' in df.columns:
+            futures['expiry'] = df['expiry'][mask]
+            today = pd.Timestamp.now().normalize()
+            futures = futures[futures['expiry'] >= today].sort_values(by='expiry', kind='stable')
+
+        nearest = futures.drop_duplicates(subset='root', keep='first')
+        return {root: (str(sid), str(sym)) for root, sid, sym in
+                zip(nearest['root'], nearest['security_id'], nearest['symbol'])}
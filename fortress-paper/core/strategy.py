@@ -1,9 +1,32 @@
 import pandas as pd
+from core.zone_index import ZoneIndex
+from core.option_chain import OptionChainSnapshot
+
+# Credit spread width (points between short and hedge strikes)
+SPREAD_WIDTH = 200
+BANKNIFTY_SPREAD_WIDTH = 500
 
 class FortressStrategy:
     def __init__(self, zones_file):
-        self.zones = self._load_zones(zones_file)
+        self.zone_index = ZoneIndex(self._load_zones(zones_file))
         self.market_sentiment_flag = "NEUTRAL" # BULLISH, BEARISH, NEUTRAL
+        self.sentiment = {} # {underlying: flag}, overrides market_sentiment_flag
+        self.chain_snapshots = {} # {underlying: last OptionChainSnapshot}
+
+    @property
+    def zones(self):
+        return self.zone_index.zones()
+
+    @zones.setter
+    def zones(self, zones):
+        # Full replacement rebuilds the index. Use add_zone/retire_zone for deltas.
+        self.zone_index = ZoneIndex(zones)
+
+    def add_zone(self, zone):
+        self.zone_index.add(zone)
+
+    def retire_zone(self, zone_id):
+        return self.zone_index.remove(zone_id)
         
     def _load_zones(self, zones_file):
         if not zones_file:
@@ -17,39 +40,64 @@ class FortressStrategy:
             print(f"❌ Error loading zones: {e}")
             return []
 
-    def update_market_sentiment(self, option_chain_data):
+    def update_market_sentiment(self, option_chain_data, underlying=None):
         """
         Slow Loop: Analyzes Option Chain to set Sentiment.
+        option_chain_data: OptionChainSnapshot, or a list of dicts (oi, option_type CALL/PUT, strike_price).
+        Returns the snapshot metrics (PCR, ATM change in OI, max pain).
         """
         # Logic: 
         # Calculate PCR (Put OI / Call OI)
         # Check Change in OI for ATM + 5 strikes
         
         try:
-            total_ce_oi = sum(item['oi'] for item in option_chain_data if item['option_type'] == 'CALL')
-            total_pe_oi = sum(item['oi'] for item in option_chain_data if item['option_type'] == 'PUT')
-            
-            if total_ce_oi == 0: 
-                pcr = 1.0 
+            if isinstance(option_chain_data, OptionChainSnapshot):
+                snapshot = option_chain_data
             else:
-                pcr = total_pe_oi / total_ce_oi
+                snapshot = OptionChainSnapshot.from_rows(underlying, option_chain_data)
+            underlying = snapshot.underlying
+
+            metrics = snapshot.metrics(atm_window=5)
+            pcr = metrics['pcr']
                 
             # PCR Interpretation
             # > 1.0 => Bullish (More Puts written)
             # < 0.7 => Bearish (More Calls written)
             
             if pcr > 1.2:
-                self.market_sentiment_flag = "BULLISH"
+                flag = "BULLISH"
             elif pcr < 0.7:
-                self.market_sentiment_flag = "BEARISH"
+                flag = "BEARISH"
+            else:
+                flag = "NEUTRAL"
+
+            drift = ""
+            previous = self.chain_snapshots.get(underlying)
+            if previous is not None:
+                metrics['change'] = snapshot.diff(previous)
+                drift = f" ({metrics['change']['pcr_change']:+.2f})"
+
+            if underlying is None:
+                self.market_sentiment_flag = flag
             else:
-                self.market_sentiment_flag = "NEUTRAL"
+                self.sentiment[underlying] = flag
+                self.chain_snapshots[underlying] = snapshot
+            metrics['sentiment'] = flag
                 
-            print(f"🧠 Strategy Update: PCR={pcr:.2f}, Sentiment={self.market_sentiment_flag}")
+            print(f"🧠 Strategy Update [{underlying or 'MARKET'}]: PCR={pcr:.2f}{drift}, "
+                  f"MaxPain={metrics['max_pain']}, ATM dOI CE={metrics['atm_ce_chg_oi']:+.0f} "
+                  f"PE={metrics['atm_pe_chg_oi']:+.0f}, Sentiment={flag}")
+            return metrics
             
         except Exception as e:
             print(f"❌ Strategy Error: {e}")
 
+    def sentiment_for(self, symbol):
+        """
+        OI sentiment for a zone symbol's underlying (e.g. 'BANKNIFTY-FUT' -> BANKNIFTY).
+        """
+        return self.sentiment.get(symbol.split('-')[0], self.market_sentiment_flag)
+
     def get_atm_strike(self, price, symbol):
         """
         Returns ATM strike.
@@ -75,47 +123,39 @@ class FortressStrategy:
         # Underlying Root
         underlying_root = symbol.split('-')[0] # NIFTY / BANKNIFTY
         
-        for zone in self.zones:
-            if zone['symbol'] != symbol:
-                continue
-                
-            # Logic: Sweep & Reject (The Trap)
-            
-            # 1. Bearish Trap (Supply Zone / PDH)
-            if zone['type'] == 'SUPPLY':
-                level = zone['range_high'] # Key Defense Level
-                # range_low = zone['range_low']
-                
-                # Condition: Price swept ABOVE Level, but Closed BELOW Level (or inside zone)
-                # Strict Sweep: High > Level AND Close < Level
-                if high > level and close < level:
-                     # Check OI Confirmation
-                     if oi_sentiment == "BEARISH":
-                         atm = self.get_atm_strike(close, symbol)
-                         return {
-                             "action": "SELL_CALL_SPREAD",
-                             "atm_strike": atm,
-                             "underlying": underlying_root,
-                             "zone_id": zone['id'],
-                             "reason": "Bearish Sweep + OI Confirmed"
-                         }
+        # Only zones whose Defense Level lies inside the candle range can be swept.
+        # First zone (insertion order) wins, same as a linear scan.
+        
+        # 1. Bearish Trap (Supply Zone / PDH)
+        # Condition: Price swept ABOVE Level, but Closed BELOW Level (or inside zone)
+        # Strict Sweep: High > Level AND Close < Level, plus OI Confirmation
+        if oi_sentiment == "BEARISH":
+            candidates = self.zone_index.between(symbol, 'SUPPLY', close, high)
+            if candidates:
+                _, zone = min(candidates, key=lambda c: c[0])
+                atm = self.get_atm_strike(close, symbol)
+                return {
+                    "action": "SELL_CALL_SPREAD",
+                    "atm_strike": atm,
+                    "underlying": underlying_root,
+                    "zone_id": zone['id'],
+                    "reason": "Bearish Sweep + OI Confirmed"
+                }
 
-            # 2. Bullish Trap (Demand Zone / PDL)
-            elif zone['type'] == 'DEMAND':
-                level = zone['range_low'] # Key Defense Level
-                
-                # Condition: Price swept BELOW Level, but Closed ABOVE Level
-                if low < level and close > level:
-                     # Check OI Confirmation
-                     if oi_sentiment == "BULLISH":
-                         atm = self.get_atm_strike(close, symbol)
-                         return {
-                             "action": "BUY_PUT_SPREAD",
-                             "atm_strike": atm,
-                             "underlying": underlying_root,
-                             "zone_id": zone['id'],
-                             "reason": "Bullish Sweep + OI Confirmed"
-                         }
+        # 2. Bullish Trap (Demand Zone / PDL)
+        # Condition: Price swept BELOW Level, but Closed ABOVE Level, plus OI Confirmation
+        elif oi_sentiment == "BULLISH":
+            candidates = self.zone_index.between(symbol, 'DEMAND', low, close)
+            if candidates:
+                _, zone = min(candidates, key=lambda c: c[0])
+                atm = self.get_atm_strike(close, symbol)
+                return {
+                    "action": "BUY_PUT_SPREAD",
+                    "atm_strike": atm,
+                    "underlying": underlying_root,
+                    "zone_id": zone['id'],
+                    "reason": "Bullish Sweep + OI Confirmed"
+                }
                                  
         return None
 
@@ -127,13 +167,11 @@ class FortressStrategy:
         if not dynamic_zones:
             return
             
-        current_ids = {z['id'] for z in self.zones}
         count = 0
         
         for zone in dynamic_zones:
-            if zone['id'] not in current_ids:
-                self.zones.append(zone)
-                current_ids.add(zone['id'])
+            if zone['id'] not in self.zone_index:
+                self.zone_index.add(zone)
                 count += 1
                 
         if count > 0:
@@ -0,0 +1,125 @@
+import os
+import time
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from core.backtest import Backtester, SymbolBars, DEFAULT_PARAMS
+
+# Only applied after pricing, so combinations differing just in these share one priced backtest
+RISK_PARAMS = ('daily_target', 'daily_sl')
+
+def param_grid(**axes):
+    """
+    param_grid(zone_buffer=[5, 10], daily_sl=[-500, -750]) -> list of dicts (cartesian product).
+    """
+    keys = list(axes)
+    return [dict(zip(keys, values)) for values in itertools.product(*(axes[k] for k in keys))]
+
+class SharedBars:
+    """
+    The 1m arrays of every symbol in one shared memory block, written once by the
+    parent. Workers attach by name and read them in place (nothing is pickled per task).
+    Layout: int64 ts[N] then float64 open/high/low/close [4, N], symbols as contiguous slices.
+    """
+    def __init__(self, bars):
+        self.n = sum(len(b.ts) for b in bars)
+        self.shm = shared_memory.SharedMemory(create=True, size=max(self.n * 8 * 5, 1))
+        ts, ohlc = self._views(self.shm, self.n)
+
+        self.layout = []
+        start = 0
+        for b in bars:
+            end = start + len(b.ts)
+            ts[start:end] = b.ts
+            for row, values in enumerate(b.m1):
+                ohlc[row, start:end] = values
+            self.layout.append((b.symbol, start, end))
+            start = end
+
+    @staticmethod
+    def _views(shm, n):
+        ts = np.ndarray((n,), dtype=np.int64, buffer=shm.buf)
+        ohlc = np.ndarray((4, n), dtype=np.float64, buffer=shm.buf, offset=n * 8)
+        return ts, ohlc
+
+    def spec(self):
+        return (self.shm.name, self.n, self.layout)
+
+    @classmethod
+    def attach(cls, spec):
+        """
+        Returns (shm, [SymbolBars]) viewing the shared block (keep shm referenced).
+        """
+        name, n, layout = spec
+        shm = shared_memory.SharedMemory(name=name)
+        ts, ohlc = cls._views(shm, n)
+        bars = [SymbolBars(symbol, ts[a:b], *(ohlc[row, a:b] for row in range(4))) for symbol, a, b in layout]
+        return shm, bars
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+_WORKER = {}
+
+def _init_worker(spec):
+    _WORKER['shm'], _WORKER['bars'] = SharedBars.attach(spec)
+
+def _run_group(base, risk_grid):
+    """
+    One priced backtest for `base`, evaluated under every risk setting in `risk_grid`.
+    """
+    bt = Backtester(_WORKER['bars'], params=base)
+    rows = []
+    for risk in risk_grid:
+        summary = bt.run(details=False, **risk).summary()
+        rows.append({**base, **risk, **summary})
+    return rows
+
+def run_sweep(bars, grid, workers=None, rank_by='net_pnl', verbose=True):
+    """
+    Evaluates every parameter dict in `grid` (see param_grid) over `bars`
+    (list of SymbolBars) on a process pool. Returns a DataFrame ranked by `rank_by`.
+    """
+    workers = workers or os.cpu_count() or 1
+    groups = {}
+    for combo in grid:
+        params = dict(DEFAULT_PARAMS, **combo)
+        base = {k: v for k, v in params.items() if k not in RISK_PARAMS}
+        risk = {k: params[k] for k in RISK_PARAMS}
+        groups.setdefault(tuple(sorted(base.items())), (base, []))[1].append(risk)
+
+    if verbose:
+        print(f"🧪 Sweep: {len(grid)} combinations ({len(groups)} priced backtests) on {workers} workers")
+
+    start = time.time()
+    rows = []
+    with SharedBars(bars) as shared:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(shared.spec(),)) as pool:
+            futures = [pool.submit(_run_group, base, risks) for base, risks in groups.values()]
+            for done, future in enumerate(as_completed(futures), start=1):
+                rows.extend(future.result())
+                if verbose and done % max(len(futures) // 10, 1) == 0:
+                    print(f"   {done}/{len(futures)} groups ({time.time() - start:.0f}s)")
+
+    table = pd.DataFrame(rows).sort_values(rank_by, ascending=False, ignore_index=True)
+    table.insert(0, 'rank', np.arange(1, len(table) + 1))
+    if verbose:
+        print(f"✅ Sweep finished in {time.time() - start:.1f}s")
+    return table
+
+def bars_from_store(symbols, store=None, since=None):
+    """
+    SymbolBars from the local candle store. symbols: {symbol: security_id}.
+    """
+    from core.candle_store import CandleStore
+    store = store or CandleStore()
+    return [SymbolBars.from_frame(symbol, store.load(sec_id, '1m', since=since)) for symbol, sec_id in symbols.items()]
@@ -1,24 +1,184 @@
-import requests
+import time
+import queue
+import atexit
 import logging
+import threading
+import requests
 from config import TELEGRAM_TOKEN, TELEGRAM_CHAT_ID
+from core.rate_limiter import TokenBucket
+
+TELEGRAM_API = "https://api.telegram.org"
+MAX_MESSAGE_LEN = 4096 # Telegram sendMessage text limit
+
+class TelegramNotifier:
+    """
+    Non-blocking Telegram sender. send() only queues the message; a background
+    thread posts it on a pooled keep-alive session. Messages queued within
+    `merge_window` seconds of each other go out as one message, posts are spaced
+    by a token bucket (Telegram: ~1 message/s per chat), and failures are retried
+    (429 waits the `retry_after` Telegram asks for).
+    """
+    def __init__(self, token, chat_id, base_url=TELEGRAM_API, rate=1.0, burst=1, merge_window=0.5,
+                 retries=3, backoff=1.0, timeout=10, max_queue=1000):
+        self.url = f"{base_url}/bot{token}/sendMessage"
+        self.chat_id = chat_id
+        self.merge_window = merge_window
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.limiter = TokenBucket(rate=rate, capacity=burst)
+        self.session = requests.Session() # One keep-alive connection, reused by every post
+
+        self.queued = 0
+        self.sent = 0    # Telegram messages posted (after merging)
+        self.failed = 0  # Telegram messages given up on
+        self.dropped = 0 # Alerts rejected because the queue was full
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._sender = threading.Thread(target=self._sender_loop, name="TelegramSender", daemon=True)
+        self._sender.start()
+
+    def send(self, message):
+        """
+        Queues a message (never blocks). Returns False if it was dropped.
+        """
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.queued += 1
+        return True
+
+    def flush(self, timeout=None):
+        """
+        Blocks until every queued message was posted (or given up on). Returns False on timeout.
+        """
+        q = self._queue
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with q.all_tasks_done:
+            while q.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                q.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout=10.0):
+        """
+        Delivers what is queued (up to `timeout` seconds), then stops the sender.
+        """
+        delivered = self.flush(timeout)
+        self._stop.set()
+        self._sender.join(timeout=1.0)
+        self.session.close()
+        if not delivered:
+            logging.warning(f"⚠️ Telegram: {self._queue.qsize()} alerts not delivered at shutdown")
+        return delivered
+
+    def _sender_loop(self):
+        while not self._stop.is_set():
+            try:
+                first = self._queue.get(timeout=0.2)
+            except queue.Empty:
+                continue
+
+            # Burst: everything that arrives within the merge window
+            batch = [first]
+            deadline = time.monotonic() + self.merge_window
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                for text in self._merge(batch):
+                    self.limiter.acquire()
+                    if self._post(text):
+                        self.sent += 1
+                    else:
+                        self.failed += 1
+            except Exception as e:
+                logging.error(f"❌ Telegram sender error: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    @staticmethod
+    def _merge(messages):
+        """
+        Joins messages into as few texts as fit the Telegram size limit.
+        """
+        texts, current = [], ""
+        for msg in messages:
+            msg = msg[:MAX_MESSAGE_LEN]
+            if current and len(current) + 2 + len(msg) > MAX_MESSAGE_LEN:
+                texts.append(current)
+                current = ""
+            current = f"{current}\n\n{msg}" if current else msg
+        if current:
+            texts.append(current)
+        return texts
+
+    def _post(self, text):
+        payload = {"chat_id": self.chat_id, "text": text, "parse_mode": "Markdown"}
+        for attempt in range(self.retries + 1):
+            delay = self.backoff * (2 ** attempt)
+            try:
+                res = self.session.post(self.url, json=payload, timeout=self.timeout)
+                if res.ok:
+                    logging.info("📢 Telegram Alert Sent successfully.")
+                    return True
+                if res.status_code == 429:
+                    reason = "rate limited"
+                    delay = res.json().get('parameters', {}).get('retry_after', delay)
+                elif res.status_code == 400 and 'parse_mode' in payload:
+                    # Markdown the API can't parse: send the text as is
+                    reason = "unparseable Markdown"
+                    payload.pop('parse_mode')
+                    delay = 0
+                elif res.status_code < 500:
+                    logging.error(f"❌ Failed to send Telegram alert: HTTP {res.status_code} {res.text[:200]}")
+                    return False
+                else:
+                    reason = f"HTTP {res.status_code}"
+            except Exception as e:
+                reason = e
+
+            if attempt < self.retries:
+                logging.warning(f"⚠️ Telegram alert failed ({reason}). Retry {attempt + 1}/{self.retries} in {delay:.1f}s")
+                time.sleep(delay)
+            else:
+                logging.error(f"❌ Failed to send Telegram alert after {self.retries + 1} attempts: {reason}")
+        return False
+
+_notifier = None
+_notifier_lock = threading.Lock()
+
+def get_notifier():
+    """
+    Process-wide notifier for the configured chat (None without credentials).
+    Queued alerts are flushed at interpreter exit.
+    """
+    global _notifier
+    if _notifier is None and TELEGRAM_TOKEN and TELEGRAM_CHAT_ID:
+        with _notifier_lock:
+            if _notifier is None:
+                _notifier = TelegramNotifier(TELEGRAM_TOKEN, TELEGRAM_CHAT_ID)
+                atexit.register(_notifier.close)
+    return _notifier
 
 def send_telegram_alert(message):
     """
-    Sends a message to the configured Telegram Chat.
+    Queues a message for the configured Telegram Chat (returns immediately).
     """
-    if not TELEGRAM_TOKEN or not TELEGRAM_CHAT_ID:
+    notifier = get_notifier()
+    if notifier is None:
         logging.warning("⚠️ Telegram credentials missing. Skipping alert.")
         return
-
-    try:
-        url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
-        payload = {
-            "chat_id": TELEGRAM_CHAT_ID,
-            "text": message,
-            "parse_mode": "Markdown"
-        }
-        res = requests.post(url, json=payload, timeout=10)
-        res.raise_for_status()
-        logging.info("📢 Telegram Alert Sent successfully.")
-    except Exception as e:
-        logging.error(f"❌ Failed to send Telegram alert: {e}")
+    notifier.send(message)
@@ -0,0 +1,141 @@
+import os
+import json
+import time
+import datetime
+import numpy as np
+from config import DATA_DIR
+
+TICK_ARCHIVE_DIR = os.path.join(DATA_DIR, "ticks")
+
+# One record per tick. ts: receive time (epoch ns). Fields a packet lacks are NaN
+# (ticker: no oi, OI packet: no ltp); volume is the day's cumulative volume.
+TICK_DTYPE = np.dtype([('ts', '<i8'), ('ltp', '<f8'), ('volume', '<i8'), ('oi', '<f8')])
+
+class TickArchive:
+    """
+    Append-only columnar tick archive:
+        <root>/<YYYY-MM-DD>/<security_id>.bin   raw TICK_DTYPE records, in arrival order
+        <root>/<YYYY-MM-DD>/index.json         dtype + per instrument symbol/count/first/last ts
+    A data file is a headerless NumPy array, so readers memory-map it (zero copy).
+    Written from one thread (DataRecorder's writer); any number of readers.
+    """
+    def __init__(self, root=None):
+        self.root = root or TICK_ARCHIVE_DIR # Looked up at call time, so tools can redirect it
+        self._files = {}   # {(day, security_id): open append handle}, current day only
+        self._indexes = {} # {day: index dict}, days with open handles
+        self._dirty = set()
+
+    # --- Writer ---
+
+    def append(self, security_id, symbol, records):
+        """
+        Appends TICK_DTYPE records for one instrument (split by local day if needed).
+        """
+        if not len(records):
+            return
+        security_id = str(security_id)
+        gmtoff = time.localtime(int(records['ts'][0]) // 10**9).tm_gmtoff
+        days = (records['ts'] // 10**9 + gmtoff) // 86400
+        if days[0] == days[-1]:
+            self._append_day(self._day_name(days[0]), security_id, symbol, records)
+            return
+        for day in np.unique(days):
+            self._append_day(self._day_name(day), security_id, symbol, records[days == day])
+
+    @staticmethod
+    def _day_name(day_number):
+        return (datetime.date(1970, 1, 1) + datetime.timedelta(days=int(day_number))).isoformat()
+
+    def _append_day(self, day, security_id, symbol, records):
+        handle = self._files.get((day, security_id))
+        if handle is None:
+            if day not in self._indexes:
+                self._close_before(day)
+            os.makedirs(os.path.join(self.root, day), exist_ok=True)
+            handle = self._files[(day, security_id)] = open(self._data_path(day, security_id), 'ab')
+            torn = handle.tell() % TICK_DTYPE.itemsize
+            if torn: # Partial record from a crash: drop it so later appends stay aligned
+                handle.truncate(handle.tell() - torn)
+        handle.write(records.tobytes())
+
+        index = self._indexes.get(day)
+        if index is None:
+            index = self._indexes[day] = self.index(day)
+        entry = index['instruments'].setdefault(security_id, {'symbol': symbol, 'count': 0, 'first_ts': int(records['ts'][0])})
+        if symbol and symbol != security_id: # Recorder falls back to the id for unmapped ticks
+            entry['symbol'] = symbol
+        entry['count'] += len(records)
+        entry['last_ts'] = int(records['ts'][-1])
+        self._dirty.add(day)
+
+    def _close_before(self, day):
+        """
+        A new day started: saves and closes everything of earlier days, so a
+        long-running writer keeps one day's handles open (late ticks reopen them).
+        """
+        old_days = [d for d in self._indexes if d < day]
+        if not old_days:
+            return
+        self.flush()
+        for key in [k for k in self._files if k[0] in old_days]:
+            self._files.pop(key).close()
+        for d in old_days:
+            del self._indexes[d]
+
+    def flush(self):
+        """
+        Makes appended ticks visible to readers and saves the changed indexes.
+        """
+        for handle in self._files.values():
+            handle.flush()
+        for day in self._dirty:
+            path = os.path.join(self.root, day, "index.json")
+            tmp = f"{path}.tmp"
+            with open(tmp, 'w') as f:
+                json.dump(self._indexes[day], f)
+            os.replace(tmp, path)
+        self._dirty.clear()
+
+    def close(self):
+        self.flush()
+        for handle in self._files.values():
+            handle.close()
+        self._files.clear()
+
+    # --- Readers ---
+
+    def _data_path(self, day, security_id):
+        return os.path.join(self.root, str(day), f"{security_id}.bin")
+
+    def days(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(d for d in os.listdir(self.root) if os.path.exists(os.path.join(self.root, d, "index.json")))
+
+    def index(self, day):
+        """
+        {'dtype': ..., 'instruments': {security_id: {'symbol', 'count', 'first_ts', 'last_ts'}}}.
+        Counts can trail the data files after a crash; read() goes by file size.
+        """
+        path = os.path.join(self.root, str(day), "index.json")
+        if os.path.exists(path):
+            with open(path) as f:
+                return json.load(f)
+        return {'dtype': TICK_DTYPE.descr, 'instruments': {}}
+
+    def read(self, security_id, day):
+        """
+        Memory-mapped, read-only TICK_DTYPE array of one instrument's ticks for `day`.
+        """
+        path = self._data_path(day, security_id)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        count = size // TICK_DTYPE.itemsize # A torn trailing record is ignored
+        if not count:
+            return np.empty(0, dtype=TICK_DTYPE)
+        return np.memmap(path, dtype=TICK_DTYPE, mode='r', shape=(count,))
+
+    def read_day(self, day):
+        """
+        {security_id: memmap} for every instrument archived on `day`.
+        """
+        return {sid: self.read(sid, day) for sid in self.index(day)['instruments']}
@@ -0,0 +1,82 @@
+import collections
+import threading
+
+class CoalescingTickQueue:
+    """
+    Bounded handoff between the feed thread and a consumer.
+    Holds at most one pending item per key (e.g. instrument): if the consumer
+    lags, a newer tick replaces the pending one in place (coalesced) instead of
+    queueing behind it. put() never blocks; beyond `maxsize` keys new items are dropped,
+    except `keep=True` items, which evict the oldest droppable entry instead.
+    """
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self._pending = collections.OrderedDict() # {key: item}, oldest first
+        self._kept = set() # Pending keys that must not be dropped or evicted
+        self._cond = threading.Condition(threading.Lock())
+
+        # Counters
+        self.received = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.consumed = 0
+        self.max_depth = 0
+
+    def put(self, key, item, keep=False):
+        """
+        Non-blocking. Returns False if the item was dropped (queue full).
+        keep=True items are always admitted: the oldest droppable entry is evicted
+        (counted as dropped), or the queue briefly exceeds maxsize if there is none.
+        """
+        with self._cond:
+            self.received += 1
+            if key in self._pending:
+                self._pending[key] = item # Keeps its place in line
+                self.coalesced += 1
+                if keep:
+                    self._kept.add(key)
+                return True
+
+            if len(self._pending) >= self.maxsize:
+                if not keep:
+                    self.dropped += 1
+                    return False
+                victim = next((k for k in self._pending if k not in self._kept), None)
+                if victim is not None:
+                    del self._pending[victim]
+                    self.dropped += 1
+
+            self._pending[key] = item
+            if keep:
+                self._kept.add(key)
+            depth = len(self._pending)
+            if depth > self.max_depth:
+                self.max_depth = depth
+            self._cond.notify()
+            return True
+
+    def get(self, timeout=None):
+        """
+        Returns (key, item) for the oldest pending key, or None on timeout.
+        """
+        with self._cond:
+            if not self._pending and not self._cond.wait_for(lambda: self._pending, timeout=timeout):
+                return None
+            self.consumed += 1
+            key, item = self._pending.popitem(last=False)
+            self._kept.discard(key)
+            return key, item
+
+    def __len__(self):
+        return len(self._pending)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'depth': len(self._pending),
+                'max_depth': self.max_depth,
+                'received': self.received,
+                'coalesced': self.coalesced,
+                'dropped': self.dropped,
+                'consumed': self.consumed,
+            }
@@ -0,0 +1,129 @@
+import os
+import io
+import csv
+import json
+import time
+import zlib
+import datetime
+
+LEDGER_HEADER = ["timestamp", "symbol", "side", "qty", "price", "tag", "pnl"]
+
+# always:   flush + fsync every row (durable, slowest)
+# interval: flush every row to the OS, fsync at most every `fsync_interval` seconds
+# none:     keep rows in the file buffer until flush()/snapshot()/close()
+FSYNC_POLICIES = ('always', 'interval', 'none')
+
+# Bytes before the snapshot offset that must still match (detects a replaced/truncated ledger)
+FINGERPRINT_BYTES = 256
+
+class TradeJournal:
+    """
+    Append-only CSV trade ledger.
+    Keeps one buffered handle open, and periodically snapshots broker state with
+    the ledger offset it covers, so startup replays only the rows after it.
+    """
+    def __init__(self, path, fsync='interval', fsync_interval=1.0, snapshot_every=200, snapshot_path=None):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}")
+
+        self.path = path
+        self.snapshot_path = snapshot_path or f"{path}.snapshot.json"
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.snapshot_every = snapshot_every
+
+        self.rows_since_snapshot = 0
+        self._last_fsync = time.monotonic()
+
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._fh = open(path, "a", newline='', buffering=64 * 1024)
+        self._writer = csv.writer(self._fh)
+        if new_file:
+            self._writer.writerow(LEDGER_HEADER)
+            self._fh.flush()
+
+    def append(self, row):
+        self._writer.writerow(row)
+        self.rows_since_snapshot += 1
+
+        if self.fsync == 'always':
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+        elif self.fsync == 'interval':
+            self._fh.flush()
+            now = time.monotonic()
+            if now - self._last_fsync >= self.fsync_interval:
+                os.fsync(self._fh.fileno())
+                self._last_fsync = now
+
+    def flush(self, sync=True):
+        self._fh.flush()
+        if sync:
+            os.fsync(self._fh.fileno())
+            self._last_fsync = time.monotonic()
+
+    def snapshot_due(self):
+        return self.rows_since_snapshot >= self.snapshot_every
+
+    def _fingerprint(self, offset):
+        start = max(offset - FINGERPRINT_BYTES, 0)
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            return zlib.crc32(f.read(offset - start))
+
+    def snapshot(self, state):
+        """
+        Persists `state` (JSON-serializable) as of the current end of the ledger.
+        Written to a temp file and renamed, so a crash never leaves a torn snapshot.
+        """
+        self.flush(sync=True)
+        offset = os.path.getsize(self.path)
+        payload = {
+            'offset': offset,
+            'fingerprint': self._fingerprint(offset),
+            'created_at': datetime.datetime.now().isoformat(),
+            'state': state,
+        }
+
+        tmp_path = f"{self.snapshot_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(payload, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        self.rows_since_snapshot = 0
+
+    def load(self):
+        """
+        Returns (state, tail_rows): the latest valid snapshot state (or None)
+        and the ledger rows (dicts) written after it.
+        """
+        self._fh.flush()
+        size = os.path.getsize(self.path)
+
+        state, offset = None, 0
+        try:
+            with open(self.snapshot_path) as f:
+                snap = json.load(f)
+            if snap['offset'] <= size and snap['fingerprint'] == self._fingerprint(snap['offset']):
+                state, offset = snap['state'], snap['offset']
+            else:
+                print("⚠️ Ledger changed since snapshot. Full replay.")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable snapshot: {e}")
+
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            tail = f.read().decode('utf-8')
+
+        reader = csv.reader(io.StringIO(tail))
+        rows = [dict(zip(LEDGER_HEADER, r)) for r in reader if r and r != LEDGER_HEADER]
+        self.rows_since_snapshot = len(rows)
+        return state, rows
+
+    def close(self):
+        if not self._fh.closed:
+            self.flush(sync=True)
+            self._fh.close()
@@ -1,144 +1,189 @@
-import pandas as pd
+import time
 import datetime
-import os
-import csv
 from config import TRADE_LOG_FILE, CAPITAL
+from core.trade_journal import TradeJournal
+from core.metrics import STAGES
+
+# Daily risk limits on total P&L (swept by core/sweep.py)
+DAILY_TARGET = 1000.0
+DAILY_SL = -750.0
+
+# Stage latency histograms (core/metrics.py)
+UPDATE_LTP_LATENCY = STAGES['update_ltp']
+CHECK_RISK_LATENCY = STAGES['check_risk']
+ORDER_WRITE_LATENCY = STAGES['order_write']
 
 class VirtualBroker:
-    def __init__(self, log_file=TRADE_LOG_FILE):
+    def __init__(self, log_file=TRADE_LOG_FILE, fsync='interval', snapshot_every=200,
+                 daily_target=DAILY_TARGET, daily_sl=DAILY_SL):
         self.log_file = log_file
-        self.active_positions = {} # { 'NIFTY 25000 CE': {'qty': 50, 'price': 100, 'side': 'SELL', 'ltp': 100} }
+        self.active_positions = {} # { 'NIFTY 25000 CE': {'qty': 50, 'price': 100, 'side': 'SELL', 'ltp': 100, 'pnl': 0} }
         self.capital = CAPITAL
         self.realized_pnl = 0
+        self.mtm = 0.0 # Running sum of position 'pnl', adjusted per LTP update
         
         # Risk Config
-        self.daily_target = 1000.0
-        self.daily_sl = -750.0 
+        self.daily_target = daily_target
+        self.daily_sl = daily_sl
         
-        # Initialize Log File
-        self._ensure_log_file()
+        # Trade Ledger (one buffered handle + periodic state snapshots)
+        self.journal = TradeJournal(log_file, fsync=fsync, snapshot_every=snapshot_every)
         
         # State Persistence
         self._reconstruct_state()
 
-    def _ensure_log_file(self):
-        if not os.path.exists(self.log_file):
-            with open(self.log_file, "w", newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(["timestamp", "symbol", "side", "qty", "price", "tag", "pnl"])
-
     def _reconstruct_state(self):
         """
-        Reads the CSV log to rebuild active_positions and realized_pnl.
+        Rebuilds active_positions and realized_pnl from the latest snapshot
+        plus the ledger rows written after it.
         """
-        if not os.path.exists(self.log_file):
-            return
-
         try:
-            df = pd.read_csv(self.log_file)
-            if df.empty:
+            state, rows = self.journal.load()
+
+            if state:
+                self.realized_pnl = state['realized_pnl']
+                for symbol, pos in state['positions'].items():
+                    self.active_positions[symbol] = {'qty': pos['qty'], 'price': pos['price'], 'ltp': pos['price'], 'pnl': 0}
+                print(f"🔄 Loaded State Snapshot. Replaying {len(rows)} newer trades...")
+            elif rows:
+                print(f"🔄 Reconstructing State from Logs ({len(rows)} trades)...")
+            else:
                 return
 
-            print("🔄 Reconstructing State from Logs...")
-            for _, row in df.iterrows():
-                symbol = row['symbol']
-                side = row['side']
-                qty = row['qty']
-                price = row['price']
-                pnl = row['pnl'] if not pd.isna(row['pnl']) else 0
-
-                if symbol not in self.active_positions:
-                    # Init with basic struct
-                    self.active_positions[symbol] = {'qty': 0, 'price': 0, 'ltp': 0}
-                
-                if side == "BUY":
-                    self.active_positions[symbol]['qty'] += qty
-                elif side == "SELL":
-                    self.active_positions[symbol]['qty'] -= qty
-                    
+            for row in rows:
+                pnl = float(row['pnl']) if row.get('pnl') else 0
+                self._apply_fill(row['symbol'], row['side'], int(float(row['qty'])), float(row['price']))
                 self.realized_pnl += pnl
 
-            # Clean up closed
-            self.active_positions = {k: v for k, v in self.active_positions.items() if v['qty'] != 0}
+            self.resync_mtm()
             print(f"✅ State Reconstructed. Active Positions: {len(self.active_positions)}")
+
+            if self.journal.snapshot_due():
+                self.journal.snapshot(self._snapshot_state())
             
         except Exception as e:
             print(f"❌ Error reconstructing state: {e}")
 
-    def place_paper_order(self, symbol, side, qty, price, tag="ENTRY"):
+    def _snapshot_state(self):
+        return {
+            'realized_pnl': self.realized_pnl,
+            'positions': {s: {'qty': p['qty'], 'price': p['price']} for s, p in self.active_positions.items()},
+        }
+
+    def _apply_fill(self, symbol, side, qty, price):
         """
-        Simulates placing an order.
+        Applies a fill to active_positions (shared by live orders and ledger replay).
         """
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
-        with open(self.log_file, "a", newline='') as f:
-            writer = csv.writer(f)
-            pnl = 0 
-            writer.writerow([timestamp, symbol, side, qty, price, tag, pnl])
-            
-        print(f"📝 PAPER TRADE: {side} {qty} {symbol} @ {price} [{tag}]")
+        if side not in ("BUY", "SELL"):
+            return
 
         if symbol not in self.active_positions:
-             self.active_positions[symbol] = {'qty': 0, 'price': price, 'ltp': price}
+             self.active_positions[symbol] = {'qty': 0, 'price': price, 'ltp': price, 'pnl': 0}
         
+        pos = self.active_positions[symbol]
         if side == "BUY":
-            self.active_positions[symbol]['qty'] += qty
+            pos['qty'] += qty
         else:
-             self.active_positions[symbol]['qty'] -= qty
+             pos['qty'] -= qty
              
-        self.active_positions[symbol]['price'] = price # Update last entry price
+        pos['price'] = price # Update last entry price
         
-        if self.active_positions[symbol]['qty'] == 0:
+        if pos['qty'] == 0:
+            self.mtm -= pos.get('pnl', 0)
             del self.active_positions[symbol]
+        else:
+            self._update_position_pnl(pos)
+
+    def place_paper_order(self, symbol, side, qty, price, tag="ENTRY"):
+        """
+        Simulates placing an order. Returns the fill.
+        """
+        start = time.perf_counter()
+        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        pnl = 0 
+        self.journal.append([timestamp, symbol, side, qty, price, tag, pnl])
+        ORDER_WRITE_LATENCY.observe(time.perf_counter() - start)
+            
+        print(f"📝 PAPER TRADE: {side} {qty} {symbol} @ {price} [{tag}]")
+
+        self._apply_fill(symbol, side, qty, price)
+
+        if self.journal.snapshot_due():
+            self.journal.snapshot(self._snapshot_state())
+        return {'timestamp': timestamp, 'symbol': symbol, 'side': side, 'qty': qty, 'price': price, 'tag': tag}
+
+    def close(self):
+        """
+        Snapshots state and closes the ledger (fast restart).
+        """
+        self.journal.snapshot(self._snapshot_state())
+        self.journal.close()
 
     def execute_spread(self, leg1, leg2):
         """
-        Atomic execution of a Credit Spread.
+        Atomic execution of a Credit Spread. Returns the (hedge, premium) fills.
+        """
+        hedge = self.place_paper_order(leg1['symbol'], "BUY", leg1['qty'], leg1['price'], tag="ENTRY_HEDGE")
+        premium = self.place_paper_order(leg2['symbol'], "SELL", leg2['qty'], leg2['price'], tag="ENTRY_PREMIUM")
+        return hedge, premium
+
+    def _update_position_pnl(self, pos):
+        """
+        Re-marks one position and applies the delta to the running MTM.
+        Long: (ltp - entry) * qty, Short: (entry - ltp) * |qty| -> same formula with signed qty.
         """
-        self.place_paper_order(leg1['symbol'], "BUY", leg1['qty'], leg1['price'], tag="ENTRY_HEDGE")
-        self.place_paper_order(leg2['symbol'], "SELL", leg2['qty'], leg2['price'], tag="ENTRY_PREMIUM")
+        pnl = (pos.get('ltp', pos['price']) - pos['price']) * pos['qty']
+        self.mtm += pnl - pos.get('pnl', 0)
+        pos['pnl'] = pnl
 
     def update_ltp(self, symbol, ltp):
         """
-        Updates LTP for a position.
+        Updates LTP for a position. O(1): only this leg's P&L delta touches the MTM.
+        """
+        start = time.perf_counter()
+        pos = self.active_positions.get(symbol)
+        if pos is not None:
+            pos['ltp'] = ltp
+            pnl = (ltp - pos['price']) * pos['qty']
+            self.mtm += pnl - pos['pnl']
+            pos['pnl'] = pnl
+        UPDATE_LTP_LATENCY.observe(time.perf_counter() - start)
+
+    def resync_mtm(self):
+        """
+        Recomputes every position from scratch (startup / drift correction).
         """
-        if symbol in self.active_positions:
-            self.active_positions[symbol]['ltp'] = ltp
+        self.mtm = 0.0
+        for pos in self.active_positions.values():
+            pos['pnl'] = 0
+            self._update_position_pnl(pos)
+        return self.mtm
 
     def get_mtm(self):
         """
-        Calculates Live MTM using stored LTP.
+        Live MTM using stored LTP (running aggregate, O(1)).
         """
-        mtm = 0
-        for symbol, pos in self.active_positions.items():
-            qty = pos['qty']
-            entry_price = pos['price'] 
-            ltp = pos.get('ltp', entry_price) 
-            
-            if qty > 0: # Long
-                pnl = (ltp - entry_price) * qty
-            else: # Short
-                pnl = (entry_price - ltp) * abs(qty)
-            
-            mtm += pnl
-        return mtm
+        return self.mtm
         
     def check_risk(self):
         """
         Checks Global MTM against Risk Limits.
         """
         # Global Limit Check
+        start = time.perf_counter()
         current_mtm = self.get_mtm()
         total_pnl = self.realized_pnl + current_mtm
         
         # Logging occasionally useful
         # print(f"DEBUG: PnL {total_pnl} (Realized: {self.realized_pnl}, MTM: {current_mtm})")
         
+        status = None
         if total_pnl >= self.daily_target:
-            return "TARGET_HIT"
+            status = "TARGET_HIT"
         elif total_pnl <= self.daily_sl:
-            return "SL_HIT"
-        return None
+            status = "SL_HIT"
+        CHECK_RISK_LATENCY.observe(time.perf_counter() - start)
+        return status
 
     def close_all_positions(self, reason="RISK_EXIT"):
         """
@@ -156,3 +201,5 @@ class VirtualBroker:
                 self.place_paper_order(symbol, "SELL", qty, ltp, tag=f"EXIT_{reason}")
             elif qty < 0:
                 self.place_paper_order(symbol, "BUY", abs(qty), ltp, tag=f"EXIT_{reason}")
+
+        self.resync_mtm()
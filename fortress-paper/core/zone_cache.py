@@ -0,0 +1,102 @@
+import os
+import json
+import logging
+import datetime
+from config import DATA_DIR
+
+ZONE_CACHE_FILE = os.path.join(DATA_DIR, "zone_cache.json")
+
+# updated_at is stamped by each writer's own clock (FortressDB.save_zones), so a row
+# can commit after the watermark with a stamp at or below it. Every poll re-reads
+# this much history before the watermark; rows already applied are skipped.
+SYNC_OVERLAP = datetime.timedelta(minutes=5)
+
+def _parse_ts(value):
+    try:
+        return datetime.datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+class ZoneCache:
+    """
+    Local copy of the active rows of 'trading_zones', kept current by delta polls
+    on updated_at. Persisted to `path`, so a restart only fetches rows changed since
+    the last sync (minus `overlap`) instead of the full table.
+    """
+    def __init__(self, db, path=ZONE_CACHE_FILE, overlap=SYNC_OVERLAP):
+        self.db = db
+        self.path = path
+        self.overlap = overlap
+        self.zones = {}       # {zone_id: row}, ACTIVE only
+        self.synced_to = None # Newest updated_at seen (writer-stamped, see SYNC_OVERLAP)
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+            self.zones = {z['id']: z for z in state.get('zones', [])}
+            self.synced_to = state.get('synced_to')
+        except Exception as e:
+            logging.warning(f"⚠️ Zone cache unreadable ({e}). Full sync.")
+            self.zones, self.synced_to = {}, None
+
+    def _save(self):
+        if not self.path:
+            return
+        tmp = f"{self.path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(tmp, 'w') as f:
+                json.dump({'synced_to': self.synced_to, 'zones': list(self.zones.values())}, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logging.warning(f"⚠️ Zone cache not saved: {e}")
+
+    def __len__(self):
+        return len(self.zones)
+
+    def sync(self):
+        """
+        Pulls rows updated since the last sync (blocking; run off the event loop).
+        Returns (upserted {zone_id: row}, removed {zone_id}); both empty if nothing changed.
+        """
+        rows = self.db.get_zones_updated_since(self._since())
+        if not rows:
+            return {}, set()
+
+        upserted, removed = {}, set()
+        for row in rows:
+            zone_id = row['id']
+            known = self.zones.get(zone_id)
+            if known is not None and known.get('updated_at') == row.get('updated_at'):
+                continue # Already applied (overlap window re-read)
+            if row.get('status', 'ACTIVE') == 'ACTIVE':
+                self.zones[zone_id] = row
+                upserted[zone_id] = row
+                removed.discard(zone_id)
+            elif self.zones.pop(zone_id, None) is not None:
+                upserted.pop(zone_id, None)
+                removed.add(zone_id)
+
+            updated_at = _parse_ts(row.get('updated_at'))
+            if updated_at and (self.synced_to is None or updated_at > _parse_ts(self.synced_to)):
+                self.synced_to = row['updated_at']
+
+        if upserted or removed:
+            self._save()
+        return upserted, removed
+
+    def _since(self):
+        """
+        Lower bound for the next poll: the watermark minus the overlap window.
+        """
+        synced_to = _parse_ts(self.synced_to)
+        if synced_to is None:
+            return None # First sync (or unreadable watermark): full table
+        return (synced_to - self.overlap).isoformat()
+
+    def active_zones(self):
+        return list(self.zones.values())
@@ -0,0 +1,98 @@
+import bisect
+
+INF = float('inf')
+
+# Key Defense Level per zone type (see FortressStrategy.check_entry)
+DEFENSE_LEVEL_KEYS = {
+    'SUPPLY': 'range_high',
+    'DEMAND': 'range_low',
+}
+
+
+class ZoneIndex:
+    """
+    Per-symbol zone index sorted by Defense Level.
+    Each (symbol, type) bucket is a sorted list of (level, seq, zone_id),
+    so a candle only touches the zones its high/low range can sweep.
+    """
+    def __init__(self, zones=None):
+        self._zones = {}    # {zone_id: zone} (insertion ordered)
+        self._keys = {}     # {zone_id: ((symbol, type), entry)}
+        self._buckets = {}  # {(symbol, type): [(level, seq, zone_id), ...]}
+        self._seq = 0
+
+        for zone in zones or []:
+            self.add(zone)
+
+    def __len__(self):
+        return len(self._zones)
+
+    def __contains__(self, zone_id):
+        return zone_id in self._zones
+
+    def get(self, zone_id):
+        return self._zones.get(zone_id)
+
+    def zones(self):
+        """
+        Returns all zones in insertion order.
+        """
+        return list(self._zones.values())
+
+    def symbols(self):
+        return {z['symbol'] for z in self._zones.values()}
+
+    def add(self, zone):
+        """
+        Adds (or replaces) a zone. O(log n) search + list insert.
+        """
+        zone_id = zone['id']
+        if zone_id in self._zones:
+            self.remove(zone_id)
+
+        self._zones[zone_id] = zone
+        self._seq += 1
+
+        level_key = DEFENSE_LEVEL_KEYS.get(zone.get('type'))
+        if not level_key:
+            return
+
+        level = zone.get(level_key)
+        if level is None or level != level:  # Missing / NaN never sweeps
+            return
+
+        bucket_key = (zone['symbol'], zone['type'])
+        entry = (float(level), self._seq, zone_id)
+        bisect.insort(self._buckets.setdefault(bucket_key, []), entry)
+        self._keys[zone_id] = (bucket_key, entry)
+
+    def remove(self, zone_id):
+        """
+        Retires a zone. Returns the removed zone or None.
+        """
+        zone = self._zones.pop(zone_id, None)
+        if zone is None:
+            return None
+
+        key = self._keys.pop(zone_id, None)
+        if key:
+            bucket_key, entry = key
+            bucket = self._buckets[bucket_key]
+            pos = bisect.bisect_left(bucket, entry)
+            if pos < len(bucket) and bucket[pos] == entry:
+                del bucket[pos]
+            if not bucket:
+                del self._buckets[bucket_key]
+        return zone
+
+    def between(self, symbol, zone_type, low, high):
+        """
+        Returns (seq, zone) for zones with low < Defense Level < high.
+        """
+        bucket = self._buckets.get((symbol, zone_type))
+        if not bucket or not low < high:
+            return []
+
+        start = bisect.bisect_right(bucket, (low, INF))
+        end = bisect.bisect_left(bucket, (high, -INF))
+        return [(seq, self._zones[zone_id]) for _, seq, zone_id in bucket[start:end]]
@@ -1,61 +1,122 @@
-import logging
-import threading
 import time
+STARTED = time.perf_counter() # Startup report: everything below counts as import time
+import asyncio
+import logging
 import datetime
 import json
 from dhanhq import dhanhq, DhanFeed
-import pandas as pd
-from config import CLIENT_ID, ACCESS_TOKEN, ZONES_FILE, DB_PATH, LOG_FILE_PATH, TRADE_LOG_FILE
+from config import CLIENT_ID, ACCESS_TOKEN, ZONES_FILE, DB_PATH, LOG_FILE_PATH, TRADE_LOG_FILE, NIFTY_INDEX_ID
 from core.virtual_broker import VirtualBroker
-from core.strategy import FortressStrategy
-from core.db import FortressDB 
-from probe_dhan_methods import print_methods
+from core.strategy import FortressStrategy, SPREAD_WIDTH, BANKNIFTY_SPREAD_WIDTH
+from core.bar_aggregator import BarAggregator
+from core.scrip_master import ScripMaster
+from core.data_recorder import DataRecorder
+from core.tick_archive import TickArchive
+from core.tick_queue import CoalescingTickQueue
+from core.dhan_async import AsyncDhanClient
+from core.option_chain import OptionChainSnapshot
+from core.metrics import STAGES, start_metrics_server
+from core.zone_cache import ZoneCache
+
+IMPORTED = time.perf_counter()
 
 # Configure Logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 # Global State
 dhan = None
+rest = None # AsyncDhanClient for REST calls made from the event loop
 feed = None 
 running = True
+tick_ready = None # asyncio.Event: set when the feed queues work for risk_loop
 
-# Initialize Modules
-broker = VirtualBroker(log_file=TRADE_LOG_FILE)
+# Initialize Modules (nothing touches disk or network at import: see init_components / startup)
+broker = None
 strategy = FortressStrategy(zones_file=None) # Don't load file
-db = FortressDB()
-SCRIP_MASTER_DF = None
-
-# Load Zones from Supabase
-try:
-    active_zones = db.get_active_zones()
-    if active_zones:
-        strategy.zones = active_zones
-        logging.info(f"✅ Loaded {len(active_zones)} Zones from Supabase.")
-    else:
-        logging.warning("⚠️ No Active Zones found in Supabase.")
-except Exception as e:
-    logging.error(f"❌ Failed to load zones from DB: {e}")
+db = None # FortressDB, connected in a worker thread during startup
+DB_WRITES = set() # In-flight background trade writes (strong refs until done)
+zone_cache = None # Local trading_zones copy, delta-synced on updated_at
+ZONE_SYNC_INTERVAL = 10 # Seconds between zone delta polls
+ZONE_INSTRUMENTS = set() # Feed instruments subscribed for zone futures
+recorder = None # Background group-commit tick writer
+tick_queue = CoalescingTickQueue(maxsize=10000) # Feed -> risk consumer (latest tick per instrument)
+QUEUE_STATS_INTERVAL = 60 # Seconds between queue stats / stage latency log lines
+METRICS_PORT = 9108 # Prometheus text endpoint (http://127.0.0.1:9108/metrics), None to disable
+SCRIP_MASTER = None
 
-def load_scrip_master():
-    global SCRIP_MASTER_DF
-    logging.info("📥 Loading Scrip Master (this may take a moment)...")
+# Option Chain Sentiment (Slow Loop)
+SLOW_LOOP_INTERVAL = 180
+OPTION_CHAIN_UNDERLYINGS = {'NIFTY': int(NIFTY_INDEX_ID), 'BANKNIFTY': 25} # IDX_I security ids
+EXPIRIES = {} # {underlying: (date fetched, nearest expiry 'YYYY-MM-DD')}
+
+# Tick-built Candles
+CANDLE_TIMEFRAME = '5m' # Entry trigger timeframe
+SECURITY_SYMBOLS = {} # {security_id: symbol} for everything on the feed
+WATCH_LIST = {} # {security_id: symbol} futures with zones
+candles = None
+candles_since = time.time()
+
+# Startup phases (seconds), reported once I/O is done and again at the first tick
+STARTUP = {'imports': IMPORTED - STARTED}
+
+def init_components():
+    """
+    Local state only (ledger replay, tick DB). Idempotent.
+    """
+    global broker, recorder
+    if broker is None:
+        broker = VirtualBroker(log_file=TRADE_LOG_FILE)
+    if recorder is None:
+        # Ticks go to the columnar archive (option chain snapshots stay in SQLite)
+        recorder = DataRecorder(db_path=DB_PATH, archive=TickArchive())
+
+def load_zones():
+    """
+    Blocking (run in a thread): connects Supabase on first use and loads active zones
+    from the local zone cache plus the rows changed since its last sync.
+    """
+    global db, zone_cache
+    if db is None:
+        from core.db import FortressDB # supabase import alone is ~0.3s
+        db = FortressDB()
     try:
-        res = dhan.fetch_security_list()
-        if isinstance(res, pd.DataFrame):
-            SCRIP_MASTER_DF = res
-        elif isinstance(res, dict) and 'data' in res:
-            SCRIP_MASTER_DF = pd.DataFrame(res['data'])
+        if zone_cache is None:
+            zone_cache = ZoneCache(db)
+        cached = len(zone_cache)
+        upserted, removed = zone_cache.sync()
+        if len(zone_cache):
+            strategy.zones = zone_cache.active_zones()
+            logging.info(f"✅ Loaded {len(zone_cache)} Zones ({cached} cached, {len(upserted)} updated, {len(removed)} retired since last sync).")
         else:
-            logging.warning(f"⚠️ Unexpected Scrip Master format: {type(res)}")
-            return
+            logging.warning("⚠️ No Active Zones found in Supabase.")
+    except Exception as e:
+        logging.error(f"❌ Failed to load zones from DB: {e}")
+
+async def timed_phase(name, awaitable):
+    start = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        STARTUP[name] = time.perf_counter() - start
+
+def startup_report():
+    io = ", ".join(f"{k} {STARTUP[k]:.2f}s" for k in ('zones', 'scrip_master', 'feed_connect') if k in STARTUP)
+    line = (f"⏱️ Startup: imports {STARTUP['imports']:.2f}s | init {STARTUP.get('init', 0):.2f}s | "
+            f"I/O {STARTUP.get('io', 0):.2f}s ({io or 'pending'})")
+    if 'first_tick' in STARTUP:
+        line += f" | first tick processed at {STARTUP['first_tick']:.2f}s"
+    return line
 
-        # Normalize columns for consistency
-        SCRIP_MASTER_DF.columns = [x.strip().upper() for x in SCRIP_MASTER_DF.columns]
-        logging.info(f"✅ Scrip Master Loaded: {len(SCRIP_MASTER_DF)} records")
+def load_scrip_master():
+    global SCRIP_MASTER
+    logging.info("📥 Loading Scrip Master...")
+    try:
+        # Cached on disk once per day, indexed by symbol / security_id
+        SCRIP_MASTER = ScripMaster.load(dhan)
     except Exception as e:
         logging.error(f"❌ Failed to load Scrip Master: {e}")
 
-def subscribe_to_legs(leg1_symbol, leg2_symbol):
+async def subscribe_to_legs(leg1_symbol, leg2_symbol):
     """
     Dynamically subscribes to new Option Strikes.
     """
@@ -63,7 +124,7 @@ def subscribe_to_legs(leg1_symbol, leg2_symbol):
         logging.error("❌ Feed not ready for subscription.")
         return
         
-    if SCRIP_MASTER_DF is None:
+    if SCRIP_MASTER is None:
         logging.error("❌ Scrip Master not loaded. Cannot look up IDs.")
         return
 
@@ -72,11 +133,13 @@ def subscribe_to_legs(leg1_symbol, leg2_symbol):
     for sym in [leg1_symbol, leg2_symbol]:
         # Filter Master to find ID
         # Strategy format: "NIFTY 30 JAN 25500 CE"
-        # We need to match this against 'SEM_TRADING_SYMBOL'
+        # We need to match this against the Trading / Custom Symbol (O(1) hash lookup)
         
-        row = SCRIP_MASTER_DF[SCRIP_MASTER_DF['SEM_TRADING_SYMBOL'] == sym]
-        if not row.empty:
-            sec_id = str(row.iloc[0]['SEM_SECURITY_ID'])
+        start = time.perf_counter()
+        sec_id = SCRIP_MASTER.security_id(sym)
+        STAGES['scrip_lookup'].observe(time.perf_counter() - start)
+        if sec_id:
+            SECURITY_SYMBOLS[sec_id] = sym
             # Exchange Segment: NSE_FNO = 2
             tokens_to_sub.append((dhan.NSE_FNO, sec_id))
             logging.info(f"➕ Dynamically Subscribing: {sym} ({sec_id})")
@@ -84,201 +147,387 @@ def subscribe_to_legs(leg1_symbol, leg2_symbol):
             logging.warning(f"❌ ID Lookup Failed for {sym}")
 
     if tokens_to_sub:
-        feed.subscribe_symbols(tokens_to_sub)
+        await feed.subscribe(tokens_to_sub)
 
-def slow_loop():
+async def nearest_expiry(underlying, security_id):
     """
-    Background Task: Fetches Option Chain every 3 minutes.
-    Updates Strategy Sentiment.
+    Nearest option expiry on or after today (looked up once per day).
     """
-    logging.info("🐢 Slow Loop Started (Thread)")
+    today = datetime.date.today()
+    cached = EXPIRIES.get(underlying)
+    if cached and cached[0] == today:
+        return cached[1]
+
+    res = await rest.expiry_list(security_id, rest.INDEX)
+    dates = res.get('data', {}).get('data') if res.get('status') == 'success' else None
+    upcoming = sorted(d for d in (dates or []) if d >= today.isoformat())
+    if not upcoming:
+        logging.warning(f"⚠️ No expiry found for {underlying}: {res.get('remarks')}")
+        return None
+    EXPIRIES[underlying] = (today, upcoming[0])
+    return upcoming[0]
+
+async def fetch_option_chain(underlying, security_id):
+    expiry = await nearest_expiry(underlying, security_id)
+    if not expiry:
+        return None
+
+    res = await rest.option_chain(security_id, rest.INDEX, expiry)
+    if res.get('status') != 'success':
+        logging.warning(f"⚠️ Option Chain fetch failed for {underlying}: {res.get('remarks')}")
+        return None
+    return OptionChainSnapshot.from_dhan(underlying, expiry, res['data'])
+
+async def slow_loop():
+    """
+    Background Task: Fetches Option Chain every 3 minutes (via `rest`, non-blocking).
+    Updates Strategy Sentiment per underlying.
+    """
+    logging.info("🐢 Slow Loop Started (Task)")
     while running:
-        try:
-            # Placeholder for Option Chain Logic
-            pass 
-        except Exception as e:
-            logging.error(f"Slow Loop Error: {e}")
-        time.sleep(180)
+        start = time.time()
+        for underlying, security_id in OPTION_CHAIN_UNDERLYINGS.items():
+            try:
+                snapshot = await fetch_option_chain(underlying, security_id)
+                if snapshot is None or not len(snapshot):
+                    continue
+                strategy.update_market_sentiment(snapshot)
+                await asyncio.to_thread(recorder.log_option_chain, snapshot.to_rows())
+            except Exception as e:
+                logging.error(f"Slow Loop Error ({underlying}): {e}")
+        logging.info(f"🐢 Sentiment refreshed in {time.time() - start:.1f}s: {strategy.sentiment}")
+        await asyncio.sleep(SLOW_LOOP_INTERVAL)
+
+def build_watch_list():
+    """
+    Maps zone futures (security_id -> symbol) for tick-built candles.
+    """
+    WATCH_LIST.clear()
+    for z in strategy.zones:
+        if 'security_id' in z:
+            WATCH_LIST[str(z['security_id'])] = z['symbol']
+    SECURITY_SYMBOLS.update(WATCH_LIST)
+
+def on_tick_candle(tick):
+    """
+    Folds a feed tick into the 1m/5m candles (O(1), feed task).
+    """
+    sec_id = str(tick.get('security_id'))
+    if sec_id not in WATCH_LIST or 'ltp' not in tick:
+        return
 
-def check_candle_loop():
+    candles.add_tick(sec_id, time.time(), tick['ltp'], tick.get('volume_delta', 0))
+
+def on_candle_close(sec_id, timeframe, bar):
+    """
+    Called the moment a tick-built candle closes (next bucket tick or boundary flush).
+    """
+    if timeframe != CANDLE_TIMEFRAME:
+        return
+
+    # First bar after startup only saw part of the bucket
+    if bar['start'] < candles_since:
+        return
+
+    symbol = WATCH_LIST.get(sec_id)
+    if not symbol:
+        return
+
+    # Signal checks and order placement run in risk_loop, not the feed.
+    # Unique key per bar, so closed candles are never coalesced away, and
+    # keep=True evicts a pending tick instead of dropping the bar when full.
+    if not tick_queue.put(('BAR', sec_id, bar['start']), (symbol, bar), keep=True):
+        logging.warning(f"⚠️ Closed {timeframe} candle for {symbol} dropped (tick queue full)")
+    tick_ready.set()
+
+async def check_candle_signal(symbol, bar):
     """
-    Background Task: Fetches 5-min Candles every minute.
-    Checks for Sweep Entries.
+    Consumer task: checks a closed candle against the zones and trades the signal.
     """
-    logging.info("🕯️ Candle Check Loop Started (1m Interval)")
+    candle = {
+        'symbol': symbol,
+        'high': bar['high'],
+        'low': bar['low'],
+        'close': bar['close'],
+        'open': bar['open']
+    }
+
+    try:
+        sentiment = strategy.sentiment_for(symbol)
+        start = time.perf_counter()
+        signal_data = strategy.check_entry(candle, sentiment)
+        STAGES['check_entry'].observe(time.perf_counter() - start)
+
+        if signal_data:
+            await execute_signal(symbol, candle, signal_data)
+    except Exception as e:
+        logging.error(f"Error checking candle for {symbol}: {e}")
+
+async def execute_signal(symbol, candle, signal_data):
+    """
+    Places the Credit Spread for a Strategy Signal and logs it.
+    """
+    signal = signal_data['action']
+    atm_strike = signal_data['atm_strike']
+    underlying = signal_data['underlying']
+    reason = signal_data['reason']
+    
+    logging.info(f"⚡ Signal {signal} on {symbol} (Reason: {reason})")
     
-    # Symbols to watch
-    watch_list = {} # {security_id: symbol}
-    if strategy.zones:
-        for z in strategy.zones:
-            if 'security_id' in z:
-                watch_list[z['security_id']] = z['symbol']
+    width = BANKNIFTY_SPREAD_WIDTH if "BANKNIFTY" in underlying else SPREAD_WIDTH
     
-    processed_candles = set()
+    # Helper to get Expiry String
+    def get_expiry_str():
+        today = datetime.date.today()
+        days = (3 - today.weekday() + 7) % 7
+        return (today + datetime.timedelta(days=days)).strftime("%d %b").upper()
+    
+    expiry_str = get_expiry_str()
+    
+    trade_res = None
+
+    if signal == "BUY_PUT_SPREAD":
+        # Bull Put Spread (Credit Strategy)
+        sell_strike = atm_strike 
+        buy_strike = atm_strike - width
+        
+        sym_buy = f"{underlying} {expiry_str} {buy_strike} PE"
+        sym_sell = f"{underlying} {expiry_str} {sell_strike} PE"
+        
+        leg1 = {'symbol': sym_buy, 'qty': 50, 'price': 0, 'side': 'BUY'} 
+        leg2 = {'symbol': sym_sell, 'qty': 50, 'price': 0, 'side': 'SELL'}
+        
+        trade_res = broker.execute_spread(leg1, leg2)
+        await subscribe_to_legs(leg1['symbol'], leg2['symbol'])
+        
+    elif signal == "SELL_CALL_SPREAD":
+        # Bear Call Spread (Credit Strategy)
+        sell_strike = atm_strike
+        buy_strike = atm_strike + width
+        
+        sym_buy = f"{underlying} {expiry_str} {buy_strike} CE"
+        sym_sell = f"{underlying} {expiry_str} {sell_strike} CE"
+        
+        leg1 = {'symbol': sym_buy, 'qty': 50, 'price': 0, 'side': 'BUY'}
+        leg2 = {'symbol': sym_sell, 'qty': 50, 'price': 0, 'side': 'SELL'}
+        
+        trade_res = broker.execute_spread(leg1, leg2)
+        await subscribe_to_legs(leg1['symbol'], leg2['symbol'])
+    
+    # Log to DB in the background: risk_loop goes back to stops/targets right away
+    if trade_res and db is not None:
+        task = asyncio.create_task(log_trade({
+            "symbol": symbol,
+            "action": signal,
+            "price": candle['close'],
+            "timestamp": datetime.datetime.now().isoformat(),
+            "details": str(trade_res)
+        }), name="db_write")
+        DB_WRITES.add(task)
+        task.add_done_callback(DB_WRITES.discard)
+
+async def log_trade(trade):
+    """
+    Blocking Supabase insert, kept off the event loop (db_write stage).
+    """
+    start = time.perf_counter()
+    try:
+        await asyncio.to_thread(db.log_trade, trade)
+    except Exception as e:
+        logging.error(f"❌ Trade DB write failed: {e}")
+    STAGES['db_write'].observe(time.perf_counter() - start)
+
+async def check_candle_loop():
+    """
+    Background Task: Closes tick-built candles at each minute boundary.
+    Candles for active instruments close on the first tick of the next bucket;
+    this flush covers instruments that go quiet right at the boundary.
+    """
+    logging.info("🕯️ Candle Close Loop Started (Tick-built 1m/5m)")
     
     while running:
+        # Align to next minute start for precision
+        sleep_time = 60 - (time.time() % 60)
+        await asyncio.sleep(sleep_time + 0.01)
+        
         try:
-            # We iterate over unique instruments to watch
-            for sec_id, symbol in watch_list.items():
-                to_date = datetime.datetime.now().strftime('%Y-%m-%d')
-                
-                try:
-                    res = dhan.intraday_minute_data(
-                        security_id=sec_id,
-                        exchange_segment=dhan.NSE_FNO,
-                        instrument_type='FUTIDX',
-                        from_date=to_date,
-                        to_date=to_date,
-                        interval='5' # 5-Minute Data
-                    )
-                    
-                    if res.get('status') == 'success' and res.get('data'):
-                         data = res.get('data')
-                         if not data:
-                             continue
-                             
-                         latest = data[-1]
-                         c_time = latest.get('start_time') or latest.get('time')
-                         if not c_time:
-                             continue
-                             
-                         # Unique Key for this candle
-                         c_key = f"{symbol}_{c_time}"
-                         
-                         if c_key in processed_candles:
-                             continue
-                             
-                         processed_candles.add(c_key)
-                         
-                         candle = {
-                             'symbol': symbol,
-                             'high': float(latest.get('high', 0)),
-                             'low': float(latest.get('low', 0)),
-                             'close': float(latest.get('close', 0)),
-                             'open': float(latest.get('open', 0))
-                         }
-                         
-                         sentiment = strategy.market_sentiment_flag
-                         signal_data = strategy.check_entry(candle, sentiment)
-                         
-                         if signal_data:
-                             signal = signal_data['action']
-                             atm_strike = signal_data['atm_strike']
-                             underlying = signal_data['underlying']
-                             reason = signal_data['reason']
-                             
-                             logging.info(f"⚡ Signal {signal} on {symbol} (Reason: {reason})")
-                             
-                             width = 500 if "BANKNIFTY" in underlying else 200
-                             
-                             # Helper to get Expiry String
-                             def get_expiry_str():
-                                 today = datetime.date.today()
-                                 days = (3 - today.weekday() + 7) % 7
-                                 return (today + datetime.timedelta(days=days)).strftime("%d %b").upper()
-                             
-                             expiry_str = get_expiry_str()
-                             
-                             trade_res = None
-
-                             if signal == "BUY_PUT_SPREAD":
-                                 # Bull Put Spread (Credit Strategy)
-                                 sell_strike = atm_strike 
-                                 buy_strike = atm_strike - width
-                                 
-                                 sym_buy = f"{underlying} {expiry_str} {buy_strike} PE"
-                                 sym_sell = f"{underlying} {expiry_str} {sell_strike} PE"
-                                 
-                                 leg1 = {'symbol': sym_buy, 'qty': 50, 'price': 0, 'side': 'BUY'} 
-                                 leg2 = {'symbol': sym_sell, 'qty': 50, 'price': 0, 'side': 'SELL'}
-                                 
-                                 trade_res = broker.execute_spread(leg1, leg2)
-                                 subscribe_to_legs(leg1['symbol'], leg2['symbol'])
-                                 
-                             elif signal == "SELL_CALL_SPREAD":
-                                 # Bear Call Spread (Credit Strategy)
-                                 sell_strike = atm_strike
-                                 buy_strike = atm_strike + width
-                                 
-                                 sym_buy = f"{underlying} {expiry_str} {buy_strike} CE"
-                                 sym_sell = f"{underlying} {expiry_str} {sell_strike} CE"
-                                 
-                                 leg1 = {'symbol': sym_buy, 'qty': 50, 'price': 0, 'side': 'BUY'}
-                                 leg2 = {'symbol': sym_sell, 'qty': 50, 'price': 0, 'side': 'SELL'}
-                                 
-                                 trade_res = broker.execute_spread(leg1, leg2)
-                                 subscribe_to_legs(leg1['symbol'], leg2['symbol'])
-                             
-                             # Log to DB
-                             if trade_res:
-                                 db.log_trade({
-                                     "symbol": symbol,
-                                     "action": signal,
-                                     "price": candle['close'],
-                                     "timestamp": datetime.datetime.now().isoformat(),
-                                     "details": str(trade_res)
-                                 })
-                                 
-                except Exception as e_inner:
-                    logging.error(f"Error checking candle for {symbol}: {e_inner}")
-                    
+            candles.flush(now=time.time())
         except Exception as e:
             logging.error(f"Candle Loop Error: {e}")
-            
-        # Align to next minute start for precision
-        sleep_time = 60 - (time.time() % 60)
-        time.sleep(sleep_time) 
+
+FEED_DECODE_LATENCY = STAGES['feed_decode']
 
 class LiveFeed(DhanFeed):
     """
     Custom Feed Handler to intercept messages.
     """
-    def process_ticker(self, data):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._last_volume = {} # {security_id: last cumulative volume}, this connection and day only
+        self._volume_day_end = 0.0
+
+    def _reset_volume(self):
+        """
+        Forgets the volume baselines (new connection / new day): the next quote
+        per instrument sets a baseline instead of emitting the whole gap as one delta.
+        """
+        self._last_volume.clear()
+        tomorrow = datetime.date.today() + datetime.timedelta(days=1)
+        self._volume_day_end = datetime.datetime.combine(tomorrow, datetime.time()).timestamp()
+
+    def _normalize(self, res):
+        """
+        Adds 'symbol' / 'ltp' (Dhan packets carry security_id / LTP string).
+        """
+        sec_id = str(res.get('security_id'))
+        symbol = SECURITY_SYMBOLS.get(sec_id)
+        if symbol:
+            res['symbol'] = symbol
+        if 'LTP' in res:
+            res['ltp'] = float(res['LTP'])
+        if 'volume' in res:
+            # Quote volume is cumulative for the day
+            if time.time() >= self._volume_day_end:
+                self._reset_volume()
+            last = self._last_volume.get(sec_id, res['volume'])
+            res['volume_delta'] = max(res['volume'] - last, 0)
+            self._last_volume[sec_id] = res['volume']
+        return res
+
+    def _decode(self, parse, data):
         # Decode using Parent Logic
-        res = super().process_ticker(data)
-        on_market_update(res)
+        start = time.perf_counter()
+        res = self._normalize(parse(data))
+        FEED_DECODE_LATENCY.observe(time.perf_counter() - start)
+        on_feed_tick(res)
         return res
+
+    def process_ticker(self, data):
+        return self._decode(super().process_ticker, data)
         
     def process_quote(self, data):
-        res = super().process_quote(data)
-        on_market_update(res)
-        return res
+        return self._decode(super().process_quote, data)
         
     def process_oi(self, data):
-        res = super().process_oi(data)
-        on_market_update(res)
-        return res
+        return self._decode(super().process_oi, data)
         
+    async def subscribe(self, symbols):
+        """
+        Adds instruments on the open socket. Awaited on the feed's own loop
+        (DhanFeed.subscribe_symbols fires unawaited sends and checks `ws.closed`).
+        """
+        new = [s for s in symbols if s not in self.instruments]
+        if not new:
+            return
+        self.instruments = self.instruments + new
+        await self._send_subscription(new)
+
+    async def unsubscribe(self, symbols):
+        """
+        Drops instruments from the open socket (Dhan v2 unsubscribe = RequestCode + 1).
+        """
+        gone = [s for s in self.instruments if s in symbols]
+        if not gone:
+            return
+        self.instruments = [s for s in self.instruments if s not in symbols]
+        await self._send_subscription(gone, code_offset=1)
+
+    async def _send_subscription(self, symbols, code_offset=0):
+        if self.ws is None:
+            return # Sent with the rest on connect
+
+        for request_code, groups in self.validate_and_process_tuples(symbols).items():
+            for batch in groups:
+                await self.ws.send(json.dumps({
+                    "RequestCode": int(request_code) + code_offset,
+                    "InstrumentCount": len(batch),
+                    "InstrumentList": [
+                        {"ExchangeSegment": self.get_exchange_segment(ex), "SecurityId": token}
+                        for ex, token in batch
+                    ]
+                }))
+
     async def _read_loop(self):
         try:
+            start = time.perf_counter()
             await self.connect()
+            self._reset_volume() # Volume traded while disconnected isn't one tick's delta
+            STARTUP.setdefault('feed_connect', time.perf_counter() - start)
             logging.info("✅ Live Feed Connected via v2!")
             async for message in self.ws:
                 self.process_data(message)
         except Exception as e:
             logging.error(f"Feed Loop Error: {e}")
-            
-    def run_forever(self):
-        try:
-            # Get existing loop or create new
-            if self.loop.is_closed():
-                import asyncio
-                self.loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(self.loop)
-            self.loop.run_until_complete(self._read_loop())
-        except KeyboardInterrupt:
-            pass
-        except Exception as e:
-             logging.error(f"Run Error: {e}")
 
+    async def run(self, reconnect_delay=5):
+        """
+        Feed task: reads until the socket drops, then reconnects.
+        """
+        while running:
+            await self._read_loop()
+            if not running:
+                break
+            logging.warning(f"⚠️ Live Feed disconnected. Reconnecting in {reconnect_delay}s...")
+            self.ws = None
+            await asyncio.sleep(reconnect_delay)
+
+
+def on_feed_tick(tick_data):
+    """
+    Feed task: everything here must stay O(1) and non-blocking.
+    Every tick is recorded and folded into candles; risk handling gets only
+    the latest tick per instrument via the coalescing queue.
+    """
+    on_tick_candle(tick_data)
+    recorder.log_tick(tick_data) # Queued; written in batches by the recorder thread
+
+    # Price and OI packets are keyed apart so an OI update never replaces a pending LTP
+    kind = 'LTP' if 'ltp' in tick_data else 'OI'
+    tick_queue.put(('TICK', tick_data.get('security_id'), kind), tick_data)
+    tick_ready.set()
+
+async def risk_loop():
+    """
+    Consumer Task: drains the tick queue (stops, targets) and closed candles (signals).
+    Yields after every item so the feed keeps reading; while it lags, the
+    queue coalesces to the latest tick per instrument.
+    """
+    logging.info("🛡️ Risk Consumer Started")
+    last_stats = time.time()
+
+    while running:
+        entry = tick_queue.get(timeout=0)
+        if entry:
+            key, item = entry
+            if key[0] == 'BAR':
+                await check_candle_signal(*item)
+            else:
+                on_market_update(item)
+                if 'first_tick' not in STARTUP:
+                    STARTUP['first_tick'] = time.perf_counter() - STARTED
+                    logging.info(startup_report())
+            await asyncio.sleep(0)
+        else:
+            tick_ready.clear()
+            try:
+                await asyncio.wait_for(tick_ready.wait(), timeout=1.0)
+            except asyncio.TimeoutError:
+                pass
+
+        if time.time() - last_stats >= QUEUE_STATS_INTERVAL:
+            last_stats = time.time()
+            stats = tick_queue.stats()
+            logging.info(f"📊 Tick Queue: depth={stats['depth']} max={stats['max_depth']} "
+                         f"received={stats['received']} coalesced={stats['coalesced']} dropped={stats['dropped']}")
+            if stats['dropped']:
+                logging.warning(f"⚠️ Tick Queue full: {stats['dropped']} ticks dropped so far")
+            logging.info(f"⏱️ Stage Latency: {STAGES.summary()}")
 
 def on_market_update(tick_data):
     """
-    Fast Loop: Log Data & Check Stops.
+    Fast Loop: Update LTP & Check Stops.
     """
     try:
-        # recorder.log_tick(tick_data) # Skip high freq logging to DB for now
-        
         if 'ltp' in tick_data and 'symbol' in tick_data:
             broker.update_ltp(tick_data['symbol'], float(tick_data['ltp']))
         
@@ -290,46 +539,126 @@ def on_market_update(tick_data):
     except Exception as e:
         logging.error(f"Fast Loop Error: {e}")
 
-def main():
-    global dhan, feed
+def zone_instruments():
+    """
+    Feed instruments for the active zone futures: {(segment, security_id): symbol}.
+    """
+    instruments = {}
+    for z in strategy.zones:
+        if 'security_id' in z and z.get('status', 'ACTIVE') == 'ACTIVE':
+            instruments.setdefault((dhan.NSE_FNO, z['security_id']), z['symbol'])
+    return instruments
+
+async def sync_zone_subscriptions():
+    """
+    Subscribes new zone futures and drops futures no zone refers to any more.
+    """
+    wanted = zone_instruments()
+    added = [inst for inst in wanted if inst not in ZONE_INSTRUMENTS]
+    dropped = [inst for inst in ZONE_INSTRUMENTS if inst not in wanted]
+    ZONE_INSTRUMENTS.difference_update(dropped)
+    ZONE_INSTRUMENTS.update(added)
+
+    for inst in added:
+        logging.info(f"➕ Subscribing to Zone: {wanted[inst]} ({inst[1]})")
+    for inst in dropped:
+        logging.info(f"➖ Unsubscribing retired Zone future ({inst[1]})")
+    if added:
+        await feed.subscribe(added)
+    if dropped:
+        await feed.unsubscribe(dropped)
+    return added, dropped
+
+async def zone_sync_loop():
+    """
+    Background Task: polls Supabase for zones changed since the last sync and
+    swaps them in (strategy index, candle watch list, feed subscriptions).
+    """
+    logging.info(f"🗺️ Zone Sync Started (every {ZONE_SYNC_INTERVAL}s)")
+    while running:
+        await asyncio.sleep(ZONE_SYNC_INTERVAL)
+        try:
+            upserted, removed = await asyncio.to_thread(zone_cache.sync)
+            if not upserted and not removed:
+                continue
+
+            # No await between these: risk_loop never sees a half-applied update
+            strategy.zones = zone_cache.active_zones() # New index built, then swapped in
+            build_watch_list()
+
+            added, dropped = await sync_zone_subscriptions()
+            logging.info(f"🗺️ Zones updated: {len(upserted)} changed, {len(removed)} retired -> "
+                         f"{len(zone_cache)} active, feed +{len(added)}/-{len(dropped)}")
+        except Exception as e:
+            logging.error(f"Zone Sync Error: {e}")
+
+async def main():
+    global dhan, rest, feed, candles, candles_since, tick_ready
     logging.info("🚀 Fortress Paper Trader Starting...")
-    
+
+    start = time.perf_counter()
+    init_components()
     dhan = dhanhq(CLIENT_ID, ACCESS_TOKEN)
+    rest = AsyncDhanClient(CLIENT_ID, ACCESS_TOKEN)
+    tick_ready = asyncio.Event()
+    STARTUP['init'] = time.perf_counter() - start
 
-    # Load Scrip Master (Critical for Subscription)
-    load_scrip_master()
-    
-    t_slow = threading.Thread(target=slow_loop)
-    t_slow.daemon = True
-    t_slow.start()
-    
-    t_candle = threading.Thread(target=check_candle_loop)
-    t_candle.daemon = True
-    t_candle.start()
-    
-    # Subscribe to Futures Zones
-    instruments = []
-    if strategy.zones:
-        subscribed_ids = set()
-        for z in strategy.zones:
-            if 'security_id' in z and z.get('status', 'ACTIVE') == 'ACTIVE':
-                sid = z['security_id']
-                if sid not in subscribed_ids:
-                    instruments.append((dhan.NSE_FNO, sid)) 
-                    subscribed_ids.add(sid)
-                    logging.info(f"➕ Subscribing to Zone: {z['symbol']} ({sid})")
-    else:
-         logging.warning("⚠️ No Zones available for subscription.")
+    if METRICS_PORT:
+        try:
+            start_metrics_server(METRICS_PORT)
+        except OSError as e:
+            logging.error(f"❌ Metrics endpoint not started: {e}")
+
+    # Candles are built from the Live Feed ticks, not REST polling
+    candles = BarAggregator(timeframes=('1m', CANDLE_TIMEFRAME), on_bar=on_candle_close)
+
+    # One event loop: feed, risk consumer, candle flush and slow loop are tasks
+    # on the same thread, so broker / strategy state needs no locks.
+    # The feed connects while zones and the Scrip Master load; zone futures are
+    # subscribed on the open socket as soon as the zones arrive.
+    feed = LiveFeed(CLIENT_ID, ACCESS_TOKEN, instruments=[], version='v2')
+    tasks = [
+        asyncio.create_task(feed.run(), name="live_feed"),
+        asyncio.create_task(risk_loop(), name="risk_loop"),
+    ]
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        timed_phase('zones', asyncio.to_thread(load_zones)),
+        timed_phase('scrip_master', asyncio.to_thread(load_scrip_master)), # Critical for leg subscription
+    )
+    STARTUP['io'] = time.perf_counter() - start
 
-    if instruments:
-        logging.info(f"📡 Connecting to Live Feed with {len(instruments)} instruments...")
-        # No callbacks in init, handled by Subclass overrides
-        feed = LiveFeed(CLIENT_ID, ACCESS_TOKEN, instruments=instruments, version='v2')
-        feed.run_forever()
+    build_watch_list()
+    candles_since = time.time()
+    tasks += [
+        asyncio.create_task(slow_loop(), name="slow_loop"),
+        asyncio.create_task(check_candle_loop(), name="candle_loop"),
+    ]
+
+    # Subscribe to Futures Zones (later changes arrive through zone_sync_loop)
+    added, _ = await sync_zone_subscriptions()
+    if added:
+        logging.info(f"📡 Subscribed Live Feed to {len(added)} instruments")
     else:
-        logging.warning("⚠️ No instruments to subscribe. Waiting...")
-        while True:
-            time.sleep(1)
+        logging.warning("⚠️ No Zones available for subscription. Feed stays connected, waiting...")
+    if zone_cache is not None:
+        tasks.append(asyncio.create_task(zone_sync_loop(), name="zone_sync"))
+    logging.info(startup_report())
+
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        await rest.close()
 
 if __name__ == "__main__":
-    main()
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # Bounded-loss flush of queued ticks, snapshot broker state for a fast restart
+        if recorder:
+            recorder.close()
+        if broker:
+            broker.close()
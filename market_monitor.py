@@ -1,5 +1,7 @@
 import os
 import sys
+import time
+import argparse
 import datetime
 import pytz
 import logging
@@ -8,17 +10,22 @@ import pandas as pd
 # Add fortress-paper to path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'fortress-paper'))
 
-from dhanhq import dhanhq
-from config import CLIENT_ID, ACCESS_TOKEN
 from core.strategy import FortressStrategy
-from core.virtual_broker import VirtualBroker
 from core.telegram_bot import send_telegram_alert
 from core.db import FortressDB
-from core.analysis_utils import identify_smart_money_structure, resample_to_15m
+from core.analysis_utils import identify_smart_money_structure
+from core.bar_aggregator import BarAggregator
+from core.candle_store import CandleStore
+from core.dhan_client import DhanClient
+from core.rate_limiter import DHAN_DATA_LIMITER
 
 # Configure Logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# 15m bars per security_id. Refetched windows only fold the new minutes.
+BARS = BarAggregator(timeframes=('15m',))
+STORE = None # Local 1m CandleStore (opened in run_scanner)
+
 def is_market_open_now():
     """
     Checks if current IST time is between 09:15 AM and 03:30 PM.
@@ -37,28 +44,169 @@ def is_market_open_now():
         return True, "Market Open"
     return False, "Outside Market Hours"
 
-def fetch_recent_data(dhan, security_id, days=5):
+def fetch_recent_data(dhan, security_id, days=5, store=None, since=None):
     """
     Fetches recent 1m data (last N days) for dynamic analysis.
+    With a CandleStore, only minutes after the stored high-water mark are requested,
+    and `since` (epoch seconds) limits the returned rows to that minute onwards.
     """
-    to_date = datetime.datetime.now().strftime('%Y-%m-%d')
-    from_date = (datetime.datetime.now() - datetime.timedelta(days=days)).strftime('%Y-%m-%d')
+    end = datetime.datetime.now()
+    start = end - datetime.timedelta(days=days)
+    ranges = store.missing_ranges(security_id, start, end) if store else [(start, end)]
+
+    frames = []
     try:
-        res = dhan.intraday_minute_data(
-            security_id=security_id,
-            exchange_segment=dhan.NSE_FNO,
-            instrument_type='FUTIDX', # Monitor targets Futures
-            from_date=from_date,
-            to_date=to_date
-        )
-        if res.get('status') == 'success' and res.get('data'):
-            df = pd.DataFrame(res['data'])
-            return df
+        for range_start, range_end in ranges:
+            res = dhan.intraday_minute_data(
+                security_id=security_id,
+                exchange_segment=dhan.NSE_FNO,
+                instrument_type='FUTIDX', # Monitor targets Futures
+                from_date=range_start.strftime('%Y-%m-%d'),
+                to_date=range_end.strftime('%Y-%m-%d')
+            )
+            if res.get('status') != 'success':
+                raise ValueError(res.get('remarks'))
+            if res.get('data'):
+                frames.append(pd.DataFrame(res['data']))
     except Exception as e:
         logging.error(f"Data Fetch Error: {e}")
-    return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    if not store:
+        return frames[0] if frames else pd.DataFrame()
+
+    for df in frames:
+        store.save(security_id, df)
+    store.save(security_id, None, covered_from=start)
+    if since is None:
+        since = datetime.datetime.combine(start.date(), datetime.time()).timestamp()
+    return store.load(security_id, since=since)
+
+# Warm state (kept across cycles by run_daemon; a single run_scanner pass starts cold)
+STRUCTURE = {}     # {security_id: (last closed 15m bar start, dynamic zones)}
+ALERTED = set()    # {(symbol, action, zone_id, 1m bar ts)} already sent, current session only
+ALERTED_DAY = None # Session date ALERTED belongs to
+DAEMON_INTERVAL = 60       # Seconds between scan cycles
+ZONE_REFRESH_INTERVAL = 900 # Seconds between base zone reloads from Supabase
+
+def connect():
+    """
+    Returns (dhan, db). dhan is the shared pooled/merging REST layer.
+    Opens the local candle store once per process.
+    """
+    global STORE
+    dhan = DhanClient(limiter=DHAN_DATA_LIMITER)
+    db = FortressDB()
+    if STORE is None:
+        STORE = CandleStore()
+    return dhan, db
+
+def prune_alerts(today=None):
+    """
+    Drops the previous session's alert keys (dedup only matters within a session),
+    so a long-running daemon doesn't grow ALERTED without bound.
+    """
+    global ALERTED_DAY
+    today = today or datetime.date.today()
+    if today != ALERTED_DAY:
+        ALERTED.clear()
+        ALERTED_DAY = today
+
+def load_targets(db):
+    """
+    Active base zones and the unique (symbol, security_id) targets they cover.
+    """
+    base_zones = db.get_active_zones() or [] # Fetch all active
+    params = []
+    seen = set()
+    for z in base_zones:
+        if z['symbol'] not in seen:
+            params.append({'symbol': z['symbol'], 'security_id': z['security_id']})
+            seen.add(z['symbol'])
+    return base_zones, params
+
+def detect_structure(symbol, sec_id):
+    """
+    Dynamic zones from the closed 15m bars. Re-run only when a new 15m bar
+    has closed since the last call; otherwise the cached zones are returned.
+    """
+    last = BARS.last_bar(sec_id, '15m')
+    if last is None:
+        return []
+    cached = STRUCTURE.get(sec_id)
+    if cached and cached[0] == last['start']:
+        return cached[1]
+
+    df_15m = BARS.frame(sec_id, '15m', include_open=False)
+    zones = identify_smart_money_structure(df_15m, symbol, sec_id)
+    STRUCTURE[sec_id] = (last['start'], zones)
+    return zones
+
+def scan_symbol(dhan, db, target, base_zones):
+    """
+    One symbol: fold the new minutes, persist 15m bars, refresh structure on
+    15m close and check the latest 1m candle. Returns True if a signal fired.
+    """
+    symbol = target['symbol']
+    sec_id = target['security_id']
+
+    # A. Fetch Live Data (5-10 Days). Warm: only rows after the last folded minute are loaded.
+    last_seen = BARS.last_folded(sec_id)
+    df_1m = fetch_recent_data(dhan, sec_id, days=7, store=STORE, since=last_seen)
+    if df_1m.empty:
+        return False
+
+    # B. Persist Data (Supabase): 15m bars from the last persisted candle on
+    if BARS.add_frame(sec_id, df_1m) or last_seen is None:
+        db.save_market_data(BARS.frame(sec_id, '15m'), symbol, timeframe='15m')
+
+    # C. Analyze Dynamic Zones (cached until the next 15m close)
+    dynamic_zones = detect_structure(symbol, sec_id)
+
+    # D. Setup Strategy: BASE zones (from DB) for this symbol + dynamic zones
+    strategy = FortressStrategy(zones_file=None) # We manually inject
+    strategy.zones = [z for z in base_zones if z['symbol'] == symbol]
+    strategy.inject_intraday_zones(dynamic_zones)
+
+    # E. Check Current Price Action: the VERY LATEST 1m candle against the zones.
+    latest = df_1m.iloc[-1]
+    candle = {
+        'symbol': symbol,
+        'high': float(latest.get('high', 0)),
+        'low': float(latest.get('low', 0)),
+        'close': float(latest.get('close', 0)),
+        'open': float(latest.get('open', 0))
+    }
+
+    # Monitor assumes NEUTRAL/Manual confirmation unless updated.
+    signal_data = strategy.check_entry(candle, "NEUTRAL")
+    if not signal_data:
+        return False
+
+    action = signal_data['action']
+    key = (symbol, action, signal_data.get('zone_id'), latest.get('timestamp', latest.get('start_time')))
+    if key in ALERTED:
+        return False # Same minute already alerted by an earlier cycle
+    ALERTED.add(key)
+    logging.info(f"⚡ Signal Detected: {action} on {symbol}")
+
+    msg = f"🔥 **DYNAMIC TRADE ALERT** 🔥\n\n**Symbol**: {symbol}\n**Action**: {action}\n**Zone**: {signal_data.get('zone_id')}\n**Price**: {candle['close']}"
+    send_telegram_alert(msg)
+
+    # Log to DB
+    db.log_trade({
+        'symbol': symbol,
+        'action': action,
+        'price': candle['close'],
+        'timestamp': datetime.datetime.now().isoformat(),
+        'details': str(signal_data)
+    })
+    return True
 
 def run_scanner():
+    """
+    One scan pass (GitHub cron entry point).
+    """
     # 1. Time Check
     is_open, reason = is_market_open_now()
     if not is_open:
@@ -67,107 +215,78 @@ def run_scanner():
 
     # 2. Initialize Components
     try:
-        dhan = dhanhq(CLIENT_ID, ACCESS_TOKEN)
-        db = FortressDB()
-        broker = VirtualBroker(log_file="fortress-paper/data/trade_logs.csv") # Kept for legacy compat, but DB preferred
+        dhan, db = connect()
     except Exception as e:
         logging.error(f"❌ Connection Failed: {e}")
         send_telegram_alert(f"⚠️ Monitor Failed: Connection Error - {e}")
         return
 
     logging.info("🚀 Starting Intraday Market Monitor (Dynamic + Supabase)...")
-    
-    # 3. Load Base Zones from DB (Daily Analysis)
-    base_zones = db.get_active_zones() # Fetch all active
-    if not base_zones:
-        logging.warning("⚠️ No Zones found in Supabase. Proceeding with Dynamic Analysis only.")
-    
-    # 4. Filter Targets (Map gathered from Daily Zones or Config)
-    # For now, we scan what we find in DB + hardcoded targets if DB empty
-    params = []
-    if base_zones:
-         # Dedup symbols
-         seen = set()
-         for z in base_zones:
-             if z['symbol'] not in seen:
-                 params.append({'symbol': z['symbol'], 'security_id': z['security_id']})
-                 seen.add(z['symbol'])
-    else:
-         # Fallback mechanism if DB empty? 
-         # We need security_ids. 
-         # The monitor relies on Daily Analysis to populate the ID map effectively.
-         logging.error("❌ No targets found (Zones Empty). Run Analyzer first.")
-         return
-
-    # 5. Scan Loop
+
+    # 3. Load Base Zones from DB (Daily Analysis) -> targets
+    base_zones, params = load_targets(db)
+    if not params:
+        # The monitor relies on Daily Analysis to populate the ID map effectively.
+        logging.error("❌ No targets found (Zones Empty). Run Analyzer first.")
+        return
+
+    # 4. Scan Loop
     for target in params:
-        symbol = target['symbol']
-        sec_id = target['security_id']
-        
-        logging.info(f"🔍 Scanning {symbol}...")
-        
-        # A. Fetch Live Data (5-10 Days)
-        df_1m = fetch_recent_data(dhan, sec_id, days=7)
-        
-        if df_1m.empty:
-            continue
-            
-        # B. Persist Data (Supabase)
-        # Resample first to 15m to save space? User asked to "store every data".
-        # Storing 1m data for 7 days might be heavy per run. 
-        # But saving 15m is efficient.
-        df_15m = resample_to_15m(df_1m)
-        db.save_market_data(df_15m, symbol, timeframe='15m')
-        
-        # C. Analyze Dynamic Zones
-        dynamic_zones = identify_smart_money_structure(df_15m, symbol, sec_id)
-        
-        # D. Setup Strategy
-        # Initialize strategy with BASE zones (from DB)
-        # Check uniqueness against this symbol
-        target_base_zones = [z for z in base_zones if z['symbol'] == symbol]
-        
-        strategy = FortressStrategy(zones_file=None) # We manually inject
-        strategy.zones = target_base_zones 
-        strategy.inject_intraday_zones(dynamic_zones)
-        
-        # E. Check Current Price Action
-        # We need the VERY LATEST candle.
-        # df_1m has the latest minute.
-        latest = df_1m.iloc[-1]
-        
-        # Note: Strategy check usually runs on Close of 15m or 5m.
-        # Here we check the latest 1m price against the zones.
-        candle = {
-            'symbol': symbol,
-            'high': float(latest.get('high', 0)),
-            'low': float(latest.get('low', 0)),
-            'close': float(latest.get('close', 0)),
-            'open': float(latest.get('open', 0))
-        }
-        
-        # Need Sentiment? (Expensive to calc every time). 
-        # Assume NEUTRAL for speed or implement lightweight check.
-        # Monitor assumes NEUTRAL/Manual confirmation unless updated.
-        
-        signal_data = strategy.check_entry(candle, "NEUTRAL")
-        
-        if signal_data:
-            action = signal_data['action']
-            logging.info(f"⚡ Signal Detected: {action} on {symbol}")
-            
-            msg = f"🔥 **DYNAMIC TRADE ALERT** 🔥\n\n**Symbol**: {symbol}\n**Action**: {action}\n**Zone**: {signal_data.get('zone_id')}\n**Price**: {candle['close']}"
-            send_telegram_alert(msg)
-            
-            # Log to DB
-            trade_record = {
-                'symbol': symbol,
-                'action': action,
-                'price': candle['close'],
-                'timestamp': datetime.datetime.now().isoformat(),
-                'details': str(signal_data)
-            }
-            db.log_trade(trade_record)
+        logging.info(f"🔍 Scanning {target['symbol']}...")
+        scan_symbol(dhan, db, target, base_zones)
+    logging.info(f"🌐 Dhan REST: {dhan.report()}")
+
+def run_daemon(interval=DAEMON_INTERVAL, zone_refresh=ZONE_REFRESH_INTERVAL):
+    """
+    Long-running scanner: connections, zones, 1m history and 15m bars stay warm.
+    Each cycle folds only the new minutes and re-runs structure detection
+    only for symbols whose 15m bar has closed.
+    """
+    try:
+        dhan, db = connect()
+    except Exception as e:
+        logging.error(f"❌ Connection Failed: {e}")
+        send_telegram_alert(f"⚠️ Monitor Failed: Connection Error - {e}")
+        return
+
+    logging.info(f"🚀 Market Monitor daemon started (every {interval}s)")
+    base_zones, params, zones_at = [], [], 0.0
+
+    while True:
+        cycle_start = time.time()
+        is_open, reason = is_market_open_now()
+        if not is_open:
+            logging.info(f"⏸️ Monitor idle: {reason}")
+        else:
+            prune_alerts()
+            if not params or cycle_start - zones_at >= zone_refresh:
+                try:
+                    base_zones, params = load_targets(db)
+                    zones_at = cycle_start
+                    logging.info(f"🔄 Loaded {len(base_zones)} zones for {len(params)} symbols")
+                except Exception as e:
+                    logging.error(f"❌ Zone reload failed: {e}")
+
+            signals = 0
+            for target in params:
+                try:
+                    signals += scan_symbol(dhan, db, target, base_zones)
+                except Exception as e:
+                    logging.error(f"Scan Error ({target['symbol']}): {e}")
+            logging.info(f"⏱️ Scan cycle: {len(params)} symbols, {signals} signals in {(time.time() - cycle_start) * 1000:.0f} ms")
+            logging.info(f"🌐 Dhan REST: {dhan.report()}")
+
+        time.sleep(max(interval - (time.time() - cycle_start), 1))
 
 if __name__ == "__main__":
-    run_scanner()
+    parser = argparse.ArgumentParser(description="Intraday Market Monitor")
+    parser.add_argument('--daemon', action='store_true', help="keep running with warm state instead of a single pass")
+    parser.add_argument('--interval', type=int, default=DAEMON_INTERVAL, help="seconds between daemon cycles")
+    args = parser.parse_args()
+    try:
+        if args.daemon:
+            run_daemon(interval=args.interval)
+        else:
+            run_scanner()
+    except KeyboardInterrupt:
+        pass
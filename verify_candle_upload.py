@@ -0,0 +1,105 @@
+import sys
+import os
+import json
+import threading
+import numpy as np
+import pandas as pd
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+# Add 'fortress-paper' to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), 'fortress-paper')))
+
+class FakePostgREST(BaseHTTPRequestHandler):
+    """
+    Local stand-in for Supabase's REST endpoint (market_candles only).
+    Upserts into an in-memory table and records every request payload.
+    """
+    table = {}     # {(symbol, timeframe, timestamp): row}
+    requests = []  # [(method, rows, bytes)]
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        params = parse_qs(urlparse(self.path).query)
+        symbol = params['symbol'][0].split('.', 1)[1]
+        timeframe = params['timeframe'][0].split('.', 1)[1]
+        rows = [r for k, r in self.table.items() if k[0] == symbol and k[1] == timeframe]
+        rows.sort(key=lambda r: r['timestamp'], reverse=True)
+        self.requests.append(('GET', 0, 0))
+        # timestamptz columns come back with an offset
+        self._reply(200, [{'timestamp': r['timestamp'] + '+00:00'} for r in rows[:1]])
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        rows = json.loads(body)
+        for r in rows:
+            self.table[(r['symbol'], r['timeframe'], r['timestamp'])] = r
+        self.requests.append(('POST', len(rows), len(body)))
+        self._reply(201, [])
+
+def make_15m(days=60, seed=3):
+    rng = np.random.default_rng(seed)
+    sessions = pd.bdate_range(end='2026-01-16', periods=days)
+    offsets = pd.to_timedelta(np.arange(25) * 15 + 9 * 60 + 15, unit='m')
+    start_time = (sessions.values[:, None] + offsets.values[None, :]).ravel()
+    close = 22000 + np.cumsum(rng.normal(0, 10, len(start_time)))
+    return pd.DataFrame({
+        'start_time': pd.to_datetime(start_time),
+        'open': close - 2, 'high': close + 5, 'low': close - 5, 'close': close,
+        'volume': rng.integers(100, 1000, len(start_time)).astype(float),
+    })
+
+def verify():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakePostgREST)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ['SUPABASE_URL'] = f"http://127.0.0.1:{server.server_port}"
+    os.environ['SUPABASE_KEY'] = "local-test-key"
+
+    from core.db import FortressDB
+
+    df = make_15m()
+    db = FortressDB()
+
+    def run(label, frame, fresh=False):
+        nonlocal db
+        if fresh:
+            db = FortressDB()
+        start = len(FakePostgREST.requests)
+        db.save_market_data(frame, "NIFTY-FUT", timeframe='15m')
+        sent = FakePostgREST.requests[start:]
+        posts = [r for r in sent if r[0] == 'POST']
+        print(f"   {label}: {len(sent)} requests, {sum(r[1] for r in posts)} rows, "
+              f"{sum(r[2] for r in posts) / 1024:.1f} KB, chunks {[r[1] for r in posts]}")
+        return posts
+
+    print(f"📊 {len(df)} x 15m candles")
+    first = run("Initial upload", df)
+    again = run("Same frame again", df)
+    grown = df.copy()
+    grown.loc[len(grown) - 1, 'close'] += 7  # last candle was partial
+    nxt = grown.iloc[-1:].copy()
+    nxt['start_time'] += pd.Timedelta(minutes=15)
+    grown = pd.concat([grown, nxt], ignore_index=True)
+    later = run("One new candle", grown)
+    restart = run("After restart (watermark from server)", grown, fresh=True)
+
+    stored = len(FakePostgREST.table)
+    ok = (sum(r[1] for r in first) == len(df) and max(r[1] for r in first) <= 500
+          and sum(r[1] for r in again) == 1 and sum(r[1] for r in later) == 2
+          and sum(r[1] for r in restart) == 1 and stored == len(grown)
+          and FakePostgREST.table[('NIFTY-FUT', '15m', grown['start_time'].iloc[-2].isoformat())]['close'] == grown['close'].iloc[-2])
+    print(f"{'✅' if ok else '❌'} Stored rows: {stored} (expected {len(grown)})")
+    server.shutdown()
+
+if __name__ == "__main__":
+    verify()
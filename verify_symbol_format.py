@@ -1,9 +1,15 @@
-from dhanhq import dhanhq
-from config import CLIENT_ID, ACCESS_TOKEN
-import pandas as pd
+import sys
+import os
 import datetime
 import logging
 
+# Add 'fortress-paper' to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), 'fortress-paper')))
+
+from dhanhq import dhanhq
+from config import CLIENT_ID, ACCESS_TOKEN
+from core.scrip_master import ScripMaster
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -12,19 +18,8 @@ def check():
         logging.info("🚀 Starting Symbol Format Verification...")
         dhan = dhanhq(CLIENT_ID, ACCESS_TOKEN)
         
-        logging.info("📥 Fetching Scrip Master from Dhan...")
-        res = dhan.fetch_security_list()
-        
-        if isinstance(res, dict) and 'data' in res:
-             df = pd.DataFrame(res['data'])
-        elif isinstance(res, pd.DataFrame):
-             df = res
-        else:
-             logging.error("❌ Invalid Scrip Master Format")
-             return
-
-        # Normalize columns
-        df.columns = [x.strip().upper() for x in df.columns]
+        logging.info("📥 Loading Scrip Master (daily cache)...")
+        master = ScripMaster.load(dhan)
         
         # Helper Logic (Same as main.py)
         today = datetime.date.today()
@@ -42,21 +37,22 @@ def check():
         
         logging.info(f"🔎 Searching for: '{test_symbol}'")
         
-        # Search
-        symbol_col = next((c for c in df.columns if 'TRADING_SYMBOL' in c), 'SEM_TRADING_SYMBOL')
-        row = df[df[symbol_col] == test_symbol]
+        # Search (same O(1) lookup as main.subscribe_to_legs)
+        sec_id = master.security_id(test_symbol)
         
-        if not row.empty:
+        if sec_id:
             logging.info("✅ SUCCESS! Symbol found in Scrip Master.")
-            logging.info(f"📄 Record: {row.iloc[0].to_dict()}")
+            logging.info(f"📄 Record: {master.record(sec_id)}")
         else:
             logging.error("❌ FAILED! Symbol not found.")
             logging.info("💡 Checking similar symbols to debug format:")
             # Filter for NIFTY and PE to show examples
-            mask = df[symbol_col].str.contains("NIFTY") & df[symbol_col].str.contains("PE") & df[symbol_col].str.contains(str(test_strike))
-            similar = df[mask].head(5)
+            df = master.df
+            cols = [c for c in ('trading_symbol', 'custom_symbol') if c in df.columns]
+            mask = df['trading_symbol'].str.contains("NIFTY") & df['trading_symbol'].str.contains("PE") & df['trading_symbol'].str.contains(str(test_strike))
+            similar = df[mask.fillna(False)].head(5)
             logging.info(f"Found {len(similar)} similar records:")
-            print(similar[[symbol_col]].to_string(index=False))
+            print(similar[cols].to_string(index=False))
 
     except Exception as e:
         logging.error(f"❌ Error: {e}")
@@ -0,0 +1,119 @@
+import sys
+import os
+import json
+import time
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add 'fortress-paper' to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), 'fortress-paper')))
+
+from core.telegram_bot import TelegramNotifier
+
+logging.basicConfig(level=logging.WARNING)
+
+class StubTelegram:
+    """
+    Local stand-in for api.telegram.org: records sendMessage calls, answers
+    with a scripted status per call (200 once the script runs out), and adds
+    `latency` seconds to every response.
+    """
+    def __init__(self, latency=0.2):
+        self.latency = latency
+        self.script = []
+        self.calls = []     # (monotonic time, payload)
+        self.connections = set()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1" # Keep-alive, like the real API
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                stub.calls.append((time.monotonic(), payload))
+                stub.connections.add(self.client_address)
+                time.sleep(stub.latency)
+                status = stub.script.pop(0) if stub.script else 200
+                body = {"ok": status == 200}
+                if status == 429:
+                    body["parameters"] = {"retry_after": 1}
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def reset(self, script=()):
+        self.script = list(script)
+        self.calls = []
+        self.connections = set()
+
+def check(ok, label):
+    print(f"{'✅' if ok else '❌'} {label}")
+    return ok
+
+def verify_notifier():
+    print("🚀 Telegram notifier against a local stand-in (200 ms per API call)...")
+    stub = StubTelegram(latency=0.2)
+    notifier = TelegramNotifier("TOKEN", "CHAT", base_url=stub.url, backoff=0.1)
+    results = []
+
+    # 1. Caller cost: a burst of alerts while the API is slow
+    stub.reset()
+    start = time.perf_counter()
+    for i in range(20):
+        notifier.send(f"🔥 Alert {i}")
+    per_call = (time.perf_counter() - start) / 20 * 1e6
+    results.append(check(per_call < 100, f"send() costs {per_call:.1f} µs per alert (blocking post: ~{stub.latency * 1000:.0f} ms)"))
+
+    # 2. The burst is merged into one message on one pooled connection
+    results.append(check(notifier.flush(timeout=10), "flush() delivered the burst"))
+    texts = [p['text'] for _, p in stub.calls]
+    results.append(check(len(texts) == 1 and all(f"Alert {i}" in texts[0] for i in range(20)),
+                         f"20 alerts merged into {len(texts)} message(s)"))
+
+    # 3. Rate limit: posts are spaced by the 1 msg/s bucket (alerts that wait are merged), on a reused connection
+    stub.reset()
+    for i in range(3):
+        notifier.send(f"Spaced {i}")
+        time.sleep(0.6) # Past the merge window
+    notifier.flush(timeout=10)
+    times = [t for t, _ in stub.calls]
+    gaps = [b - a for a, b in zip(times, times[1:])]
+    delivered = "\n\n".join(p['text'] for _, p in stub.calls)
+    results.append(check(len(times) >= 2 and min(gaps) >= 0.95 and all(f"Spaced {i}" in delivered for i in range(3)),
+                         f"3 alerts in {len(times)} messages, gaps {', '.join(f'{g:.2f}s' for g in gaps)} (>= 1s)"))
+    results.append(check(len(stub.connections) == 1, f"{len(stub.connections)} connection(s) reused across posts"))
+
+    # 4. 429 honours retry_after, 5xx is retried with backoff
+    stub.reset(script=[429, 500])
+    start = time.monotonic()
+    notifier.send("Retry me")
+    notifier.flush(timeout=15)
+    results.append(check(len(stub.calls) == 3 and notifier.failed == 0,
+                         f"429 + 500 then delivered: {len(stub.calls)} attempts in {time.monotonic() - start:.1f}s (retry_after 1s)"))
+
+    # 5. Markdown the API rejects is resent as plain text
+    stub.reset(script=[400])
+    notifier.send("Broken *markdown")
+    notifier.flush(timeout=10)
+    results.append(check(len(stub.calls) == 2 and 'parse_mode' not in stub.calls[1][1], "400 (Markdown) resent without parse_mode"))
+
+    notifier.close()
+    stub.server.shutdown()
+    print(f"📊 queued={notifier.queued} sent={notifier.sent} failed={notifier.failed} dropped={notifier.dropped}")
+    print("✅ All checks passed." if all(results) else "❌ Some checks failed.")
+    return all(results)
+
+if __name__ == "__main__":
+    sys.exit(0 if verify_notifier() else 1)